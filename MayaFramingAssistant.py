@@ -3,74 +3,63 @@
 # script by CHRISTOPHE MOREAU moreau.vfx@gmail.com
 # 03/2022
 
+import time
+importStart = time.time()
+
 from PySide2 import QtWidgets, QtCore, QtGui
-from PySide2.QtUiTools import QUiLoader
 from maya.app.general.mayaMixin import MayaQWidgetBaseMixin
 import maya.cmds as cmds
 import maya.mel as mel
-from os import listdir
+from sceneCache import sceneCache
+from panelTracker import panelTracker
+from attributeHandles import CameraHandles, ImagePlaneHandles
+from updateScheduler import UpdateScheduler
+from attributeSync import AttributeSync
+from framingHistory import FramingHistory
+from overlayLibrary import overlayLibrary, userCacheFolder
+import framingState
+from batchFraming import applyPreset, printReport
+from guideGenerator import overlayPath
+from formatRegistry import formatRegistry
+from framingEngine import FramingEngine, clip, dollyZoomDistance, formatChanges, overscanFromSlider, panFromDrag, \
+    resolutionGateSizeY, sliderFromOverscan, zoomFromWheel
+import collections
 import os
 import sys
 
+# seconds spent in each startup step, see startupReport()
+startupTimes = collections.OrderedDict()
 
-# listing *.png from picture's folder
-def getListPic():
-    pathImage = str(sys.path[0]) + r"/pictures"
-    lst = listdir(pathImage)
-    listPic = []
-    for x in lst:
-        if x.endswith(".png"):
-            listPic.append(os.path.splitext(x)[0])
-    return listPic
+# the window is built once per Maya session, then reused by main()
+window = None
 
 
-# listing user cameras from scene
-def getListCamera():
-    listCamera = [c for c in cmds.ls(type='camera') if not cmds.camera(c, q=True, sc=True)]
-    listCamera = cmds.listRelatives(listCamera, parent=True, fullPath=0)
+# listing overlays from picture's folder (indexed, see overlayLibrary.py)
+def getListPic():
+    return overlayLibrary.names()
 
-    if listCamera:
-        pass
-    else:
-        listCamera = []
-    return listCamera
 
+def picturePath(name):
+    return overlayLibrary.path(overlayLibrary.idFromName(name))
 
-# get the actual camera viewport
-def viewerToUse():
-    currentViewPort = ''
-    currentCamera = ''
-    for viewPort in cmds.getPanel(type="modelPanel"):
-        curCamera = cmds.modelEditor(viewPort, q=1, av=1, cam=1)
-        nomCam = list(curCamera.split('|'))
-        camera = nomCam[len(nomCam) - 2]
-
-        # workaround Maya 2022 viewport bug
-        if currentViewPort:
-            pass
-        else:
-            if camera == 'persp':
-                currentViewPort = viewPort
 
-        if camera != '':
-            if str(cmds.objectType(curCamera)) != "camera":
-                camera = nomCam[len(nomCam) - 1]
+# listing user cameras from scene (cached, see sceneCache.py)
+def getListCamera():
+    return sceneCache.cameras()
 
-        if camera in getListCamera():
-            currentViewPort = viewPort
-            currentCamera = camera
 
-    return currentViewPort, currentCamera
+# viewport driven by the tool and the user camera it looks through (tracked, see panelTracker.py)
+def viewerToUse():
+    panel = panelTracker.targetPanel()
+    camera = panelTracker.camera(panel)
+    return panel, camera if camera in getListCamera() else ''
 
 
 # get connected image plane to the given camera
 def updateImagePlaneList(camName):
-    imagePlane = ''
-    if cmds.listRelatives(camName, type='imagePlane', ad=True, c=True):
-        imagePlaneShape = cmds.listRelatives(camName, type='imagePlane', ad=True, c=True)
-        imagePlane = cmds.listRelatives(imagePlaneShape, parent=True)
-    else:
-        pass
+    imagePlane = sceneCache.imagePlanes(camName)
+    if not imagePlane:
+        imagePlane = ''
     return imagePlane
 
 
@@ -79,8 +68,61 @@ def getCameraFromViewport(viewport):
     return curCamera
 
 
-def clip(value, lower, upper):
-    return lower if value < lower else upper if value > upper else value
+# compile the .ui to python once, rebuilt only when the .ui is newer
+# the compiled file is executed: it lives next to the .ui or in the user's own cache,
+# never in a shared folder, and is written under another name then renamed so a
+# partial write is never picked up
+def compileUi(uiFile):
+    pyFile = os.path.splitext(uiFile)[0] + '_ui.py'
+    if not os.access(os.path.dirname(uiFile), os.W_OK):
+        pyFile = os.path.join(userCacheFolder('ui'), 'MayaFramingAssistant_' + os.path.basename(pyFile))
+    if os.path.exists(pyFile) and os.path.getmtime(pyFile) >= os.path.getmtime(uiFile):
+        return pyFile
+    partial = pyFile + '.{}.tmp'.format(os.getpid())
+    try:
+        import pyside2uic
+        if not os.path.isdir(os.path.dirname(pyFile)):
+            os.makedirs(os.path.dirname(pyFile))
+        with open(partial, 'w') as f:
+            pyside2uic.compileUi(uiFile, f)
+        getattr(os, 'replace', os.rename)(partial, pyFile)
+    except (ImportError, IOError, OSError):
+        # no compiler available (recent Maya), QUiLoader is used instead
+        if os.path.exists(partial):
+            os.remove(partial)
+        return ''
+    return pyFile
+
+
+# build the form from its compiled version, or parse the .ui as before
+def loadUi(uiFile):
+    pyFile = compileUi(uiFile)
+    if not pyFile:
+        from PySide2.QtUiTools import QUiLoader
+        return QUiLoader().load(uiFile)
+
+    namespace = {}
+    with open(pyFile) as f:
+        exec(compile(f.read(), pyFile, 'exec'), namespace)
+    formClass = [value for name, value in namespace.items() if name.startswith('Ui_')][0]
+    form = formClass()
+    widget = QtWidgets.QMainWindow()
+    form.setupUi(widget)
+    # same access as QUiLoader: widgets are attributes of the returned form
+    for name, value in vars(form).items():
+        setattr(widget, name, value)
+    return widget
+
+
+def recordStartup(step, start):
+    startupTimes[step] = time.time() - start
+
+
+def startupReport():
+    total = sum(startupTimes.values())
+    steps = ', '.join('{} {:.1f} ms'.format(step, seconds * 1000.0) for step, seconds in startupTimes.items())
+    print('Framing Helper startup: {} (total {:.1f} ms)'.format(steps, total * 1000.0))
+    return dict(startupTimes, total=total)
 
 
 class MainWindow(MayaQWidgetBaseMixin, QtWidgets.QMainWindow):
@@ -88,7 +130,7 @@ class MainWindow(MayaQWidgetBaseMixin, QtWidgets.QMainWindow):
         super(MainWindow, self).__init__(parent)
         # using the UIFILEPATH
         UIFILEPATH = str(sys.path[0]) + str(r'/gui/mainWindow.ui')
-        self.UI = QUiLoader().load(UIFILEPATH)
+        self.UI = loadUi(UIFILEPATH)
         # Get the window title from the ui file
         self.setWindowTitle('Framing Helper')
         # Main widget
@@ -98,7 +140,7 @@ class MainWindow(MayaQWidgetBaseMixin, QtWidgets.QMainWindow):
         # self.setFixedSize(265, 396)
 
         # Path to png picture
-        self.pathImage = str(sys.path[0]) + r"/pictures"
+        self.pathImage = overlayLibrary.folder
 
         # Update Camera at launch
         self.activateOptions(2)
@@ -108,20 +150,33 @@ class MainWindow(MayaQWidgetBaseMixin, QtWidgets.QMainWindow):
         self.UI.showManip.clicked.connect(self.showManip)
         self.UI.dollyZoomCheckBox.clicked.connect(self.dollyZoomCheck)
         self.UI.showFrustum.clicked.connect(self.showFrustum)
-        self.UI.listPic.setCurrentRow(0)
         self.UI.listPic.itemClicked.connect(self.userChangePic)
-        self.UI.listPic.addItems(getListPic())
-        self.UI.preview.setPixmap(self.pathImage + '//' + self.UI.listPic.item(0).text() + '.png')
+        # tabs are filled the first time they are shown (or needed)
+        self.previewPath = ''
+        self.pixmapCache = None
+        self.formatTabReady = False
+        self.UI.tabWidget.currentChanged.connect(self.tabChanged)
         self.UI.colorOffset.valueChanged.connect(self.colorOffsetValue)
         self.UI.alphaGain.valueChanged.connect(self.alphaGainValue)
         self.UI.overScan.valueChanged.connect(self.overScanValue)
+        # coalesced writes for the sliders, one undo chunk per drag
+        self.scheduler = UpdateScheduler()
+        # and the other way around, scene edits pushed into the widgets
+        self.attributeSync = AttributeSync(self.scheduler)
+        # the tool's own undo / redo and saved A / B framings (framingHistory.py)
+        self.history = FramingHistory(self.scheduler)
+        for slider in (self.UI.colorOffset, self.UI.alphaGain, self.UI.overScan, self.UI.focalLength, self.UI.rollSlider):
+            slider.sliderPressed.connect(lambda name=slider.objectName(): self.beginGesture(name))
+            slider.sliderReleased.connect(self.endGesture)
         self.UI.rotateButton.clicked.connect(self.rotateImagePlane)
         self.UI.gate.clicked.connect(self.resolutionGate)
         self.UI.fit.clicked.connect(self.fitSettings)
         self.UI.aspectRatio.clicked.connect(self.aspectRatio)
-        self.UI.hdFormat.clicked.connect(self.renderSettings)
-        self.UI.scopeFormat.clicked.connect(self.renderSettings)
-        self.UI.flatFormat.clicked.connect(self.renderSettings)
+        # format id -> radio button, built with the Render Format tab (formats.json)
+        self.formatButtons = collections.OrderedDict()
+        self.formatGroup = None
+        # framing math and render format writes (framingEngine.py)
+        self.engine = FramingEngine(cmds)
 
         self.UI.pushColor.clicked.connect(self.colorSelector)
         self.UI.tumbleTool.clicked.connect(self.tumbleTool)
@@ -135,6 +190,46 @@ class MainWindow(MayaQWidgetBaseMixin, QtWidgets.QMainWindow):
 
         self.UI.rollSlider.valueChanged.connect(self.rollTool)
 
+        # Tools menu
+        self.toolsMenu = self.menuBar().addMenu('Tools')
+        self.toolsMenu.addAction('Apply Guide to Selected Cameras', lambda: self.batchApply(True))
+        self.toolsMenu.addAction('Apply Guide to All Cameras', lambda: self.batchApply(False))
+        self.toolsMenu.addAction('Copy Framing to Selected Cameras', self.copyFraming)
+        self.toolsMenu.addAction('Camera Browser', self.showCameraBrowser)
+        self.toolsMenu.addAction('Compare Selected Cameras', self.showCompareGrid)
+        self.proxyAction = self.toolsMenu.addAction('Proxy Overlay Textures')
+        self.proxyAction.setCheckable(True)
+        self.proxyAction.toggled.connect(self.proxyTextures)
+        self.browserDock = None
+        self.compareDock = None
+        self.toolsMenu.addSeparator()
+        self.toolsMenu.addAction('Undo Framing', self.undoFraming)
+        self.toolsMenu.addAction('Redo Framing', self.redoFraming)
+        self.toolsMenu.addAction('Save Framing A', lambda: self.saveFraming('A'))
+        self.toolsMenu.addAction('Save Framing B', lambda: self.saveFraming('B'))
+        self.toolsMenu.addAction('Toggle Framing A/B', self.toggleFraming)
+        self.undoableAction = self.toolsMenu.addAction('Keep Framing Out of Maya Undo')
+        self.undoableAction.setCheckable(True)
+        self.undoableAction.toggled.connect(lambda state: setattr(self.scheduler, 'undoable', not state))
+        self.toolsMenu.addSeparator()
+        self.toolsMenu.addAction('Add Guide as Layer', self.addGuideLayer)
+        self.toolsMenu.addAction('Clear Guide Layers', self.clearGuideLayers)
+        self.toolsMenu.addSeparator()
+        self.toolsMenu.addAction('Bake Dolly Zoom...', self.bakeDollyZoom)
+        self.toolsMenu.addAction('Auto Frame Selected Targets...', self.autoFrame)
+        self.toolsMenu.addAction('Framing Report of Selected Subjects...', self.framingReport)
+        self.recordAction = self.toolsMenu.addAction('Record Framing Moves')
+        self.recordAction.setCheckable(True)
+        self.recordAction.toggled.connect(self.recordFraming)
+        self.recorder = None
+        self.masksAction = self.toolsMenu.addAction('Show Safe Areas and Letterbox')
+        self.masksAction.setCheckable(True)
+        self.masksAction.toggled.connect(self.showMasks)
+        self.maskLayers = None
+        if 'instrumentation' in sys.modules and sys.modules['instrumentation'].enabled():
+            self.toolsMenu.addSeparator()
+            self.toolsMenu.addAction('Save Command Profile...', self.saveProfile)
+
         # Focal Length Preset
         self.UI.pushButton12.clicked.connect(self.focalPreset)
         self.UI.pushButton24.clicked.connect(self.focalPreset)
@@ -149,15 +244,22 @@ class MainWindow(MayaQWidgetBaseMixin, QtWidgets.QMainWindow):
 
         # Global Variables
         self.imagePlane = ''
-        self.selectedPic = str(self.UI.listPic.item(0).text())
+        self.selectedPic = getListPic()[0] if getListPic() else ''
         self.camAppertureY = 0.0
         self.Distance = 0.0
         self.Focal = 0.0
         self.currentCameraShape = ''
         self.imagePlaneShape = ''
+        self.cameraHandles = None
+        self.imagePlaneHandles = None
+        # guide layers composited on the image plane, bottom first (overlayStack.py)
+        self.layers = []
+        self.layersDirty = False
+        self.overlayStack = None
+        self.panZoomZoom = 1.0
         self.mainCameraViewer = ''
-        self.viewerToUse = viewerToUse()[0]
-        self.cameraToUse = viewerToUse()[1]
+        self.viewerToUse, self.cameraToUse = viewerToUse()
+        panelTracker.addListener(self.viewportChanged)
         self.initPanZoomValueX = 0.0
         self.initPanZoomValueY = 0.0
         self.currentPanZoomValueX = 0.0
@@ -165,21 +267,10 @@ class MainWindow(MayaQWidgetBaseMixin, QtWidgets.QMainWindow):
         self.UI.panZoomArea.setEnabled(0)
 
         if self.UI.imagePlane.text():
-            self.imagePlaneShape = str(cmds.listRelatives(self.UI.imagePlane.text(), ad=0, s=1)[0])
+            self.bindImagePlane(str(cmds.listRelatives(self.UI.imagePlane.text(), ad=0, s=1)[0]))
         self.initCameraCenterOfInterest = 0
         self.initCameraFieldOfView = 0
-        # Get render settings format
-        self.getWidth = cmds.getAttr("defaultResolution.width")
-        self.getHeight = cmds.getAttr("defaultResolution.height")
-        if self.getHeight == 1080 and self.getWidth == 1920:
-            # HD
-            self.UI.hdFormat.setChecked(True)
-        if self.getHeight == 1080 and self.getWidth == 1998:
-            # FLAT
-            self.UI.flatFormat.setChecked(True)
-        if self.getHeight == 858 and self.getWidth == 2048:
-            # SCOPE
-            self.UI.scopeFormat.setChecked(True)
+        self.tabChanged(self.UI.tabWidget.currentIndex())
 
         # Create event when camera comboBox is pressed
         self.UI.listCam.installEventFilter(self)
@@ -188,8 +279,102 @@ class MainWindow(MayaQWidgetBaseMixin, QtWidgets.QMainWindow):
         # Action when user close the toolBox
         # self.UI.gate.clicked.connect(self.resolutionGate)
 
+    def tabChanged(self, index):
+        tab = self.UI.tabWidget.widget(index)
+        if tab is self.UI.tab_2:
+            self.ensureOverlayTab()
+        elif tab is self.UI.tab_3:
+            self.ensureFormatTab()
+
+    # overlay list and preview cache, built the first time the Image Plane tab is needed
+    def ensureOverlayTab(self):
+        if self.pixmapCache is not None:
+            return
+        from pixmapCache import PixmapCache
+        self.UI.listPic.addItems(getListPic())
+        self.UI.listPic.setCurrentRow(0)
+        # previews are decoded off the GUI thread and kept at the preview size
+        self.pixmapCache = PixmapCache(sizes=[(self.UI.preview.width(), self.UI.preview.height())], parent=self)
+        if not self.previewPath and getListPic():
+            self.setPreview(picturePath(getListPic()[0]))
+        # the rest of the library is decoded once the window is on screen
+        QtCore.QTimer.singleShot(0, lambda: self.pixmapCache.prefetch([picturePath(pic) for pic in getListPic()]))
+
+    def ensureFormatTab(self):
+        if self.formatTabReady:
+            return
+        self.formatTabReady = True
+        self.buildFormatButtons()
+        self.syncRenderFormat()
+
+    # one radio button per registered format, in place of the ones of the .ui
+    def buildFormatButtons(self):
+        layout = self.UI.formLayoutWidget.layout()
+        for button in (self.UI.hdFormat, self.UI.flatFormat, self.UI.scopeFormat):
+            layout.removeWidget(button)
+            button.deleteLater()
+        self.formatGroup = QtWidgets.QButtonGroup(self)
+        for formatKey in formatRegistry.keys():
+            button = QtWidgets.QRadioButton(formatRegistry.label(formatKey))
+            button.setSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Fixed)
+            button.clicked.connect(lambda checked=False, key=formatKey: self.renderSettings(key))
+            layout.addWidget(button)
+            self.formatGroup.addButton(button)
+            self.formatButtons[formatKey] = button
+        # the box grows with the list, up to the bottom of the tab
+        available = self.UI.tab_3.height() - self.UI.formLayoutWidget.y() - 10
+        height = min(layout.sizeHint().height(), available)
+        self.UI.formLayoutWidget.resize(self.UI.formLayoutWidget.width(), height)
+        self.UI.frame_5.resize(self.UI.frame_5.width(), height + 20)
+
+    # Get render settings format
+    def syncRenderFormat(self):
+        self.getWidth = cmds.getAttr("defaultResolution.width")
+        self.getHeight = cmds.getAttr("defaultResolution.height")
+        formatKey = formatRegistry.detect(self.getWidth, self.getHeight)
+        if formatKey:
+            self.formatButtons[formatKey].setChecked(True)
+
+    # reopening the tool: same window, state read again from the scene
+    def resync(self):
+        panelTracker.addListener(self.viewportChanged)
+        # detached in closeEvent
+        self.history.attach()
+        if self.formatTabReady:
+            self.syncRenderFormat()
+        if getListCamera():
+            self.updateCameraList()
+
+    # show a picture in the preview, from the cache or when the worker is done
+    def setPreview(self, path):
+        self.ensureOverlayTab()
+        self.previewPath = path
+        self.pixmapCache.request(path, lambda pixmap: self._showPreview(path, pixmap))
+
+    def _showPreview(self, path, pixmap):
+        # a later click may have asked for another picture in the meantime
+        if path == self.previewPath:
+            self.UI.preview.setPixmap(pixmap)
+
     def closeEvent(self, event):
+        self.endGesture()
         self.tumbleTool(0)
+        panelTracker.removeListener(self.viewportChanged)
+        self.attributeSync.clear()
+        self.recordAction.setChecked(False)
+        self.history.detach()
+        if self.browserDock is not None:
+            self.browserDock.widget().close()
+        if self.compareDock is not None:
+            self.compareDock.widget().close()
+
+    # the user focused another viewport, or looked through another camera in it
+    def viewportChanged(self, panel, camera):
+        self.viewerToUse = panel
+        index = self.UI.listCam.findText(camera)
+        if index != -1 and index != self.UI.listCam.currentIndex():
+            # changeCamera follows, the panel already looks through the camera
+            self.UI.listCam.setCurrentIndex(index)
 
     def cursorInWidget(self):
         cursorPos = QtGui.QCursor.pos()
@@ -204,7 +389,9 @@ class MainWindow(MayaQWidgetBaseMixin, QtWidgets.QMainWindow):
     def eventFilter(self, obj, event):
 
         if event.type() == event.MouseButtonPress and obj is self.UI.listCam and self.UI.listCam != '':
-            self.updateCameraList()
+            # the cache knows when cameras come and go, no rebuild when nothing changed
+            if getListCamera() != [self.UI.listCam.itemText(i) for i in range(self.UI.listCam.count())]:
+                self.updateCameraList()
 
         if event.type() == QtCore.QEvent.Wheel and obj is self.UI.panZoomArea:
             self.panZoomWheel(event.angleDelta().y())
@@ -212,6 +399,9 @@ class MainWindow(MayaQWidgetBaseMixin, QtWidgets.QMainWindow):
         if event.type() == QtCore.QEvent.MouseButtonPress and obj is self.UI.panZoomArea:
             self.initPanZoom(event.localPos().x(), event.localPos().y())
 
+        if event.type() == QtCore.QEvent.MouseButtonRelease and obj is self.UI.panZoomArea:
+            self.endGesture()
+
         if event.type() == event.MouseMove and obj is self.UI.panZoomArea:
             if event.buttons() == QtCore.Qt.LeftButton:
                 if self.UI.panZoom.isChecked():
@@ -224,37 +414,60 @@ class MainWindow(MayaQWidgetBaseMixin, QtWidgets.QMainWindow):
         #return super(MainWindow, self).eventFilter(obj, event)
         return 0
 
+    def beginGesture(self, name):
+        if self.cameraHandles:
+            self.scheduler.beginGesture(name, self.cameraHandles.backend)
+
+    def endGesture(self):
+        if self.scheduler.gesture:
+            self.stateChanged()
+            if self.proxyAction.isChecked():
+                # color drags run on colorGain, the tinted proxy is made once, on release
+                self.scheduler.flush()
+                self.applyProxy()
+        self.scheduler.endGesture()
+        # layers edited during the drag are composited once, on release
+        if self.layersDirty:
+            self.applyLayers()
+        # overscan drags resize the mask plane once, on release
+        self.updateMasks()
+
     def initPanZoom(self, valueX, valueY):
+        self.beginGesture('panZoom')
         self.initPanZoomValueX = valueX
         self.initPanZoomValueY = valueY
-        self.currentPanZoomValueX = cmds.getAttr((str(self.currentCameraShape[0]) + '.horizontalPan'))
-        self.currentPanZoomValueY = cmds.getAttr((str(self.currentCameraShape[0]) + '.verticalPan'))
+        self.currentPanZoomValueX = self.cameraHandles.horizontalPan.get()
+        self.currentPanZoomValueY = self.cameraHandles.verticalPan.get()
+        # zoom doesn't change during a drag, read it once per press
+        self.panZoomZoom = self.cameraHandles.zoom.get()
 
+    # through the scheduler, the compare grid follows in the same write
     def initPushButton(self):
-        cmds.setAttr((str(self.currentCameraShape[0]) + '.horizontalPan'), 0)
-        cmds.setAttr((str(self.currentCameraShape[0]) + '.verticalPan'), 0)
-        cmds.setAttr((str(self.currentCameraShape[0]) + '.zoom'), 1)
+        for name, value in (('horizontalPan', 0), ('verticalPan', 0), ('zoom', 1)):
+            self.scheduler.schedule(getattr(self.cameraHandles, name), value)
+        self.scheduler.flush()
 
     def panZoom(self, state):
-        cmds.setAttr((str(self.currentCameraShape[0]) + '.panZoomEnabled'), state)
+        self.scheduler.schedule(self.cameraHandles.panZoomEnabled, state)
+        self.scheduler.flush()
         self.UI.panZoomArea.setEnabled(state)
 
     def panZoomWheel(self, value):
-        NewValue = -0.05 * (value / 120)
-        getValue = float(cmds.getAttr(str(self.currentCameraShape[0]) + '.zoom'))
-        newValue = round(float(getValue + NewValue), 3)
-        if newValue >= 0.01 and self.UI.panZoom.isChecked():
-            cmds.setAttr((str(self.currentCameraShape[0]) + '.zoom'), newValue)
-
-    def panZoomMove(self, getX, getY):  # Panel size = 150x85px
-        valueX = (((getX - self.initPanZoomValueX)/-150)*(cmds.getAttr(str(self.currentCameraShape[0]) + '.zoom'))*0.2)+self.currentPanZoomValueX
-        valueY = (((getY - self.initPanZoomValueY)/85)*(cmds.getAttr(str(self.currentCameraShape[0]) + '.zoom'))*0.2)+self.currentPanZoomValueY
-        cmds.setAttr((str(self.currentCameraShape[0]) + '.horizontalPan'), clip(valueX, -1.4, 1.4))
-        cmds.setAttr((str(self.currentCameraShape[0]) + '.verticalPan'), clip(valueY, -1, 1))
+        newValue = zoomFromWheel(float(self.scheduler.value(self.cameraHandles.zoom)), value)
+        if newValue is not None and self.UI.panZoom.isChecked():
+            self.scheduler.schedule(self.cameraHandles.zoom, newValue)
+
+    def panZoomMove(self, getX, getY):
+        area = (self.UI.panZoomArea.width(), self.UI.panZoomArea.height())
+        valueX, valueY = panFromDrag((self.currentPanZoomValueX, self.currentPanZoomValueY),
+                                     (self.initPanZoomValueX, self.initPanZoomValueY), (getX, getY), self.panZoomZoom, area)
+        self.scheduler.schedule(self.cameraHandles.horizontalPan, valueX)
+        self.scheduler.schedule(self.cameraHandles.verticalPan, valueY)
 
     def rollTool(self, value):
         # cmds.roll(self.currentCameraShape, abs=0, rel=1, d=value)
-        cmds.setAttr(str(self.UI.listCam.currentText()) + '.rotateAxisZ', value)
+        self.scheduler.schedule(self.cameraHandles.rotateAxisZ, value)
+        self.valueChanged()
 
     def tumbleTool(self, state):
         if state:
@@ -271,7 +484,13 @@ class MainWindow(MayaQWidgetBaseMixin, QtWidgets.QMainWindow):
         values = None
         if cmds.colorEditor(query=True, result=True):
             values = cmds.colorEditor(query=True, rgb=True, mini=1, rgbValue=True, alpha=False)
-            cmds.setAttr(str(self.imagePlaneShape) + '.colorGain', values[0], values[1], values[2], type="double3")
+            if self.layers:
+                self.editTopLayer(color=tuple(values))
+            else:
+                self.dropProxy()
+                self.imagePlaneHandles.colorGain.set(values)
+                self.applyProxy()
+            self.stateChanged()
             # TO DO, show linear values
             # color = QtGui.QColor(int(values[0] * 255), int(values[1] * 255), int(values[2] * 255))
             # gamma = QtGui.QColorSpace(color)
@@ -286,11 +505,14 @@ class MainWindow(MayaQWidgetBaseMixin, QtWidgets.QMainWindow):
         return str(values)
 
     def focalLengthGet(self):
-        getFocal = cmds.getAttr(self.UI.listCam.currentText() + '.focalLength')
-        self.UI.focalLength.setValue(getFocal)
-        self.UI.focalLengthValue.setText(str(int(getFocal)))
+        getFocal = self.cameraHandles.focalLength.get()
+        self.showFocalLength(getFocal)
         return getFocal
 
+    def showFocalLength(self, value):
+        self.UI.focalLength.setValue(value)
+        self.UI.focalLengthValue.setText(str(int(value)))
+
     def focalLengthSet(self):
         if self.UI.focalLengthValue.text():
             Value = self.UI.focalLengthValue.text()
@@ -300,25 +522,60 @@ class MainWindow(MayaQWidgetBaseMixin, QtWidgets.QMainWindow):
         self.UI.focalLength.setValue(float(Value))
 
     def focalLength(self, Value):
-        cmds.setAttr(self.UI.listCam.currentText() + '.focalLength', Value)
-        camera = self.UI.listCam.currentText()
+        self.scheduler.schedule(self.cameraHandles.focalLength, Value)
         self.UI.focalLengthValue.setText(str(Value))
 
         if self.UI.dollyZoomCheckBox.isChecked():
-            distance = (self.initCameraCenterOfInterest * Value) / self.Focal
-            cmds.dolly(camera, abs=1, d=distance)
+            distance = dollyZoomDistance(self.initCameraCenterOfInterest, self.Focal, Value)
+            self.scheduler.scheduleCall('dolly', cmds.dolly, self.cameraHandles.camera, abs=1, d=distance)
         else:
             self.UI.focalLengthValue.setText(str(Value))
 
     def initFocusDistance(self):
-        self.initCameraCenterOfInterest = cmds.getAttr(self.UI.listCam.currentText() + '.centerOfInterest')
+        self.initCameraCenterOfInterest = self.cameraHandles.centerOfInterest.get()
         self.Focal = self.UI.focalLength.value()
 
     def focalPreset(self):
         value = self.sender()
         self.UI.focalLength.setValue(float(value.text()))
         self.UI.focalLengthValue.setText(str(value.text()))
-        cmds.setAttr(self.UI.listCam.currentText() + '.focalLength', float(value.text()))
+        self.cameraHandles.focalLength.set(float(value.text()))
+
+    # animated dolly zoom over the playback range, from the current to the given focal
+    def bakeDollyZoom(self):
+        if not self.cameraHandles:
+            return
+        endFocal, ok = QtWidgets.QInputDialog.getDouble(self, 'Bake Dolly Zoom', 'End focal length (mm):',
+                                                        self.cameraHandles.focalLength.get(), 2.5, 3500, 1)
+        if not ok:
+            return
+        import dollyZoom
+        report = dollyZoom.bake(self.cameraHandles.camera, self.cameraHandles.node, endFocal, easing='smooth')
+        print('Dolly zoom baked on {} frames (solve {:.2f} ms, keys {:.2f} ms)'.format(
+            report['frames'], report['solveSeconds'] * 1000.0, report['writeSeconds'] * 1000.0))
+
+    # pan / zoom / roll (or focal) keyed so the selected transforms sit on the guide points
+    def autoFrame(self):
+        if not self.cameraHandles:
+            return
+        targets = [s for s in cmds.ls(sl=True, type='transform') or [] if not sceneCache.cameraOf(s)]
+        if not targets:
+            print("Please select the targets to frame (locators, joints, ...).")
+            return
+        modes = ['Pan / Zoom / Roll', 'Pan / Focal Length / Roll', 'Pan / Zoom']
+        mode, ok = QtWidgets.QInputDialog.getItem(self, 'Auto Frame', 'Solve:', modes, 0, False)
+        if not ok:
+            return
+        import autoFraming
+        guide = 'thirds'
+        if self.UI.imagePlane.text() and self.imagePlaneHandles:
+            guide = overlayLibrary.guide(self.overlayIdOnPlane(self.imagePlaneShape)) or guide
+        self.scheduler.flush()
+        report = autoFraming.autoFrame(self.cameraHandles.camera, targets, guide, roll=mode != modes[2],
+                                       focal=mode == modes[1])
+        autoFraming.printReport(report)
+        self.UI.panZoom.setChecked(True)
+        self.UI.panZoomArea.setEnabled(1)
 
     def dollyZoomCheck(self, status):
         if status:
@@ -341,7 +598,7 @@ class MainWindow(MayaQWidgetBaseMixin, QtWidgets.QMainWindow):
             mel.eval('MoveTool')
 
     def showFrustum(self, state):
-        cmds.setAttr(self.UI.listCam.currentText() + '.displayCameraFrustum', state)
+        self.cameraHandles.displayCameraFrustum.set(state)
 
     def disableCreateButton(self):
         self.activateOptions(0)
@@ -357,10 +614,10 @@ class MainWindow(MayaQWidgetBaseMixin, QtWidgets.QMainWindow):
         else:
             testCam = self.cameraToUse
 
+        listOfCam = getListCamera()
         self.UI.listCam.clear()
-        self.UI.listCam.addItems(getListCamera())
+        self.UI.listCam.addItems(listOfCam)
         self.activateOptions(1)
-        listOfCam = getListCamera()
         if testCam in listOfCam:
             idx = listOfCam.index(testCam)
 
@@ -375,18 +632,29 @@ class MainWindow(MayaQWidgetBaseMixin, QtWidgets.QMainWindow):
 
     # What to do when user change the Camera
     def changeCamera(self, Index):
+        # write what's left for the previous camera
+        self.scheduler.flush()
+        previousCamera = self.cameraHandles.camera if self.cameraHandles else None
         # get current camera
         self.UI.imagePlane.setText('')
         self.UI.listCam.setCurrentIndex(Index)
 
         if self.UI.listCam.currentText():
             # Setting Global Variable of the current camera from UI
-            self.currentCameraShape = cmds.listRelatives(self.UI.listCam.currentText())
+            self.currentCameraShape = sceneCache.shapes(self.UI.listCam.currentText())
+            # resolved handles for the slider hot paths, bound once per camera
+            self.cameraHandles = CameraHandles(self.UI.listCam.currentText(), self.currentCameraShape[0])
+            # everything the tool set on this camera, in one read (None the first time)
+            state = framingState.read(self.currentCameraShape[0])
             getImagePlane = updateImagePlaneList(self.currentCameraShape)
+            if state:
+                planeShape = cmds.listRelatives(getImagePlane[0], s=1)[0] if getImagePlane else None
+                state = framingState.liveValues(state, self.cameraHandles.camera, self.currentCameraShape[0],
+                                                planeShape)
 
             if getImagePlane != '':
-                self.UI.imagePlane.setText(str(updateImagePlaneList(self.currentCameraShape)[0]))
-                self.updateImagePreview()
+                self.UI.imagePlane.setText(str(getImagePlane[0]))
+                self.updateImagePreview(state)
                 self.UI.imagePlaneFrame.setEnabled(1)
                 self.UI.pb_create.setText('Delete')
             else:
@@ -397,37 +665,63 @@ class MainWindow(MayaQWidgetBaseMixin, QtWidgets.QMainWindow):
 
             self.focalLengthGet()
             self.focalLengthSet()
-            getOverScan = cmds.getAttr(self.UI.listCam.currentText() + '.overscan')
-            self.UI.overScan.setValue((getOverScan - 1) * 100)
+            if state:
+                self.showState(state)
+            else:
+                getOverScan = self.cameraHandles.overscan.get()
+                self.UI.overScan.setValue(sliderFromOverscan(getOverScan))
+            self.watchAttributes()
+            self.updateMasks()
+            if self.browserDock is not None and self.browserDock.isVisible():
+                # the camera left (its framing may have changed) and the new one, not the whole scene
+                self.browserDock.widget().refresh([c for c in (previousCamera, self.cameraHandles.camera) if c])
+            if self.compareDock is not None and self.cameraHandles.camera in self.compareDock.widget().cameras():
+                self.compareDock.widget().setLeader(self.cameraHandles.camera)
 
         if Index != -1:
-            cmds.lookThru(self.viewerToUse, self.UI.listCam.currentText())
-
-    def updateImagePreview(self):
-        self.imagePlaneShape = str(cmds.listRelatives(self.UI.imagePlane.text(), ad=0, s=1)[0])
+            # the viewport the user last focused, not the one found at launch
+            self.viewerToUse = panelTracker.targetPanel()
+            panelTracker.lookThrough(self.viewerToUse, self.UI.listCam.currentText())
+
+    # keep the image plane handles in sync with self.imagePlaneShape
+    def bindImagePlane(self, imagePlaneShape):
+        if self.imagePlaneHandles is None or self.imagePlaneHandles.node != imagePlaneShape:
+            self.imagePlaneHandles = ImagePlaneHandles(imagePlaneShape)
+            self.watchAttributes()
+        self.imagePlaneShape = imagePlaneShape
+
+    def updateImagePreview(self, state=None):
+        self.ensureOverlayTab()
         imagePlaneShape = str(cmds.listRelatives(self.UI.imagePlane.text(), ad=0, s=1)[0])
-        getImageName = os.path.splitext(os.path.basename(cmds.getAttr(imagePlaneShape + ".imageName")))[0]
-
-        if getImageName in getListPic():
-            getActualIP = int(cmds.getAttr(imagePlaneShape + ".imagePlaneName"))
-            self.UI.listPic.setCurrentRow(getActualIP)
-            selectedPic = str(self.UI.listPic.currentItem().text())
-            self.UI.preview.setPixmap(self.pathImage + '//' + selectedPic + '.png')
-            self.updateImagePlaneColor()
+        self.bindImagePlane(imagePlaneShape)
+        if state and overlayLibrary.get(state['overlay']):
+            overlayId = state['overlay']
+        else:
+            overlayId = self.overlayIdOnPlane(imagePlaneShape)
+
+        self.layers = self.layersOnPlane(imagePlaneShape)
+        self.restoreTexture(overlayId)
+        if overlayId:
+            self.UI.listPic.setCurrentRow(overlayLibrary.row(overlayId))
+            self.setPreview(overlayLibrary.path(overlayId))
+            if state is None:
+                # not framed with the tool yet, the widgets are read from the image plane
+                self.updateImagePlaneColor()
         else:
             pass
 
     def imagePlaneChange(self):
-        self.imagePlaneShape = str(cmds.listRelatives(self.UI.imagePlane.text(), ad=0, s=1)[0])
+        self.bindImagePlane(str(cmds.listRelatives(self.UI.imagePlane.text(), ad=0, s=1)[0]))
         self.selectedPic = str(self.UI.listPic.currentItem().text())
         if self.UI.imagePlane.text() and self.UI.listPic.currentItem():
-            imagePlaneShape = str(cmds.listRelatives(self.UI.imagePlane.text(), ad=0, s=1)[0])
-            getActualIP = int(cmds.getAttr(imagePlaneShape + ".imagePlaneName"))
-            self.UI.listPic.setCurrentRow(getActualIP)
-            self.UI.preview.setPixmap(self.pathImage + '//' + self.selectedPic + '.png')
+            overlayId = self.overlayIdOnPlane(self.imagePlaneShape) or overlayLibrary.idFromName(self.selectedPic)
+            self.UI.listPic.setCurrentRow(overlayLibrary.row(overlayId))
+            self.setPreview(overlayLibrary.path(overlayId))
             self.activateOptions(1)
 
-            if self.selectedPic == 'Golden_Ratio' or self.selectedPic == 'Golden_Ratio_Mirror':
+            # pictures with their own ratio (Golden_Ratio, ...) are flagged 'keep' in the manifest,
+            # unless they are rendered for the gate
+            if overlayLibrary.fit(overlayId) == 'keep' and not overlayLibrary.guide(overlayId):
                 self.UI.aspectRatio.setEnabled(0)
                 self.UI.aspectRatio.setChecked(0)
                 self.aspectRatio(0)
@@ -436,56 +730,92 @@ class MainWindow(MayaQWidgetBaseMixin, QtWidgets.QMainWindow):
                 self.UI.aspectRatio.setChecked(1)
                 self.aspectRatio(1)
 
+    # overlay id of an image plane, from its framingGuideId or its imageName
+    def overlayIdOnPlane(self, imagePlaneShape):
+        if cmds.attributeQuery('framingGuideId', node=imagePlaneShape, exists=True):
+            overlayId = cmds.getAttr(imagePlaneShape + '.framingGuideId')
+            if overlayLibrary.get(overlayId):
+                return overlayId
+        return overlayLibrary.idFromPath(cmds.getAttr(imagePlaneShape + '.imageName') or '')
+
+    def tagImagePlane(self, imagePlaneShape, overlayId):
+        if not cmds.attributeQuery('framingGuideId', node=imagePlaneShape, exists=True):
+            cmds.addAttr(imagePlaneShape, ln='framingGuideId', dt='string')
+        cmds.setAttr(imagePlaneShape + '.framingGuideId', overlayId, type='string')
+
+    # picture of the overlay, or its guide rendered at the render resolution
+    def overlayImage(self, overlayId):
+        renderFormat = self.engine.renderFormat()
+        return overlayPath(overlayId, renderFormat.width, renderFormat.height)
+
+    # procedural guides follow the render resolution
+    def retargetGuide(self):
+        if not self.UI.imagePlane.text() or not self.imagePlaneHandles:
+            return
+        if self.layers:
+            self.applyLayers()
+            return
+        overlayId = self.overlayIdOnPlane(self.imagePlaneShape)
+        if overlayLibrary.guide(overlayId):
+            self.imagePlaneHandles.imageName.set(self.overlayImage(overlayId))
+        self.applyProxy()
+
+    # generated textures may be missing here (scene from another machine, cleaned cache)
+    def restoreTexture(self, overlayId):
+        imageName = self.imagePlaneHandles.imageName.get()
+        if not imageName or os.path.isfile(imageName):
+            return
+        if self.layers:
+            self.applyLayers()
+        elif overlayId:
+            self.imagePlaneHandles.imageName.set(self.overlayImage(overlayId))
+            self.applyProxy()
+
     def getImagePlane(self, camName):
-        if cmds.listRelatives(camName, type='imagePlane', ad=True, c=True):
-            getImagePlane = [c for c in cmds.listRelatives(camName, type='imagePlane', ad=True, c=True)]
-            getImagePlane = [c for c in cmds.listRelatives(getImagePlane, parent=True)]
+        getImagePlane = sceneCache.imagePlanes(camName)
+        if getImagePlane:
             self.UI.imagePlane.addItems(getImagePlane)
-            self.imagePlaneShape = str(cmds.listRelatives(self.UI.imagePlane.text(), ad=0, s=1)[0])
+            self.bindImagePlane(str(cmds.listRelatives(self.UI.imagePlane.text(), ad=0, s=1)[0]))
             self.activateOptions(1)
         else:
             self.activateOptions(0)
 
     def userChangePic(self):
-        selectedItem = abs(self.UI.listPic.currentRow())
         self.selectedPic = str(self.UI.listPic.currentItem().text())
-        self.UI.preview.setPixmap(self.pathImage + '//' + self.selectedPic + '.png')
-        if self.UI.imagePlane.text():
+        overlayId = overlayLibrary.idFromName(self.selectedPic)
+        self.setPreview(overlayLibrary.path(overlayId))
+        if self.UI.imagePlane.text() and self.layers:
+            # the picked guide replaces the top layer
+            self.editTopLayer(overlay=overlayId)
+        elif self.UI.imagePlane.text():
             imagePlaneShape = str(cmds.listRelatives(self.UI.imagePlane.text(), ad=0, s=1)[0])
-            try:
-                cmds.getAttr(str(imagePlaneShape) + '.imagePlaneName')
-            except ValueError:
-                cmds.select(self.imagePlaneShape)
-                cmds.addAttr(ln="imagePlaneName", dv=0)
-
-            cmds.setAttr(str(imagePlaneShape + '.imageName'), str(self.pathImage + '//' + self.selectedPic + '.png'),
-                         type="string")
-            cmds.setAttr(str(imagePlaneShape) + '.imagePlaneName', selectedItem)
+            cmds.setAttr(str(imagePlaneShape + '.imageName'), self.overlayImage(overlayId), type="string")
+            self.tagImagePlane(imagePlaneShape, overlayId)
             self.updateImagePreview()
             self.imagePlaneChange()
+            self.applyProxy()
+            self.stateChanged()
+            self.compareGuide()
 
     def createPushButton(self):
         if self.UI.pb_create.text() == 'Delete':
             self.deleteCurrent()
             self.UI.pb_create.setText('Create Image Plane')
         else:
-            cmds.imagePlane(camera=self.UI.listCam.currentText(), showInAllViews=False,
-                            fileName=str(self.pathImage) + '//' + self.UI.listPic.currentItem().text() + '.png')
-            self.imagePlaneShape = cmds.listRelatives(ad=0, s=1)[0]
-            selectedItem = self.UI.listPic.currentRow()
-            cmds.select(self.imagePlaneShape)
-            cmds.addAttr(ln="imagePlaneName", dv=0)
-            cmds.setAttr(str(self.imagePlaneShape) + '.imagePlaneName', selectedItem)
-            self.imagePlaneSettings()
-            self.cameraSettings()
+            # same path as the batch mode, for a single camera
+            report = applyPreset([self.UI.listCam.currentText()], self.currentPreset())
+            self.bindImagePlane(report['imagePlanes'][0])
+            self.updateImagePlaneColor()
             self.camAppertureY = cmds.getAttr(self.UI.listCam.currentText() + '.verticalFilmAperture')
-            self.resolutionGate(True)
+            self.UI.gate.setText('Resolution')
             cmds.select(clear=True)
             self.UI.imagePlane.setText(str(updateImagePlaneList(self.currentCameraShape)[0]))
             self.activateOptions(1)
             self.UI.imagePlaneFrame.setEnabled(1)
             self.UI.pb_create.setText('Delete')
             self.imagePlaneChange()
+            self.applyProxy()
+            self.stateChanged()
 
     def activateOptions(self, value):
         if value:
@@ -503,97 +833,458 @@ class MainWindow(MayaQWidgetBaseMixin, QtWidgets.QMainWindow):
             self.UI.preview.setEnabled(value)
 
     def deleteCurrent(self):
-        cmds.select(self.UI.listCam.currentText(), r=1)
-        shapes = cmds.listRelatives(ad=0, s=1)
-        self.imagePlaneShape = cmds.listRelatives(shapes, ad=True, pa=True)
+        # the guide planes only, the safe area / letterbox planes (maskLayers.py) stay
+        imagePlanes = sceneCache.imagePlanes(self.UI.listCam.currentText())
 
         # If there's already an image plane on the camera selected on the drop down menu
-        if self.imagePlaneShape:
-            cmds.delete(self.imagePlaneShape)
-            cmds.select(clear=True)
+        if imagePlanes:
+            cmds.delete(imagePlanes)
+        self.imagePlaneShape = ''
+        self.imagePlaneHandles = None
+        self.layers = []
+        self.watchAttributes()
         cmds.select(clear=True)
         self.UI.imagePlane.setText('')
         self.activateOptions(0)
         self.UI.imagePlaneFrame.setEnabled(0)
         self.UI.listPic.setCurrentRow(0)
         # self.selectedPic = str(self.UI.listPic.currentItem().text())
-        self.UI.preview.setPixmap(self.pathImage + '//' + str(self.UI.listPic.currentItem().text()) + '.png')
-
-    def imagePlaneSettings(self):
-
-        # get camera near clip to avoid image plane is before
-        camName = cmds.listRelatives(self.UI.listCam.currentText())[0]
-        camNearClip = cmds.getAttr(camName + '.nearClipPlane')
-
-        # set settings
-        depthValue = abs(camNearClip * 1.1)
-        cmds.setAttr(str(self.imagePlaneShape) + ".colorGain", 0, 0, 0, type="double3")
-        cmds.setAttr(str(self.imagePlaneShape) + '.depth', depthValue)
-        cmds.setAttr(str(self.imagePlaneShape) + '.textureFilter', 1)
-        cmds.setAttr(str(self.imagePlaneShape) + '.fit', 3)
+        self.setPreview(picturePath(str(self.UI.listPic.currentItem().text())))
 
+    # the image plane settings of the panel, as a batchFraming preset
+    def currentPreset(self):
         getColor = self.UI.pushColor.palette().button().color().getRgb()
-        cmds.setAttr(str(self.imagePlaneShape) + '.colorGain', float(getColor[0]) / 255, float(getColor[1]) / 255, float(getColor[2]) / 255,
-                     type="double3")
+        return {
+            'overlay': overlayLibrary.idFromName(self.UI.listPic.currentItem().text()),
+            'colorGain': (float(getColor[0]) / 255, float(getColor[1]) / 255, float(getColor[2]) / 255),
+            'alphaGain': float(self.UI.alphaGain.value()) / 100,
+            'fit': self.UI.fit.text().lower(),
+            'gate': 'resolution',
+        }
+
+    # the framing of the current camera as a framingState record, from the widgets
+    def currentState(self):
+        preset = self.currentPreset() if self.UI.imagePlane.text() else {'overlay': ''}
+        return dict(preset, gate='resolution' if self.UI.gate.text() == 'Resolution' else 'film',
+                    rotate=180.0 if self.UI.rotateButton.isChecked() else 0.0,
+                    overscan=overscanFromSlider(self.UI.overScan.value()), roll=float(self.UI.rollSlider.value()))
+
+    # the record follows the tool's own writes, coalesced with them
+    def stateChanged(self):
+        if self.cameraHandles and self.currentCameraShape:
+            self.ensureOverlayTab()
+            self.scheduler.scheduleCall('framingState', framingState.write, self.currentCameraShape[0],
+                                        self.currentState())
+
+    # keys, wheel and track clicks: no gesture around them, the record is written with the value
+    def valueChanged(self):
+        if not self.scheduler.gesture:
+            self.stateChanged()
+
+    # widgets from a framingState record, without writing anything back
+    def showState(self, state):
+        widgets = (self.UI.alphaGain, self.UI.colorOffset, self.UI.fit, self.UI.gate, self.UI.rotateButton,
+                   self.UI.overScan, self.UI.rollSlider)
+        blocked = [widget.blockSignals(True) for widget in widgets]
+        try:
+            self.UI.alphaGain.setValue(state['alphaGain'] * 100)
+            self.showColorGain(state['colorGain'])
+            self.UI.fit.setChecked(state['fit'] == 'horizontal')
+            self.UI.fit.setText('Horizontal' if state['fit'] == 'horizontal' else 'Vertical')
+            self.UI.gate.setChecked(state['gate'] == 'resolution')
+            self.UI.gate.setText('Resolution' if state['gate'] == 'resolution' else 'Film Gate')
+            self.UI.rotateButton.setChecked(state['rotate'] == 180.0)
+            self.UI.overScan.setValue(sliderFromOverscan(state['overscan']))
+            self.UI.rollSlider.setValue(int(round(state['roll'])))
+        finally:
+            for widget, wasBlocked in zip(widgets, blocked):
+                widget.blockSignals(wasBlocked)
+
+    # the whole framing of the current camera on the selected ones, in one pass
+    def copyFraming(self):
+        if not self.cameraHandles:
+            return
+        targets = [sceneCache.cameraOf(c) for c in cmds.ls(sl=True) or [] if sceneCache.cameraOf(c)]
+        if not targets:
+            print("Please select one or more cameras.")
+            return
+        self.stateChanged()
+        self.scheduler.flush()
+        report = framingState.copy(self.cameraHandles.camera, targets)
+        print('Framing of {} copied to {} camera(s) in {:.3f} s'.format(
+            self.cameraHandles.camera, report['cameras'], report['seconds']))
+
+    # thumbnails of every camera with its guide, double click to switch (cameraBrowser.py)
+    def showCameraBrowser(self):
+        if self.browserDock is None:
+            from cameraBrowser import CameraBrowser
+            browser = CameraBrowser(sceneCache, self.overlayForCamera)
+            browser.cameraPicked.connect(self.pickCamera)
+            self.browserDock = QtWidgets.QDockWidget('Cameras', self)
+            self.browserDock.setWidget(browser)
+            self.addDockWidget(QtCore.Qt.RightDockWidgetArea, self.browserDock)
+        self.browserDock.show()
+        self.browserDock.widget().refresh()
+
+    # guide of a camera from its framing record, else from its image plane
+    def overlayForCamera(self, camera):
+        state = framingState.read(sceneCache.shapes(camera)[0])
+        if state:
+            return state['overlay']
+        planes = sceneCache.imagePlanes(camera)
+        if not planes:
+            return ''
+        return self.overlayIdOnPlane(cmds.listRelatives(planes[0], s=1)[0]) or ''
+
+    # the selected cameras next to the current one, all following its framing (compareGrid.py)
+    def showCompareGrid(self):
+        if not self.cameraHandles:
+            return
+        cameras = [c for c in (sceneCache.cameraOf(n) for n in cmds.ls(selection=True) or []) if c]
+        if self.compareDock is None:
+            from compareGrid import CompareGrid
+            grid = CompareGrid(sceneCache, self.scheduler)
+            grid.cameraPicked.connect(self.pickCamera)
+            self.compareDock = QtWidgets.QDockWidget('Compare', self)
+            self.compareDock.setWidget(grid)
+            self.addDockWidget(QtCore.Qt.BottomDockWidgetArea, self.compareDock)
+        self.compareDock.widget().setCameras(cameras, self.cameraHandles.camera)
+        self.compareDock.show()
+        # closed with the main window, shown again here (the relay follows show / hide)
+        self.compareDock.widget().show()
+        self.compareGuide()
+
+    # the guide of the current camera on the compared ones, coalesced with the other writes
+    def compareGuide(self):
+        if self.compareDock is None or not self.UI.imagePlane.text():
+            return
+        others = self.compareDock.widget().cameras()[1:]
+        if others:
+            self.scheduler.scheduleCall('compareGuide', applyPreset, others, self.currentPreset())
+
+    def pickCamera(self, camera):
+        index = self.UI.listCam.findText(camera)
+        if index != -1:
+            self.UI.listCam.setCurrentIndex(index)
+
+    # apply the current guide to the selected cameras, or to every user camera
+    def batchApply(self, selectedOnly):
+        self.ensureOverlayTab()
+        cameras = None
+        if selectedOnly:
+            cameras = [sceneCache.cameraOf(c) for c in cmds.ls(sl=True) or [] if sceneCache.cameraOf(c)]
+            if not cameras:
+                print("Please select one or more cameras.")
+                return
+        printReport(applyPreset(cameras, self.currentPreset()))
+        if self.UI.listCam.currentText():
+            self.changeCamera(self.UI.listCam.currentIndex())
 
-        alphaGain = float(self.UI.alphaGain.value())
-        cmds.setAttr(str(self.imagePlaneShape) + '.alphaGain', alphaGain / 100)
-        cmds.setAttr(str(self.imagePlaneShape) + '.overrideEnabled', 1)
-        cmds.setAttr(str(self.imagePlaneShape) + '.overrideDisplayType', 2)
-        self.updateImagePlaneColor()
+    def proxyTextures(self, state):
+        if state:
+            self.applyProxy()
+        else:
+            self.dropProxy()
+
+    # tint baked in the proxy, None when the image plane shows its overlay as is
+    def proxyColor(self, imagePlaneShape):
+        if not cmds.attributeQuery('framingProxyColor', node=imagePlaneShape, exists=True):
+            return None
+        value = cmds.getAttr(imagePlaneShape + '.framingProxyColor')
+        return tuple(float(v) for v in value.split()) if value else None
+
+    def setProxyColor(self, imagePlaneShape, color):
+        if color is None and not cmds.attributeQuery('framingProxyColor', node=imagePlaneShape, exists=True):
+            return
+        if not cmds.attributeQuery('framingProxyColor', node=imagePlaneShape, exists=True):
+            cmds.addAttr(imagePlaneShape, ln='framingProxyColor', dt='string')
+        value = ' '.join('{:.4f}'.format(v) for v in color) if color else ''
+        cmds.setAttr(imagePlaneShape + '.framingProxyColor', value, type='string')
+
+    # power of two, tinted texture for the overlay at the render resolution (proxyTextures.py);
+    # stacked layers and pictures keeping their own ratio are left as they are
+    def applyProxy(self):
+        if not self.proxyAction.isChecked() or not self.UI.imagePlane.text() or not self.imagePlaneHandles:
+            return
+        overlayId = self.overlayIdOnPlane(self.imagePlaneShape)
+        if self.layers or not overlayId or self.imagePlaneHandles.fit.get() != 4:
+            self.dropProxy()
+            return
+        import proxyTextures
+        color = self.proxyColor(self.imagePlaneShape) or self.imagePlaneHandles.colorGain.get()
+        renderFormat = self.engine.renderFormat()
+        try:
+            path = proxyTextures.proxy(self.overlayImage(overlayId), renderFormat.width, renderFormat.height, color)
+        except (IOError, OSError):
+            self.dropProxy()
+            return
+        self.setProxyColor(self.imagePlaneShape, color)
+        self.imagePlaneHandles.setMany(imageName=path, colorGain=(1.0, 1.0, 1.0))
+
+    # back to the overlay itself, the tint goes back to colorGain
+    def dropProxy(self):
+        if not self.UI.imagePlane.text() or not self.imagePlaneHandles:
+            return
+        color = self.proxyColor(self.imagePlaneShape)
+        if color is None:
+            return
+        self.setProxyColor(self.imagePlaneShape, None)
+        if self.layers:
+            self.imagePlaneHandles.colorGain.set(color)
+        else:
+            self.imagePlaneHandles.setMany(imageName=self.overlayImage(self.overlayIdOnPlane(self.imagePlaneShape)),
+                                           colorGain=color)
+
+    # stack the selected guide over what the image plane shows, with the current color / opacity / rotation
+    def addGuideLayer(self):
+        if not self.UI.imagePlane.text() or not self.imagePlaneHandles:
+            print("Please create an image plane first.")
+            return
+        self.ensureOverlayTab()
+        import overlayStack
+        getColor = self.UI.pushColor.palette().button().color().getRgb()
+        newLayer = overlayStack.layer(overlayLibrary.idFromName(self.UI.listPic.currentItem().text()),
+                                      (float(getColor[0]) / 255, float(getColor[1]) / 255, float(getColor[2]) / 255),
+                                      float(self.UI.alphaGain.value()) / 100,
+                                      180.0 if self.UI.rotateButton.isChecked() else 0.0)
+        if not self.layers:
+            # the guide already on the plane becomes the bottom layer, its settings move into the texture
+            color = self.proxyColor(self.imagePlaneShape) or self.imagePlaneHandles.colorGain.get()
+            self.setProxyColor(self.imagePlaneShape, None)
+            self.layers = [overlayStack.layer(self.overlayIdOnPlane(self.imagePlaneShape), color,
+                                              self.imagePlaneHandles.alphaGain.get(),
+                                              self.imagePlaneHandles.rotate.get())]
+            self.imagePlaneHandles.setMany(colorGain=(1.0, 1.0, 1.0), alphaGain=1.0, rotate=0.0)
+        self.layers.append(newLayer)
+        self.applyLayers()
+
+    # back to a single guide: the top layer, with its settings on the image plane again
+    def clearGuideLayers(self):
+        if not self.layers or not self.imagePlaneHandles:
+            return
+        top = self.layers[-1]
+        self.layers = []
+        self.layersDirty = False
+        cmds.setAttr(self.imagePlaneShape + '.framingStack', '', type='string')
+        self.tagImagePlane(self.imagePlaneShape, top['overlay'])
+        self.imagePlaneHandles.setMany(imageName=self.overlayImage(top['overlay']), colorGain=top['color'],
+                                       alphaGain=top['alpha'], rotate=top['rotate'])
+        self.applyProxy()
+
+    def layersOnPlane(self, imagePlaneShape):
+        if not cmds.attributeQuery('framingStack', node=imagePlaneShape, exists=True):
+            return []
+        import overlayStack
+        return overlayStack.loads(cmds.getAttr(imagePlaneShape + '.framingStack'))
+
+    def editTopLayer(self, **values):
+        self.layers[-1].update(values)
+        self.layersDirty = True
+        if not self.scheduler.gesture:
+            self.applyLayers()
+
+    # stack saved on the plane, texture composited off the GUI thread then swapped in
+    def applyLayers(self):
+        self.layersDirty = False
+        if not self.layers or not self.imagePlaneHandles:
+            return
+        import overlayStack
+        if self.overlayStack is None:
+            self.overlayStack = overlayStack.OverlayStack(self)
+        imagePlaneShape = self.imagePlaneShape
+        if not cmds.attributeQuery('framingStack', node=imagePlaneShape, exists=True):
+            cmds.addAttr(imagePlaneShape, ln='framingStack', dt='string')
+        cmds.setAttr(imagePlaneShape + '.framingStack', overlayStack.dumps(self.layers), type='string')
+        renderFormat = self.engine.renderFormat()
+        self.overlayStack.request(self.layers, renderFormat.width, renderFormat.height,
+                                  lambda path: self.showLayers(imagePlaneShape, path))
+
+    def showLayers(self, imagePlaneShape, path):
+        # the user may have changed camera while the worker was running
+        if imagePlaneShape == self.imagePlaneShape and self.imagePlaneHandles:
+            self.imagePlaneHandles.imageName.set(path)
+
+    # how close the selected transforms stay to the guide, on every camera (framingReport.py)
+    def framingReport(self):
+        subjects = [s for s in cmds.ls(sl=True, type='transform') or [] if not sceneCache.cameraOf(s)]
+        if not subjects:
+            print("Please select the subjects to follow (locators, joints, ...).")
+            return
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(self, 'Save Framing Report', '', 'CSV (*.csv)')
+        if not path:
+            return
+        import framingReport
+        guide = 'thirds'
+        if self.UI.imagePlane.text() and self.imagePlaneHandles:
+            guide = overlayLibrary.guide(self.overlayIdOnPlane(self.imagePlaneShape)) or guide
+        self.scheduler.flush()
+        report = framingReport.analyze(subjects, guide)
+        framingReport.write(report, path)
+        framingReport.printReport(report)
+
+    # steps of the tool's own history, the widgets follow through attributeSync
+    def undoFraming(self):
+        self.endGesture()
+        label = self.history.undo()
+        if label:
+            print('Undo framing: {}'.format(label))
+
+    def redoFraming(self):
+        self.endGesture()
+        label = self.history.redo()
+        if label:
+            print('Redo framing: {}'.format(label))
+
+    # pan, zoom, overscan, focal length, roll and the guide color / opacity of the current camera
+    def framingHandles(self):
+        handles = []
+        if self.cameraHandles:
+            handles += [getattr(self.cameraHandles, name) for name in
+                        ('horizontalPan', 'verticalPan', 'zoom', 'overscan', 'focalLength', 'rotateAxisZ')]
+        if self.imagePlaneHandles:
+            handles += [self.imagePlaneHandles.alphaGain, self.imagePlaneHandles.colorGain]
+        return handles
+
+    def saveFraming(self, name):
+        if not self.cameraHandles:
+            return
+        self.history.save(name, self.framingHandles())
+        print('Framing {} saved for {}.'.format(name, self.cameraHandles.camera))
+
+    def toggleFraming(self):
+        self.endGesture()
+        name = self.history.toggle()
+        if name is None:
+            print('Save framings A and B first.')
+        else:
+            print('Framing {}'.format(name))
 
-    def cameraSettings(self):
-        cmds.setAttr(str(self.UI.listCam.currentText()) + '.displayResolution', 1)
-        cmds.setAttr(str(self.UI.listCam.currentText()) + '.displayGateMask', 1)
-        cmds.setAttr(str(self.UI.listCam.currentText()) + '.displayFilmGate', 1)
+    # pan / zoom / roll / overscan / opacity changes made while the scene plays become sparse keys
+    def recordFraming(self, state):
+        if state:
+            from framingRecorder import FramingRecorder
+            self.recorder = FramingRecorder(self.scheduler)
+            self.recorder.start(self.framingHandles())
+            print('Recording framing moves, play the scene and adjust the framing.')
+        elif self.recorder is not None:
+            from framingRecorder import printReport as printRecordReport
+            self.scheduler.flush()
+            printRecordReport(self.recorder.stop())
+            self.recorder = None
+
+    # safe areas, extraction frames and letterbox on their own plane, in front of the guide (maskLayers.py)
+    def showMasks(self, state):
+        if state:
+            from maskLayers import MaskLayers
+            self.maskLayers = MaskLayers()
+            self.updateMasks()
+        elif self.maskLayers is not None:
+            for camera in getListCamera():
+                self.maskLayers.remove(camera)
+            self.maskLayers = None
+
+    # written only when the format, aperture or overscan changed since the last time
+    def updateMasks(self):
+        if self.maskLayers is None or not self.cameraHandles:
+            return
+        self.scheduler.flush()
+        self.maskLayers.update(self.cameraHandles.camera)
+
+    # JSON report next to a Chrome trace (chrome://tracing) of the cmds / mel calls recorded so far
+    def saveProfile(self):
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(self, 'Save Command Profile', '', 'JSON (*.json)')
+        if not path:
+            return
+        import instrumentation
+        recorder = instrumentation.recorder
+        recorder.exportJson(path)
+        recorder.exportChromeTrace(os.path.splitext(path)[0] + '.trace.json')
+        recorder.printReport()
 
     def colorOffsetValue(self, value):
         getValue = float(value / 100)
-        cmds.setAttr(str(self.imagePlaneShape) + '.colorGain', getValue, getValue, getValue)
+        if self.layers:
+            self.editTopLayer(color=(getValue, getValue, getValue))
+        else:
+            self.dropProxy()
+            self.scheduler.schedule(self.imagePlaneHandles.colorGain, (getValue, getValue, getValue))
+            if self.proxyAction.isChecked() and not self.scheduler.gesture:
+                self.scheduler.scheduleCall('proxy', self.applyProxy)
         color = 'background-color:rgb({},{},{})'.format(int(getValue * 255), int(getValue * 255), int(getValue * 255))
         self.UI.pushColor.setStyleSheet(color)
+        self.valueChanged()
 
     def alphaGainValue(self, value):
         getValue = float(value)
-        cmds.setAttr(str(self.imagePlaneShape) + '.alphaGain', getValue / 100)
+        if self.layers:
+            self.editTopLayer(alpha=getValue / 100)
+        else:
+            self.scheduler.schedule(self.imagePlaneHandles.alphaGain, getValue / 100)
+        self.valueChanged()
 
+    # read only, the widgets clamp what they show
     def updateImagePlaneColor(self):
         colorOffsetR = clip(cmds.getAttr(self.imagePlaneShape + '.colorGainR'), 0, 1)
         colorOffsetG = clip(cmds.getAttr(self.imagePlaneShape + '.colorGainG'), 0, 1)
         colorOffsetB = clip(cmds.getAttr(self.imagePlaneShape + '.colorGainB'), 0, 1)
-
-        cmds.setAttr(str(self.imagePlaneShape) + '.colorGain', colorOffsetR, colorOffsetG, colorOffsetB)
+        proxyColor = self.proxyColor(self.imagePlaneShape)
+        if proxyColor:
+            # colorGain stays at 1 under a tinted proxy
+            colorOffsetR, colorOffsetG, colorOffsetB = [clip(v, 0, 1) for v in proxyColor]
 
         alphaGain = cmds.getAttr(str(self.imagePlaneShape) + '.alphaGain')
         self.UI.alphaGain.setValue(alphaGain * 100)
+        self.showColorGain((colorOffsetR, colorOffsetG, colorOffsetB))
 
+    def showColorGain(self, value):
+        colorOffsetR, colorOffsetG, colorOffsetB = [clip(v, 0, 1) for v in value]
         color = 'background-color:rgb({},{},{})'.format(colorOffsetR * 255, colorOffsetG * 255, colorOffsetB * 255)
         self.UI.pushColor.setStyleSheet(color)
         if colorOffsetR == colorOffsetG and colorOffsetG == colorOffsetB:
             self.UI.colorOffset.setValue(colorOffsetR * 100)
 
+    # widgets follow the scene (Channel Box edits, undo, playback of animated plugs)
+    def watchAttributes(self):
+        self.attributeSync.clear()
+        if self.cameraHandles:
+            self.attributeSync.bind(self.cameraHandles.focalLength, self.showFocalLength, self.UI.focalLength)
+            self.attributeSync.bind(self.cameraHandles.overscan,
+                                    lambda value: self.UI.overScan.setValue(sliderFromOverscan(value)), self.UI.overScan)
+            self.attributeSync.bind(self.cameraHandles.rotateAxisZ,
+                                    lambda value: self.UI.rollSlider.setValue(int(round(value))), self.UI.rollSlider)
+        if self.imagePlaneHandles:
+            self.attributeSync.bind(self.imagePlaneHandles.alphaGain,
+                                    lambda value: self.UI.alphaGain.setValue(value * 100), self.UI.alphaGain)
+            self.attributeSync.bind(self.imagePlaneHandles.colorGain, self.showColorGain, self.UI.colorOffset)
+        self.attributeSync.install()
+
     def overScanValue(self, value):
-        cmds.setAttr(str(self.currentCameraShape[0]) + '.overscan', float('%.4f' % ((value * 0.01) + 1)))
+        self.scheduler.schedule(self.cameraHandles.overscan, overscanFromSlider(value))
+        self.valueChanged()
 
     def rotateImagePlane(self, state):
-        if state:
+        if self.layers:
+            self.editTopLayer(rotate=180.0 if state else 0.0)
+        elif state:
             cmds.setAttr(str(self.imagePlaneShape) + '.rotate', 180)
         else:
             cmds.setAttr(str(self.imagePlaneShape) + '.rotate', 0)
+        self.stateChanged()
 
     def resolutionGate(self, state):
 
         if state:
             self.UI.gate.setText('Resolution')
-            self.getWidth = cmds.getAttr("defaultResolution.width")
-            self.getHeight = cmds.getAttr("defaultResolution.height")
-            fitToResGate = (self.getHeight * (
-                cmds.getAttr(self.UI.listCam.currentText() + '.horizontalFilmAperture'))) / self.getWidth
-            cmds.setAttr(str(self.imagePlaneShape) + '.sizeY', fitToResGate)
+            renderFormat = self.engine.renderFormat()
+            self.getWidth = renderFormat.width
+            self.getHeight = renderFormat.height
+            fitToResGate = resolutionGateSizeY(renderFormat, self.cameraHandles.horizontalFilmAperture.get())
+            self.imagePlaneHandles.sizeY.set(fitToResGate)
 
         else:
             cmds.setAttr(str(self.imagePlaneShape) + '.sizeY', self.camAppertureY)
             self.UI.gate.setText('Film Gate')
+        self.stateChanged()
 
     def aspectRatio(self, state):
         if self.UI.fit.text() == 'Horizontal':
@@ -616,38 +1307,51 @@ class MainWindow(MayaQWidgetBaseMixin, QtWidgets.QMainWindow):
         else:
             cmds.setAttr(str(self.imagePlaneShape) + ".fit", 3)
             self.UI.fit.setText('Vertical')
-
-    def renderSettings(self, setFormat):
-
-        if setFormat and self.UI.hdFormat.isChecked():
-            cmds.setAttr("defaultResolution.height", 1080)
-            cmds.setAttr("defaultResolution.width", 1920)
-            cmds.setAttr("defaultResolution.deviceAspectRatio", 1.778)
-            self.UI.flatFormat.setChecked(False)
-            self.UI.scopeFormat.setChecked(False)
-
-        if setFormat and self.UI.flatFormat.isChecked():
-            cmds.setAttr("defaultResolution.height", 1080)
-            cmds.setAttr("defaultResolution.width", 1998)
-            cmds.setAttr("defaultResolution.deviceAspectRatio", 1.850)
-            self.UI.hdFormat.setChecked(False)
-            self.UI.scopeFormat.setChecked(False)
-
-        if setFormat and self.UI.scopeFormat.isChecked():
-            cmds.setAttr("defaultResolution.height", 858)
-            cmds.setAttr("defaultResolution.width", 2048)
-            cmds.setAttr("defaultResolution.deviceAspectRatio", 2.387)
-            self.UI.hdFormat.setChecked(False)
-            self.UI.flatFormat.setChecked(False)
-
-
-# Start the main window
+        self.stateChanged()
+
+    # render format and image plane size in one undo step
+    def renderSettings(self, formatKey):
+        renderFormat = formatRegistry.get(formatKey)
+        changes = formatChanges(renderFormat)
+        if self.UI.imagePlane.text() and self.imagePlaneHandles and self.UI.gate.text() == 'Resolution':
+            changes.set(self.imagePlaneHandles.sizeY.plug,
+                        resolutionGateSizeY(renderFormat, self.cameraHandles.horizontalFilmAperture.get()))
+        self.engine.apply(changes)
+        self.getWidth = renderFormat.width
+        self.getHeight = renderFormat.height
+        self.retargetGuide()
+        self.updateMasks()
+
+
+# Start the main window, or bring back the existing one
 def main():
+    global window
+    sceneCache.install()
+    panelTracker.install()
+    if os.environ.get('FRAMING_HELPER_PROFILE'):
+        # opt-in cmds / mel profiling, see instrumentation.py
+        import instrumentation
+        instrumentation.enable(reset=False)
+
+    if window is not None and isValid(window):
+        # module and form are already loaded
+        startupTimes.clear()
+        startupTimes['import'] = 0.0
+        start = time.time()
+        window.resync()
+        recordStartup('scene', start)
+        showWindow(window)
+        return window
+
+    start = time.time()
     window = MainWindow()
+    recordStartup('ui', start)
 
     # Verify if at least 1 user camera exists in the scene
+    start = time.time()
     if getListCamera():
         window.updateCameraList()
+        recordStartup('scene', start)
 
     # If not, a popup ask the user to create one
     else:
@@ -669,8 +1373,32 @@ def main():
         else:
             pass
 
-    window.show()
+    showWindow(window)
+    return window
+
+
+def isValid(widget):
+    from shiboken2 import isValid as shibokenIsValid
+    return shibokenIsValid(widget)
+
+
+def showWindow(widget):
+    start = time.time()
+    widget.show()
+    widget.raise_()
+    widget.activateWindow()
+    # runs once the event loop is back, after the first paint
+    QtCore.QTimer.singleShot(0, lambda: firstPaint(start))
+
+
+def firstPaint(start):
+    recordStartup('firstPaint', start)
+    if os.environ.get('FRAMING_HELPER_TIMING'):
+        startupReport()
+
 
+# only the first import of the module is timed, later main() calls reuse it
+recordStartup('import', importStart)
 
 if __name__ == '__main__':
     main()
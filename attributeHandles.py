@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+# attributeHandles.py
+# resolved attribute handles for the slider hot paths of MayaFramingAssistant
+# a handle builds its plug path once and keeps the resolved plug around,
+# so a slider tick is a single native call instead of a parsed command string
+
+import time
+
+try:
+    import maya.cmds as cmds
+    import maya.api.OpenMaya as om
+except ImportError:
+    # running outside of Maya, use CmdsBackend(fakeCmds.FakeCmds())
+    cmds = None
+    om = None
+
+
+# works with maya.cmds or any stand-in exposing the same commands (see fakeCmds.py)
+class CmdsBackend(object):
+    def __init__(self, cmdsModule):
+        self.cmds = cmdsModule
+
+    def resolve(self, plug):
+        return plug
+
+    def get(self, handle):
+        value = self.cmds.getAttr(handle.plug)
+        if handle.attrType == 'double3':
+            return tuple(value[0])
+        return value
+
+    def set(self, handle, value):
+        if handle.attrType == 'double3':
+            self.cmds.setAttr(handle.plug, value[0], value[1], value[2], type='double3')
+        elif handle.attrType == 'string':
+            self.cmds.setAttr(handle.plug, value, type='string')
+        else:
+            self.cmds.setAttr(handle.plug, value)
+
+    # write several plugs as one undo step
+    def setMany(self, items):
+        if len(items) == 1:
+            self.set(items[0][0], items[0][1])
+            return
+        self.cmds.undoInfo(openChunk=True, chunkName='framingAssistant')
+        try:
+            for handle, value in items:
+                self.set(handle, value)
+        finally:
+            self.cmds.undoInfo(closeChunk=True)
+
+    # keys on a plug, one setKeyframe per key (see MayaBackend for the bulk version)
+    def setKeys(self, plug, times, values, attrType='double'):
+        for frame, value in zip(times, values):
+            self.cmds.setKeyframe(plug, t=float(frame), v=float(value))
+
+    # a few keys over a range, through cmds so Ctrl+Z takes them back (the API writes of
+    # MayaBackend.setKeys are not undoable): keys inside the range are replaced, the others kept
+    def replaceKeys(self, plug, times, values):
+        if not len(times):
+            return
+        self.cmds.cutKey(plug, time=(float(times[0]), float(times[-1])), clear=True)
+        for frame, value in zip(times, values):
+            self.cmds.setKeyframe(plug, t=float(frame), v=float(value))
+
+
+# reads go through the cached MPlug, writes stay on cmds.setAttr to keep them undoable
+class MayaBackend(CmdsBackend):
+    def __init__(self):
+        super(MayaBackend, self).__init__(cmds)
+
+    def resolve(self, plug):
+        selection = om.MSelectionList()
+        selection.add(plug)
+        return selection.getPlug(0)
+
+    def get(self, handle):
+        plug = handle.native
+        if handle.attrType == 'double':
+            return plug.asDouble()
+        if handle.attrType == 'angle':
+            return plug.asMAngle().asDegrees()
+        if handle.attrType == 'distance':
+            return plug.asMDistance().asUnits(om.MDistance.uiUnit())
+        if handle.attrType == 'bool':
+            return plug.asBool()
+        if handle.attrType == 'int':
+            return plug.asInt()
+        if handle.attrType == 'string':
+            return plug.asString()
+        if handle.attrType == 'double3':
+            return tuple(plug.child(i).asDouble() for i in range(3))
+        return super(MayaBackend, self).get(handle)
+
+    # all keys of a curve in one MFnAnimCurve.addKeys call, existing keys are replaced
+    def setKeys(self, plug, times, values, attrType='double'):
+        import maya.api.OpenMayaAnim as oma
+
+        mplug = self.resolve(plug)
+        curve = oma.MFnAnimCurve()
+        sources = mplug.connectedTo(True, False)
+        if sources and sources[0].node().hasFn(om.MFn.kAnimCurve):
+            curve.setObject(sources[0].node())
+        else:
+            curve.create(mplug)
+
+        # anim curves store internal units
+        if attrType == 'distance':
+            unit = om.MDistance.uiUnit()
+            values = [om.MDistance(float(v), unit).asCentimeters() for v in values]
+        elif attrType == 'angle':
+            values = [om.MAngle(float(v), om.MAngle.kDegrees).asRadians() for v in values]
+        timeUnit = om.MTime.uiUnit()
+        timeArray = om.MTimeArray([om.MTime(float(t), timeUnit) for t in times])
+        curve.addKeys(timeArray, om.MDoubleArray([float(v) for v in values]),
+                      oma.MFnAnimCurve.kTangentAuto, oma.MFnAnimCurve.kTangentAuto, False)
+
+
+_defaultBackend = []
+
+
+def defaultBackend():
+    if not _defaultBackend:
+        _defaultBackend.append(MayaBackend())
+    return _defaultBackend[0]
+
+
+class AttributeHandle(object):
+    def __init__(self, node, attribute, attrType='double', backend=None):
+        self.node = node
+        self.attribute = attribute
+        self.attrType = attrType
+        self.plug = '{}.{}'.format(node, attribute)
+        self.backend = backend or defaultBackend()
+        self._native = None
+
+    # resolved on first use, some attributes (framingGuideId) may be added later
+    @property
+    def native(self):
+        if self._native is None:
+            self._native = self.backend.resolve(self.plug)
+        return self._native
+
+    def get(self):
+        return self.backend.get(self)
+
+    def set(self, value):
+        self.backend.set(self, value)
+
+    def __repr__(self):
+        return 'AttributeHandle({!r})'.format(self.plug)
+
+
+# named handles bound to one node, one attribute per entry of `attributes`
+class HandleSet(object):
+    attributes = ()
+
+    def __init__(self, node, backend=None):
+        self.node = node
+        self.backend = backend or defaultBackend()
+        for attribute, attrType in self.attributes:
+            setattr(self, attribute, AttributeHandle(node, attribute, attrType, self.backend))
+
+    # setMany(horizontalPan=0.1, verticalPan=0.2) -> one batched write
+    def setMany(self, **values):
+        self.backend.setMany([(getattr(self, name), value) for name, value in values.items()])
+
+
+class CameraHandles(HandleSet):
+    attributes = (
+        ('focalLength', 'double'),
+        ('overscan', 'double'),
+        ('centerOfInterest', 'distance'),
+        ('horizontalPan', 'double'),
+        ('verticalPan', 'double'),
+        ('zoom', 'double'),
+        ('panZoomEnabled', 'bool'),
+        ('horizontalFilmAperture', 'double'),
+        ('verticalFilmAperture', 'double'),
+        ('nearClipPlane', 'distance'),
+        ('displayCameraFrustum', 'bool'),
+    )
+
+    # roll lives on the transform, everything else on the shape
+    def __init__(self, camera, shape, backend=None):
+        super(CameraHandles, self).__init__(shape, backend)
+        self.camera = camera
+        self.rotateAxisZ = AttributeHandle(camera, 'rotateAxisZ', 'angle', self.backend)
+
+
+class ImagePlaneHandles(HandleSet):
+    attributes = (
+        ('colorGain', 'double3'),
+        ('alphaGain', 'double'),
+        ('sizeY', 'double'),
+        ('fit', 'int'),
+        ('rotate', 'double'),
+        ('depth', 'double'),
+        ('imageName', 'string'),
+        ('framingGuideId', 'string'),
+    )
+
+
+# compare string-built cmds calls with handles on a fake scene, per slider tick
+def measureDrag(ticks=1000, latency=0.0):
+    from fakeCmds import FakeCmds
+
+    fake = FakeCmds(latency=latency)
+    camera, shape = fake.camera()
+    results = {}
+
+    start = time.time()
+    for tick in range(ticks):
+        # what panZoomMove used to do
+        zoom = fake.getAttr(shape + '.zoom')
+        fake.getAttr(shape + '.zoom')
+        fake.setAttr(shape + '.horizontalPan', tick * 0.001 * zoom)
+        fake.setAttr(shape + '.verticalPan', tick * 0.001 * zoom)
+    results['strings'] = (time.time() - start, fake.callCount())
+
+    fake.calls.clear()
+    handles = CameraHandles(camera, shape, CmdsBackend(fake))
+    zoom = handles.zoom.get()
+    start = time.time()
+    for tick in range(ticks):
+        handles.horizontalPan.set(tick * 0.001 * zoom)
+        handles.verticalPan.set(tick * 0.001 * zoom)
+    results['handles'] = (time.time() - start, fake.callCount())
+
+    for name, (seconds, calls) in sorted(results.items()):
+        print('{:8} {:8.3f} ms/tick {:6.2f} calls/tick'.format(name, seconds * 1000.0 / ticks, float(calls) / ticks))
+    return results
+
+
+if __name__ == '__main__':
+    measureDrag()
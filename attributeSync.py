@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+# attributeSync.py
+# scene -> widgets half of the two-way sync: attribute changed callbacks on the
+# watched nodes, a time changed callback for the animated plugs only, and one
+# debounced push per display refresh with the widget signals blocked so the
+# valueChanged handlers don't write the value back
+
+import collections
+
+from updateScheduler import refreshInterval
+
+try:
+    import maya.api.OpenMaya as om
+except ImportError:
+    # running outside of Maya, changed() / timeChanged() have to be called by hand
+    om = None
+
+try:
+    from PySide2 import QtCore
+except ImportError:
+    # no Qt, flush() has to be called by hand
+    QtCore = None
+
+
+class AttributeSync(object):
+    def __init__(self, scheduler=None, interval=None):
+        # the tool's own writes (scheduler flushes, gestures) are not pushed back
+        self.scheduler = scheduler
+        # plug -> (handle, apply(value), widgets)
+        self.bindings = collections.OrderedDict()
+        self.dirty = collections.OrderedDict()
+        self.animated = set()
+        self.nodeCallbacks = {}
+        self.timeCallbackId = None
+        self.pushes = 0
+        self.timer = None
+        if QtCore is not None:
+            self.timer = QtCore.QTimer()
+            self.timer.setSingleShot(True)
+            self.timer.setInterval(interval if interval is not None else refreshInterval())
+            self.timer.timeout.connect(self.flush)
+
+    # apply(value) updates the widgets, their signals are blocked meanwhile
+    def bind(self, handle, apply, *widgets):
+        self.bindings[handle.plug] = (handle, apply, widgets)
+
+    def clear(self):
+        self.uninstall()
+        self.bindings.clear()
+        self.dirty.clear()
+        self.animated = set()
+
+    def _wake(self):
+        if self.timer is not None and not self.timer.isActive():
+            self.timer.start()
+
+    def _ownWrite(self, plug):
+        scheduler = self.scheduler
+        return scheduler is not None and (scheduler.flushing or scheduler.gesture or plug in scheduler.pending)
+
+    def changed(self, plug):
+        if plug in self.bindings and not self._ownWrite(plug):
+            self.dirty[plug] = True
+            self._wake()
+
+    # only the plugs driven by a curve (or anything else) can change with time
+    def timeChanged(self, *args):
+        if not self.animated:
+            return
+        for plug in self.animated:
+            self.dirty[plug] = True
+        self._wake()
+
+    def flush(self):
+        plugs = list(self.dirty)
+        self.dirty.clear()
+        for plug in plugs:
+            if plug not in self.bindings:
+                continue
+            handle, apply, widgets = self.bindings[plug]
+            blocked = [widget.blockSignals(True) for widget in widgets]
+            try:
+                apply(handle.get())
+            finally:
+                for widget, wasBlocked in zip(widgets, blocked):
+                    widget.blockSignals(wasBlocked)
+            self.pushes += 1
+
+    # callbacks on the nodes of the bound plugs, replaces the previous ones
+    def install(self):
+        self.uninstall()
+        if om is None or not self.bindings:
+            return
+        nodes = collections.OrderedDict()
+        for plug, (handle, apply, widgets) in self.bindings.items():
+            nodes.setdefault(handle.node, handle)
+            if self._isAnimated(handle):
+                self.animated.add(plug)
+        for node, handle in nodes.items():
+            self.nodeCallbacks[node] = om.MNodeMessage.addAttributeChangedCallback(
+                handle.native.node(), self._onAttributeChanged)
+        self.timeCallbackId = om.MDGMessage.addTimeChangeCallback(self.timeChanged)
+
+    def uninstall(self):
+        callbackIds = list(self.nodeCallbacks.values())
+        if self.timeCallbackId is not None:
+            callbackIds.append(self.timeCallbackId)
+        if callbackIds:
+            om.MMessage.removeCallbacks(callbackIds)
+        self.nodeCallbacks = {}
+        self.timeCallbackId = None
+
+    @staticmethod
+    def _isAnimated(handle):
+        plug = handle.native
+        if not hasattr(plug, 'isDestination'):
+            return False
+        if plug.isDestination:
+            return True
+        return plug.isCompound and any(plug.child(i).isDestination for i in range(plug.numChildren()))
+
+    def _onAttributeChanged(self, message, plug, otherPlug, *args):
+        name = plug.partialName(includeNodeName=True, useLongNames=True)
+        if name not in self.bindings and plug.isChild:
+            # colorGainR -> colorGain; rotateAxisZ is bound itself, not its rotateAxis parent
+            name = plug.parent().partialName(includeNodeName=True, useLongNames=True)
+        if name not in self.bindings:
+            return
+        if message & (om.MNodeMessage.kConnectionMade | om.MNodeMessage.kConnectionBroken):
+            # keyed or unkeyed from the Channel Box
+            if self._isAnimated(self.bindings[name][0]):
+                self.animated.add(name)
+            else:
+                self.animated.discard(name)
+            self.changed(name)
+        elif message & om.MNodeMessage.kAttributeSet:
+            self.changed(name)
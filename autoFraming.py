@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+# autoFraming.py
+# put targets on the power points of a guide: the camera 2D pan / zoom, roll and
+# optionally focal length are solved for every frame of a range at once, with a
+# damped Gauss-Newton (Levenberg-Marquardt) pass vectorized over the frames and
+# warm-started from what the camera already does, then written as sparse undoable keys
+
+import time
+
+import numpy as np
+
+from attributeHandles import defaultBackend
+from framingRecorder import TOLERANCES, simplify
+from framingReport import INCH, filmPositions, gateSize, sample
+from guideGenerator import powerPoints
+
+# solved values, one column each
+PARAMETERS = ('horizontalPan', 'verticalPan', 'zoom', 'rotateAxisZ', 'focalLength')
+PAN_X, PAN_Y, ZOOM, ROLL, FOCAL = range(len(PARAMETERS))
+
+# error allowed when dropping keys, see framingRecorder.TOLERANCES
+KEY_TOLERANCES = dict(TOLERANCES, focalLength=0.05)
+
+# pull towards the starting values, keeps the under-constrained parameters
+# (zoom and roll with a single target) where they were
+DAMPING = 1e-4
+ITERATIONS = 12
+
+
+def _rotate(film, degrees):
+    angle = np.radians(degrees)[:, np.newaxis]
+    cos, sin = np.cos(angle), np.sin(angle)
+    return np.stack([cos * film[..., 0] - sin * film[..., 1], sin * film[..., 0] + cos * film[..., 1]], axis=2)
+
+
+# gate coordinates of the targets (frames, targets, 2) for the parameters (frames, 5);
+# rolling the camera by +r turns the picture by -r, roll is relative to the sampled one
+def predict(params, film, offset, focal, gate, roll):
+    lens = (params[:, FOCAL] / focal)[:, np.newaxis, np.newaxis]
+    turned = _rotate((film + offset[:, np.newaxis, :]) * lens, roll - params[:, ROLL]) - offset[:, np.newaxis, :]
+    zoom = params[:, ZOOM][:, np.newaxis]
+    u = 0.5 + (turned[..., 0] - params[:, PAN_X][:, np.newaxis] * INCH) / (gate[:, np.newaxis, 0] * zoom)
+    v = 0.5 - (turned[..., 1] - params[:, PAN_Y][:, np.newaxis] * INCH) / (gate[:, np.newaxis, 1] * zoom)
+    return np.stack([u, v], axis=2)
+
+
+# one (frames, params) solve; free is a mask of the parameters allowed to move
+def solve(start, film, offset, focal, gate, roll, targets, free, aspect, iterations=ITERATIONS, damping=DAMPING):
+    scale = np.array([aspect, 1.0])
+    freeIndex = np.flatnonzero(free)
+    params = start.copy()
+    # parameters don't share a unit, steps and damping follow their size
+    steps = np.array([1e-4, 1e-4, 1e-4, 1e-2, 1e-2])[freeIndex]
+    weights = damping / np.square(steps / steps.min())
+
+    def residuals(p):
+        error = (predict(p, film, offset, focal, gate, roll) - targets[np.newaxis]) * scale
+        return error.reshape(len(p), -1)
+
+    lam = np.full(len(params), 1e-3)
+    current = residuals(params)
+    for iteration in range(iterations):
+        # forward differences, one vectorized evaluation per free parameter
+        jacobian = np.empty(current.shape + (len(freeIndex),))
+        for column, (index, step) in enumerate(zip(freeIndex, steps)):
+            moved = params.copy()
+            moved[:, index] += step
+            jacobian[..., column] = (residuals(moved) - current) / step
+        jtj = np.einsum('fri,frj->fij', jacobian, jacobian)
+        prior = params[:, freeIndex] - start[:, freeIndex]
+        gradient = np.einsum('fri,fr->fi', jacobian, current) + weights * prior
+        system = jtj + np.eye(len(freeIndex)) * (lam[:, np.newaxis, np.newaxis] + weights)
+        delta = -np.linalg.solve(system, gradient[..., np.newaxis])[..., 0]
+
+        candidate = params.copy()
+        candidate[:, freeIndex] += delta
+        candidate[:, ZOOM] = np.maximum(candidate[:, ZOOM], 0.01)
+        candidate[:, FOCAL] = np.maximum(candidate[:, FOCAL], 2.5)
+        moved = residuals(candidate)
+        better = np.sum(moved ** 2, axis=1) < np.sum(current ** 2, axis=1)
+        params[better] = candidate[better]
+        current[better] = moved[better]
+        lam = np.where(better, lam * 0.3, lam * 10.0)
+        if np.all(np.abs(delta) < 1e-7):
+            break
+    return params, np.sqrt(np.mean(current ** 2, axis=1))
+
+
+# nearest power point of each target at the first frame, each point used once
+def assignPoints(uv, points):
+    assigned = []
+    for target in range(uv.shape[1]):
+        distances = [np.inf if index in assigned else np.hypot(*(uv[0, target] - point))
+                     for index, point in enumerate(points)]
+        assigned.append(int(np.argmin(distances)))
+    return assigned
+
+
+# per frame values the solve starts from: the camera as it is over the range
+def cameraValues(cmdsModule, camera, shape, frames):
+    values = np.empty((len(frames), len(PARAMETERS)))
+    for index, frame in enumerate(frames.tolist()):
+        for column, attribute in enumerate(PARAMETERS):
+            node = camera if attribute == 'rotateAxisZ' else shape
+            values[index, column] = cmdsModule.getAttr(node + '.' + attribute, time=frame)
+    return values
+
+
+def autoFrame(camera, targets, guide='thirds', points=None, startFrame=None, endFrame=None, roll=True, focal=False,
+              backend=None, cmdsModule=None):
+    backend = backend or defaultBackend()
+    cmdsModule = cmdsModule or backend.cmds
+    if startFrame is None:
+        startFrame = int(cmdsModule.playbackOptions(q=True, min=True))
+    if endFrame is None:
+        endFrame = int(cmdsModule.playbackOptions(q=True, max=True))
+    shape = cmdsModule.listRelatives(camera, s=1)[0]
+    aspect = float(cmdsModule.getAttr('defaultResolution.width')) / cmdsModule.getAttr('defaultResolution.height')
+
+    cameraData, positions = sample(cmdsModule, camera, targets, startFrame, endFrame)
+    frames = cameraData['frames']
+    film, inFront = filmPositions(cameraData, positions)
+    gate = gateSize(cameraData['aperture'], cameraData['filmFit'], aspect)
+    start = cameraValues(cmdsModule, camera, shape, frames)
+    # pan / zoom only move the view when enabled, start from a neutral one otherwise
+    if not cmdsModule.getAttr(shape + '.panZoomEnabled'):
+        start[:, [PAN_X, PAN_Y]] = 0.0
+        start[:, ZOOM] = 1.0
+
+    if points is None:
+        available = powerPoints(guide, aspect) or [(0.5, 0.5)]
+        uv = predict(start, film, cameraData['offset'], cameraData['focal'], gate, start[:, ROLL])
+        points = [available[index] for index in assignPoints(uv, np.array(available))]
+    goal = np.array(points, dtype=np.float64)
+
+    # a single target fixes the pan only, two or more the zoom and roll too
+    free = np.array([True, True, len(targets) > 1, roll and len(targets) > 1, focal and len(targets) > 1])
+    if focal:
+        # zoom and focal length would fight over the same scale
+        free[ZOOM] = False
+
+    timer = time.time()
+    params, error = solve(start, film, cameraData['offset'], cameraData['focal'], gate, start[:, ROLL], goal, free,
+                          aspect)
+    solveSeconds = time.time() - timer
+
+    timer = time.time()
+    written = {}
+    backend.cmds.undoInfo(openChunk=True, chunkName='framingAutoFrame')
+    try:
+        backend.cmds.setAttr(shape + '.panZoomEnabled', 1)
+        for column, attribute in enumerate(PARAMETERS):
+            if not free[column]:
+                continue
+            plug = (camera if attribute == 'rotateAxisZ' else shape) + '.' + attribute
+            keep = simplify(frames.tolist(), params[:, column].tolist(), KEY_TOLERANCES[attribute])
+            # through cmds, undone together with panZoomEnabled; keys outside the range are kept
+            backend.replaceKeys(plug, frames[keep], params[keep, column])
+            written[plug] = len(keep)
+    finally:
+        backend.cmds.undoInfo(closeChunk=True)
+
+    return {
+        'frames': len(frames), 'points': [tuple(p) for p in goal], 'keys': written,
+        'meanError': float(error.mean()), 'maxError': float(error.max()),
+        'hidden': int((~inFront).sum()), 'solveSeconds': solveSeconds, 'writeSeconds': time.time() - timer,
+    }
+
+
+def printReport(report):
+    print('Auto framing on {} frames, {} keys, error mean {:.4f} max {:.4f} (solve {:.1f} ms, keys {:.1f} ms)'.format(
+        report['frames'], sum(report['keys'].values()), report['meanError'], report['maxError'],
+        report['solveSeconds'] * 1000.0, report['writeSeconds'] * 1000.0))
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+# batchFraming.py
+# apply a framing guide preset to many cameras at once, in one undo chunk
+# works from the tool, from a script, or standalone:
+#   mayapy batchFraming.py shot.ma --overlay rule_of_thirds --alpha 0.5 --output shot_framed.ma
+#   mayapy batchFraming.py shot.ma --restore-textures      # on the farm, before rendering
+
+import argparse
+import os
+import sys
+import time
+
+from framingEngine import RenderFormat, resolutionGateSizeY
+from guideGenerator import overlayPath
+from overlayLibrary import overlayLibrary
+from sceneCache import SceneCache
+
+try:
+    import maya.cmds as cmds
+except ImportError:
+    # outside of Maya, pass a stand-in (fakeCmds.FakeCmds) to applyPreset
+    cmds = None
+
+# image plane fit values
+FIT_HORIZONTAL = 2
+FIT_VERTICAL = 3
+FIT_TO_SIZE = 4
+
+DEFAULT_PRESET = {
+    'overlay': 'rule_of_thirds',
+    'colorGain': (1.0, 1.0, 1.0),
+    'alphaGain': 0.99,
+    # 'horizontal' or 'vertical', used by overlays flagged fit: keep in the manifest
+    'fit': 'vertical',
+    # 'resolution' sizes the image plane to the render resolution, 'film' to the film gate
+    'gate': 'resolution',
+    # overlays with a procedural guide get a texture rendered at the render resolution
+    'procedural': True,
+}
+
+
+def imagePlaneFit(preset):
+    if preset.get('procedural') and overlayLibrary.guide(preset['overlay']):
+        # rendered for the gate aspect
+        return FIT_TO_SIZE
+    if overlayLibrary.fit(preset['overlay']) == 'keep':
+        return FIT_HORIZONTAL if preset['fit'] == 'horizontal' else FIT_VERTICAL
+    return FIT_TO_SIZE
+
+
+# image plane shapes of each camera, created when missing
+def ensureImagePlanes(cameras, path, cmdsModule, scene):
+    planes = []
+    created = 0
+    for camera in cameras:
+        existing = scene.imagePlanes(camera)
+        if existing:
+            planes.append(cmdsModule.listRelatives(existing[0], s=1)[0])
+            continue
+        transform = cmdsModule.imagePlane(camera=camera, showInAllViews=False, fileName=path)[0]
+        planes.append(cmdsModule.listRelatives(transform, s=1)[0])
+        created += 1
+    return planes, created
+
+
+def applyPreset(cameras=None, preset=None, cmdsModule=None):
+    cmdsModule = cmdsModule or cmds
+    preset = dict(DEFAULT_PRESET, **(preset or {}))
+    if not overlayLibrary.get(preset['overlay']):
+        raise ValueError('Unknown overlay: {}'.format(preset['overlay']))
+
+    start = time.time()
+    # private cache, no callbacks: valid for the duration of the batch only
+    scene = SceneCache(cmdsModule)
+    if cameras is None:
+        cameras = scene.cameras()
+    cameras = [c for c in cameras if scene.cameraOf(c)]
+    report = {'cameras': len(cameras), 'created': 0, 'writes': 0, 'seconds': 0.0, 'camerasPerSecond': 0.0}
+    if not cameras:
+        return report
+
+    renderFormat = RenderFormat('', float(cmdsModule.getAttr('defaultResolution.width')),
+                                float(cmdsModule.getAttr('defaultResolution.height')), 0.0)
+    if preset['procedural']:
+        path = overlayPath(preset['overlay'], renderFormat.width, renderFormat.height)
+    else:
+        path = overlayLibrary.path(preset['overlay'])
+
+    cmdsModule.undoInfo(openChunk=True, chunkName='framingBatch')
+    try:
+        planes, report['created'] = ensureImagePlanes(cameras, path, cmdsModule, scene)
+        shapes = [scene.shapes(c)[0] for c in cameras]
+
+        # per-camera values, read in one pass per attribute
+        depths = [abs(cmdsModule.getAttr(s + '.nearClipPlane') * 1.1) for s in shapes]
+        if preset['gate'] == 'resolution':
+            sizes = [resolutionGateSizeY(renderFormat, cmdsModule.getAttr(s + '.horizontalFilmAperture')) for s in shapes]
+        else:
+            sizes = [cmdsModule.getAttr(s + '.verticalFilmAperture') for s in shapes]
+
+        # writes grouped per attribute
+        writes = [
+            ('imageName', [path] * len(planes), {'type': 'string'}),
+            ('depth', depths, {}),
+            ('textureFilter', [1] * len(planes), {}),
+            ('fit', [imagePlaneFit(preset)] * len(planes), {}),
+            ('alphaGain', [preset['alphaGain']] * len(planes), {}),
+            ('overrideEnabled', [1] * len(planes), {}),
+            ('overrideDisplayType', [2] * len(planes), {}),
+            ('sizeY', sizes, {}),
+        ]
+        for attribute, values, flags in writes:
+            for plane, value in zip(planes, values):
+                cmdsModule.setAttr(plane + '.' + attribute, value, **flags)
+        r, g, b = preset['colorGain']
+        for plane in planes:
+            cmdsModule.setAttr(plane + '.colorGain', r, g, b, type='double3')
+        for plane in planes:
+            if not cmdsModule.attributeQuery('framingGuideId', node=plane, exists=True):
+                cmdsModule.addAttr(plane, ln='framingGuideId', dt='string')
+            cmdsModule.setAttr(plane + '.framingGuideId', preset['overlay'], type='string')
+        for attribute in ('displayResolution', 'displayGateMask', 'displayFilmGate'):
+            for shape in shapes:
+                cmdsModule.setAttr(shape + '.' + attribute, 1)
+        report['writes'] = len(planes) * (len(writes) + 2) + len(shapes) * 3
+    finally:
+        cmdsModule.undoInfo(closeChunk=True)
+
+    report['seconds'] = time.time() - start
+    if report['seconds'] > 0:
+        report['camerasPerSecond'] = len(cameras) / report['seconds']
+    report['imagePlanes'] = planes
+    return report
+
+
+# generated guide textures a plane points to but this machine doesn't have (another
+# workstation, the farm, a cleaned cache) are rendered again at the render resolution
+def restoreTextures(cameras=None, cmdsModule=None):
+    cmdsModule = cmdsModule or cmds
+    scene = SceneCache(cmdsModule)
+    width = float(cmdsModule.getAttr('defaultResolution.width'))
+    height = float(cmdsModule.getAttr('defaultResolution.height'))
+    restored = []
+    for camera in cameras or scene.cameras():
+        for plane in scene.imagePlanes(camera):
+            shape = (cmdsModule.listRelatives(plane, s=1) or [plane])[0]
+            path = cmdsModule.getAttr(shape + '.imageName') or ''
+            if not path or os.path.isfile(path):
+                continue
+            if not cmdsModule.attributeQuery('framingGuideId', node=shape, exists=True):
+                continue
+            overlayId = cmdsModule.getAttr(shape + '.framingGuideId')
+            if not overlayLibrary.get(overlayId):
+                continue
+            cmdsModule.setAttr(shape + '.imageName', overlayPath(overlayId, width, height), type='string')
+            restored.append(shape)
+    return restored
+
+
+def printReport(report):
+    print('Framing guide applied to {} camera(s), {} image plane(s) created, {} writes in {:.3f} s ({:.0f} cameras/s)'.format(
+        report['cameras'], report['created'], report['writes'], report['seconds'], report['camerasPerSecond']))
+
+
+# mayapy entry point
+def standalone(argv=None):
+    parser = argparse.ArgumentParser(description='Apply a framing guide to the cameras of a Maya scene.')
+    parser.add_argument('scene')
+    parser.add_argument('--overlay', default=DEFAULT_PRESET['overlay'], help='overlay id from pictures/manifest.json')
+    parser.add_argument('--cameras', nargs='*', help='camera transforms, all user cameras by default')
+    parser.add_argument('--alpha', type=float, default=DEFAULT_PRESET['alphaGain'])
+    parser.add_argument('--color', type=float, nargs=3, default=DEFAULT_PRESET['colorGain'])
+    parser.add_argument('--fit', choices=('horizontal', 'vertical'), default=DEFAULT_PRESET['fit'])
+    parser.add_argument('--gate', choices=('resolution', 'film'), default=DEFAULT_PRESET['gate'])
+    parser.add_argument('--pictures', dest='procedural', action='store_false',
+                        help='use the PNG overlays, not the guides rendered at the render resolution')
+    parser.add_argument('--output', help='save to this file instead of overwriting the scene')
+    parser.add_argument('--restore-textures', action='store_true',
+                        help='only render again the guide textures missing on this machine')
+    args = parser.parse_args(argv)
+
+    import maya.standalone
+    maya.standalone.initialize()
+    import maya.cmds as mayaCmds
+
+    mayaCmds.file(args.scene, open=True, force=True)
+    if args.restore_textures:
+        print('{} guide texture(s) restored'.format(len(restoreTextures(args.cameras, mayaCmds))))
+        if args.output:
+            mayaCmds.file(rename=args.output)
+        mayaCmds.file(save=True, force=True)
+        maya.standalone.uninitialize()
+        return
+    preset = {'overlay': args.overlay, 'alphaGain': args.alpha, 'colorGain': tuple(args.color),
+              'fit': args.fit, 'gate': args.gate, 'procedural': args.procedural}
+    report = applyPreset(args.cameras, preset, mayaCmds)
+    printReport(report)
+    if args.output:
+        mayaCmds.file(rename=args.output)
+    mayaCmds.file(save=True, force=True)
+    maya.standalone.uninitialize()
+
+
+if __name__ == '__main__':
+    standalone(sys.argv[1:])
@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+# benchmarkSuite.py
+# MainWindow handler benchmarks against a simulated scene, no Maya license needed
+# maya.cmds / maya.mel are replaced by fakeCmds before the tool is imported, PySide2 runs offscreen
+#
+#   python benchmarkSuite.py --cameras 10 200 --planes 0 2 --latency 0 0.0001
+#   python benchmarkSuite.py --save-baseline        # record the current numbers as the reference
+#
+# exits with 1 when a scenario issues more Maya calls per event than the baseline,
+# when its p50 latency is more than --tolerance slower, or when it has no baseline entry
+# (record one with --save-baseline on the reference machine, and commit benchmarkBaseline.json)
+
+import argparse
+import collections
+import json
+import os
+import sys
+import time
+import types
+
+from fakeCmds import FakeCmds, FakeMel
+
+FOLDER = os.path.dirname(os.path.abspath(__file__))
+BASELINE = os.path.join(FOLDER, 'benchmarkBaseline.json')
+
+HANDLERS = ('updateCameraList', 'changeCamera', 'userChangePic', 'createPushButton', 'panZoomMove', 'focalLength',
+            'eventFilter', 'panZoomWheel', 'rollTool', 'overScanValue', 'alphaGainValue', 'colorOffsetValue',
+            'undoFraming')
+
+
+# maya.cmds seen by the tool, forwards to the scene of the running scenario
+class SceneProxy(object):
+    def __init__(self):
+        self.fake = FakeCmds()
+
+    def __getattr__(self, name):
+        return getattr(self.fake, name)
+
+
+scene = SceneProxy()
+
+
+def installFakeMaya():
+    if 'maya.cmds' in sys.modules and sys.modules['maya.cmds'] is scene:
+        return
+    maya = types.ModuleType('maya')
+    mixin = types.ModuleType('maya.app.general.mayaMixin')
+    mixin.MayaQWidgetBaseMixin = object
+    maya.cmds = scene
+    maya.mel = FakeMel(scene)
+    sys.modules.update({
+        'maya': maya,
+        'maya.cmds': maya.cmds,
+        'maya.mel': maya.mel,
+        'maya.app': types.ModuleType('maya.app'),
+        'maya.app.general': types.ModuleType('maya.app.general'),
+        'maya.app.general.mayaMixin': mixin,
+    })
+    # no maya.api: sceneCache, panelTracker and attributeHandles fall back to their cmds-only paths
+    import attributeHandles
+    import panelTracker
+    import sceneCache
+    attributeHandles._defaultBackend[:] = [attributeHandles.CmdsBackend(scene)]
+    sceneCache.sceneCache.cmds = scene
+    panelTracker.panelTracker.cmds = scene
+    panelTracker.panelTracker.invalidate()
+
+
+def buildScene(cameras, planes):
+    from overlayLibrary import overlayLibrary
+
+    fake = FakeCmds()
+    path = overlayLibrary.path(overlayLibrary.names()[0]) if overlayLibrary.names() else ''
+    for index in range(cameras):
+        camera, shape = fake.camera()
+        for plane in range(planes):
+            fake.imagePlane(camera=shape, fileName=path)
+    fake.calls.clear()
+    return fake
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+# interaction traces, setup(window) then event(window, index) once per event
+def _enablePanZoom(window):
+    window.UI.panZoom.setChecked(True)
+    window.panZoom(1)
+
+
+def _pressPanArea(window):
+    _enablePanZoom(window)
+    window.initPanZoom(0.0, 0.0)
+
+
+def _mouseEvent(eventType, x, y):
+    from PySide2 import QtCore, QtGui
+    button = QtCore.Qt.LeftButton
+    return QtGui.QMouseEvent(eventType, QtCore.QPointF(x, y), button, button, QtCore.Qt.NoModifier)
+
+
+def _dragEvent(window, index):
+    from PySide2 import QtCore
+    step = index % 20
+    if step == 0:
+        event = _mouseEvent(QtCore.QEvent.MouseButtonPress, 0.0, 0.0)
+    elif step == 19:
+        event = _mouseEvent(QtCore.QEvent.MouseButtonRelease, 19.0, 10.0)
+    else:
+        event = _mouseEvent(QtCore.QEvent.MouseMove, float(step), step * 0.5)
+    window.eventFilter(window.UI.panZoomArea, event)
+
+
+def _changePic(window, index):
+    window.UI.listPic.setCurrentRow(index % max(window.UI.listPic.count(), 1))
+    window.userChangePic()
+
+
+# a few steps in the tool's history, undone and redone in turn
+def _editFraming(window):
+    for value in range(10):
+        window.overScanValue(value)
+        window.scheduler.flush()
+
+
+def _undoRedo(window, index):
+    if index % 20 < 10:
+        window.undoFraming()
+    else:
+        window.redoFraming()
+
+
+# cameras without an image plane (--planes 0) have no guide to edit
+def _imagePlaneEvent(name, value):
+    def event(window, index):
+        if window.imagePlaneHandles:
+            getattr(window, name)(value(index))
+    return event
+
+
+TRACES = collections.OrderedDict([
+    ('updateCameraList', (None, lambda window, index: window.updateCameraList())),
+    ('changeCamera', (None, lambda window, index: window.changeCamera(index % window.UI.listCam.count()))),
+    ('userChangePic', (None, _changePic)),
+    ('createPushButton', (None, lambda window, index: window.createPushButton())),
+    ('panZoomMove', (_pressPanArea, lambda window, index: window.panZoomMove(index % 150, index % 85))),
+    ('focalLength', (None, lambda window, index: window.focalLength(20 + index % 100))),
+    ('eventFilter', (_enablePanZoom, _dragEvent)),
+    ('panZoomWheel', (_enablePanZoom, lambda window, index: window.panZoomWheel(120 if index % 2 else -120))),
+    ('rollTool', (None, lambda window, index: window.rollTool(index % 90 - 45))),
+    ('overScanValue', (None, lambda window, index: window.overScanValue(index % 100))),
+    ('alphaGainValue', (None, _imagePlaneEvent('alphaGainValue', lambda index: index % 100))),
+    ('colorOffsetValue', (None, _imagePlaneEvent('colorOffsetValue', lambda index: index % 100))),
+    ('undoFraming', (_editFraming, _undoRedo)),
+])
+
+
+# one trace on a fresh window and scene; no event loop runs, so the scheduled writes
+# are flushed inside each event (worst case, nothing is coalesced between events)
+def runScenario(handler, cameras, planes, latency, events):
+    import MayaFramingAssistant as tool
+    import panelTracker
+    import sceneCache
+
+    scene.fake = buildScene(cameras, planes)
+    sceneCache.sceneCache.invalidate()
+    panelTracker.panelTracker.invalidate()
+    window = tool.MainWindow()
+    window.updateCameraList()
+    setup, event = TRACES[handler]
+    if setup:
+        setup(window)
+    window.scheduler.flush()
+    scene.fake.calls.clear()
+    scene.fake.latency = latency
+
+    times = []
+    start = time.time()
+    for index in range(events):
+        eventStart = time.time()
+        event(window, index)
+        window.scheduler.flush()
+        times.append(time.time() - eventStart)
+    seconds = time.time() - start
+
+    calls = dict(scene.fake.calls)
+    window.close()
+    window.deleteLater()
+    return {
+        'handler': handler, 'cameras': cameras, 'planes': planes, 'latency': latency, 'events': events,
+        'eventsPerSecond': events / seconds if seconds > 0 else 0.0,
+        'p50': percentile(times, 0.5) * 1000.0,
+        'p99': percentile(times, 0.99) * 1000.0,
+        'callsPerEvent': float(sum(calls.values())) / events,
+        'calls': calls,
+    }
+
+
+def scenarioKey(result):
+    return '{handler}/cameras={cameras}/planes={planes}/latency={latency}'.format(**result)
+
+
+# regressions of one result against the baseline entry with the same key
+def compare(result, baseline, tolerance):
+    reference = baseline.get(scenarioKey(result))
+    if not reference:
+        return ['no baseline']
+    failures = []
+    if result['callsPerEvent'] > reference['callsPerEvent'] + 1e-6:
+        failures.append('calls/event {:.2f} > {:.2f}'.format(result['callsPerEvent'], reference['callsPerEvent']))
+    if result['p50'] > reference['p50'] * (1.0 + tolerance):
+        failures.append('p50 {:.3f} ms > {:.3f} ms'.format(result['p50'], reference['p50']))
+    return failures
+
+
+def printResult(result, failures):
+    print('{:18} {:5d} cams {:2d} planes {:7.4f} s  {:9.0f} ev/s  p50 {:8.3f} ms  p99 {:8.3f} ms  {:7.2f} calls/ev {}'.format(
+        result['handler'], result['cameras'], result['planes'], result['latency'], result['eventsPerSecond'],
+        result['p50'], result['p99'], result['callsPerEvent'], ' REGRESSION: ' + ', '.join(failures) if failures else ''))
+
+
+def run(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the Framing Helper UI handlers on a simulated scene.')
+    parser.add_argument('--handlers', nargs='*', default=list(HANDLERS), choices=HANDLERS)
+    parser.add_argument('--cameras', type=int, nargs='*', default=[10, 100])
+    parser.add_argument('--planes', type=int, nargs='*', default=[1])
+    parser.add_argument('--latency', type=float, nargs='*', default=[0.0], help='seconds added to every Maya call')
+    parser.add_argument('--events', type=int, default=200)
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='allowed p50 slowdown, 0.5 = 50%%')
+    parser.add_argument('--json', help='write the results to this file')
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if not args.save_baseline:
+        if not os.path.isfile(args.baseline):
+            print('No baseline at {}, record one with --save-baseline.'.format(args.baseline))
+            return 1
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PySide2 import QtWidgets
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv[:1])
+    installFakeMaya()
+
+    results = []
+    regressions = 0
+    for handler in args.handlers:
+        for cameras in args.cameras:
+            for planes in args.planes:
+                for latency in args.latency:
+                    result = runScenario(handler, cameras, planes, latency, args.events)
+                    failures = [] if args.save_baseline else compare(result, baseline, args.tolerance)
+                    regressions += bool(failures)
+                    printResult(result, failures)
+                    results.append(result)
+                    app.processEvents()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(dict((scenarioKey(r), r) for r in results), f, indent=2, sort_keys=True)
+        print('Baseline saved to {}'.format(args.baseline))
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(run(sys.argv[1:]))
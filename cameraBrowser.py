@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+# cameraBrowser.py
+# thumbnails of what every camera frames, with its guide on top, to pick a camera
+# without looking through each one in the main viewport
+# a hidden model panel playblasts one camera per idle tick (viewport commands
+# have to stay on the GUI thread), the guide is composited on a QThreadPool worker,
+# and the result is cached on disk by camera matrix, focal length, frame and guide
+
+import collections
+import hashlib
+import os
+
+from PySide2 import QtCore, QtGui, QtWidgets
+
+from guideGenerator import overlayPath
+from overlayLibrary import userCacheFolder
+
+try:
+    import maya.cmds as cmds
+except ImportError:
+    # outside of Maya, pass a stand-in (fakeCmds.FakeCmds)
+    cmds = None
+
+THUMBNAIL_SIZE = (192, 108)
+
+
+# per user, like the other caches of the tool (see overlayLibrary.userCacheFolder)
+def defaultThumbnailFolder():
+    return userCacheFolder('thumbnails')
+
+
+# changes when the camera moves, zooms, the frame or the guide changes
+def thumbnailKey(cmdsModule, camera, shape, frame, overlayId, size=THUMBNAIL_SIZE):
+    matrix = cmdsModule.getAttr(camera + '.worldMatrix')
+    focal = cmdsModule.getAttr(shape + '.focalLength')
+    parts = (camera, [round(v, 5) for v in matrix], round(focal, 3), float(frame), overlayId or '', tuple(size))
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()[:20]
+
+
+# playblast image with the guide drawn over it, stretched to the frame like the image plane
+def compositeThumbnail(framePath, guidePath, path):
+    image = QtGui.QImage(framePath).convertToFormat(QtGui.QImage.Format_ARGB32_Premultiplied)
+    if image.isNull():
+        return False
+    guide = QtGui.QImage(guidePath) if guidePath else QtGui.QImage()
+    if not guide.isNull():
+        painter = QtGui.QPainter(image)
+        painter.setRenderHint(QtGui.QPainter.SmoothPixmapTransform)
+        painter.drawImage(QtCore.QRectF(image.rect()), guide)
+        painter.end()
+    partial = path + '.{}.tmp'.format(os.getpid())
+    image.save(partial, 'JPG', 85)
+    if os.path.isfile(path):
+        os.remove(partial)
+    else:
+        os.rename(partial, path)
+    try:
+        os.remove(framePath)
+    except OSError:
+        pass
+    return True
+
+
+class CompositeSignals(QtCore.QObject):
+    composited = QtCore.Signal(str, str)
+
+
+class CompositeWorker(QtCore.QRunnable):
+    def __init__(self, camera, framePath, guidePath, path, signals):
+        super(CompositeWorker, self).__init__()
+        self.camera = camera
+        self.framePath = framePath
+        self.guidePath = guidePath
+        self.path = path
+        self.signals = signals
+
+    # always answers, an exception would end the QRunnable without a word
+    def run(self):
+        try:
+            done = compositeThumbnail(self.framePath, self.guidePath, self.path)
+        except (IOError, OSError) as e:
+            print('Framing Helper: thumbnail of {} not written ({})'.format(self.camera, e))
+            done = False
+        self.signals.composited.emit(self.camera, self.path if done else '')
+
+
+# a model panel in a window that is never shown on screen, with a light display
+class OffscreenPanel(object):
+    def __init__(self, cmdsModule=None, size=THUMBNAIL_SIZE):
+        self.cmds = cmdsModule or cmds
+        self.size = size
+        self.window = None
+        self.panel = None
+
+    def ensure(self):
+        if self.window and self.cmds.window(self.window, exists=True):
+            return
+        self.window = self.cmds.window('framingThumbnailWindow#', widthHeight=self.size, topLeftCorner=(-4000, -4000))
+        self.cmds.paneLayout()
+        self.panel = self.cmds.modelPanel(menuBarVisible=False)
+        self.cmds.modelEditor(self.panel, e=True, displayAppearance='smoothShaded', displayTextures=False,
+                              displayLights='default', grid=False, headsUpDisplay=False, manipulators=False,
+                              imagePlane=False, allObjects=True)
+        self.cmds.showWindow(self.window)
+        # shown for the viewport to exist, then moved out of sight
+        self.cmds.window(self.window, e=True, topLeftCorner=(-4000, -4000), widthHeight=self.size)
+
+    # one frame of the camera, written as an image, the main viewport is not touched
+    def grab(self, camera, frame, path):
+        self.ensure()
+        self.cmds.modelEditor(self.panel, e=True, camera=camera)
+        return self.cmds.playblast(frame=[frame], format='image', compression='png', completeFilename=path,
+                                   widthHeight=self.size, percent=100, viewer=False, showOrnaments=False,
+                                   offScreen=True, editorPanelName=self.panel, forceOverwrite=True)
+
+    def close(self):
+        if self.window and self.cmds.window(self.window, exists=True):
+            self.cmds.deleteUI(self.window)
+        self.window = None
+        self.panel = None
+
+
+class CameraBrowser(QtWidgets.QWidget):
+    # camera transform, on double click
+    cameraPicked = QtCore.Signal(str)
+
+    def __init__(self, scene, overlayForCamera, parent=None, cmdsModule=None, folder=None):
+        super(CameraBrowser, self).__init__(parent)
+        self.cmds = cmdsModule or cmds
+        self.scene = scene
+        # camera -> overlay id shown on its image plane ('' for none)
+        self.overlayForCamera = overlayForCamera
+        self.folder = folder or defaultThumbnailFolder()
+        self.offscreen = OffscreenPanel(self.cmds)
+        self.queue = collections.OrderedDict()
+        self.items = {}
+        self.rendered = 0
+
+        self.list = QtWidgets.QListWidget()
+        self.list.setViewMode(QtWidgets.QListView.IconMode)
+        self.list.setIconSize(QtCore.QSize(*THUMBNAIL_SIZE))
+        self.list.setResizeMode(QtWidgets.QListView.Adjust)
+        self.list.setMovement(QtWidgets.QListView.Static)
+        self.list.setUniformItemSizes(True)
+        self.list.itemDoubleClicked.connect(lambda item: self.cameraPicked.emit(item.text()))
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.list)
+
+        self.pool = QtCore.QThreadPool.globalInstance()
+        self.signals = CompositeSignals()
+        self.signals.composited.connect(self._composited)
+        # one playblast per idle tick, the UI stays responsive in between
+        self.timer = QtCore.QTimer(self)
+        self.timer.setInterval(0)
+        self.timer.timeout.connect(self._renderNext)
+
+    # cached thumbnails right away, the others queued; nothing is rendered twice for the same key
+    # every camera when shown, else only the given ones (the camera just edited): a key costs a few reads
+    def refresh(self, cameras=None):
+        try:
+            if not os.path.isdir(self.folder):
+                os.makedirs(self.folder)
+        except (IOError, OSError) as e:
+            print('Framing Helper: no thumbnail folder {} ({})'.format(self.folder, e))
+            return
+        if cameras is None:
+            cameras = self.scene.cameras()
+            if list(self.items) != cameras:
+                self.list.clear()
+                self.items = collections.OrderedDict()
+                for camera in cameras:
+                    item = QtWidgets.QListWidgetItem(camera)
+                    item.setSizeHint(QtCore.QSize(THUMBNAIL_SIZE[0] + 8, THUMBNAIL_SIZE[1] + 24))
+                    self.list.addItem(item)
+                    self.items[camera] = item
+        else:
+            cameras = [camera for camera in cameras if camera in self.items]
+        frame = self.cmds.currentTime(q=True)
+        for camera in cameras:
+            overlayId = self.overlayForCamera(camera)
+            key = thumbnailKey(self.cmds, camera, self.scene.shapes(camera)[0], frame, overlayId)
+            path = os.path.join(self.folder, key + '.jpg')
+            if os.path.isfile(path):
+                self._show(camera, path)
+            else:
+                # a camera edited again before its turn is rendered once, as it is now
+                self.queue[camera] = (frame, overlayId, path)
+        if self.queue and self.isVisible():
+            self.timer.start()
+
+    def _renderNext(self):
+        if not self.queue or not self.isVisible():
+            self.timer.stop()
+            return
+        camera, (frame, overlayId, path) = self.queue.popitem(last=False)
+        if camera not in self.items:
+            return
+        framePath = path[:-len('.jpg')] + '_frame.png'
+        grabbed = self.offscreen.grab(camera, frame, framePath)
+        if not grabbed or not os.path.isfile(framePath):
+            return
+        self.rendered += 1
+        # the small guide is rendered in the thumbnail cache, not in the project's texture folder
+        guidePath = overlayPath(overlayId, THUMBNAIL_SIZE[0], THUMBNAIL_SIZE[1], self.folder) if overlayId else ''
+        self.pool.start(CompositeWorker(camera, framePath, guidePath, path, self.signals))
+
+    def _composited(self, camera, path):
+        if path:
+            self._show(camera, path)
+
+    def _show(self, camera, path):
+        item = self.items.get(camera)
+        if item is not None:
+            item.setIcon(QtGui.QIcon(QtGui.QPixmap(path)))
+
+    def showEvent(self, event):
+        super(CameraBrowser, self).showEvent(event)
+        self.refresh()
+
+    def hideEvent(self, event):
+        super(CameraBrowser, self).hideEvent(event)
+        self.timer.stop()
+
+    def closeEvent(self, event):
+        self.timer.stop()
+        self.offscreen.close()
+        super(CameraBrowser, self).closeEvent(event)
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+# compareGrid.py
+# the selected cameras side by side, each in its own light model editor (bounding
+# boxes, no textures or lights, image planes kept for the guide), all driven by the
+# framing of the current camera: its pan / zoom / overscan values are relayed through
+# the scheduler, so one change reaches every camera in the same flush and undo chunk
+# editors are unmanaged while the grid is hidden, Maya doesn't draw them
+
+import collections
+import math
+
+from PySide2 import QtCore, QtWidgets
+
+from attributeHandles import CameraHandles
+
+try:
+    import maya.cmds as cmds
+    import maya.OpenMayaUI as omui
+    from shiboken2 import wrapInstance
+except ImportError:
+    # outside of Maya, pass a stand-in (fakeCmds.FakeCmds), no editors are built
+    cmds = None
+    omui = None
+
+# relayed from the current camera to the others
+SHARED = ('horizontalPan', 'verticalPan', 'zoom', 'panZoomEnabled', 'overscan')
+
+MAX_CAMERAS = 9
+CELL_SIZE = (320, 180)
+
+EDITOR_DISPLAY = {
+    'displayAppearance': 'boundingBox',
+    'displayTextures': False,
+    'displayLights': 'none',
+    'shadows': False,
+    'grid': False,
+    'headsUpDisplay': False,
+    'manipulators': False,
+    'selectionHiliteDisplay': False,
+    'imagePlane': True,
+}
+
+
+# columns x rows close to square, wider than tall: 3 -> 2x2, 6 -> 3x2, 9 -> 3x3
+def gridShape(count):
+    columns = int(math.ceil(math.sqrt(count)))
+    return columns, int(math.ceil(count / float(columns))) if count else 0
+
+
+class CompareGrid(QtWidgets.QWidget):
+    # camera transform, on double click of its title
+    cameraPicked = QtCore.Signal(str)
+
+    def __init__(self, scene, scheduler, parent=None, cmdsModule=None):
+        super(CompareGrid, self).__init__(parent)
+        self.cmds = cmdsModule or cmds
+        self.scene = scene
+        self.scheduler = scheduler
+        self.leader = None
+        # camera -> CameraHandles, the leader excluded
+        self.followers = collections.OrderedDict()
+        # camera -> (pane layout, model editor)
+        self.editors = {}
+        self.host = None
+        self.paused = False
+        self.relayed = 0
+
+        self.grid = QtWidgets.QGridLayout(self)
+        self.grid.setContentsMargins(0, 0, 0, 0)
+        self.grid.setSpacing(2)
+
+    # cameras shown, the leader first; its framing is pushed to the others once, in one write
+    def setCameras(self, cameras, leader):
+        cameras = [c for c in cameras if self.scene.cameraOf(c)][:MAX_CAMERAS]
+        if leader in cameras:
+            cameras.remove(leader)
+        cameras.insert(0, leader)
+        self.setLeader(leader, cameras)
+        if self.followers:
+            self.scheduler.flush()
+            values = [getattr(self.leader, name).get() for name in SHARED]
+            self.leader.backend.setMany([(getattr(handles, name), value) for handles in self.followers.values()
+                                         for name, value in zip(SHARED, values)])
+        self.build(cameras)
+
+    # the camera the tool edits, the others follow it; nothing is written
+    def setLeader(self, leader, cameras=None):
+        cameras = cameras or self.cameras()
+        self.leader = CameraHandles(leader, self.scene.shapes(leader)[0])
+        self.followers = collections.OrderedDict(
+            (c, CameraHandles(c, self.scene.shapes(c)[0], self.leader.backend)) for c in cameras if c != leader)
+
+    # scheduler observer: a shared value on the leader goes to every follower, same flush
+    def relay(self, handle, value):
+        if self.leader is None or handle.node != self.leader.node or handle.attribute not in SHARED:
+            return
+        for handles in self.followers.values():
+            self.scheduler.schedule(getattr(handles, handle.attribute), value)
+            self.relayed += 1
+
+    def cameras(self):
+        return [self.leader.camera] + list(self.followers) if self.leader else []
+
+    def build(self, cameras):
+        self.clearEditors()
+        if omui is None or not cameras:
+            return
+        # Maya controls are created in a hidden window, then moved into the Qt grid
+        self.host = self.cmds.window('framingCompareHost#', visible=False)
+        self.cmds.columnLayout()
+        columns, rows = gridShape(len(cameras))
+        for index, camera in enumerate(cameras):
+            pane = self.cmds.paneLayout(parent=self.host, width=CELL_SIZE[0], height=CELL_SIZE[1])
+            editor = self.cmds.modelEditor(parent=pane, camera=camera, **EDITOR_DISPLAY)
+            self.cmds.modelEditor(editor, e=True, allObjects=False, polymeshes=True, nurbsSurfaces=True,
+                                  subdivSurfaces=True, imagePlane=True)
+            widget = wrapInstance(int(omui.MQtUtil.findLayout(pane)), QtWidgets.QWidget)
+            title = QtWidgets.QLabel(camera)
+            title.mouseDoubleClickEvent = lambda event, camera=camera: self.cameraPicked.emit(camera)
+            cell = QtWidgets.QVBoxLayout()
+            cell.setSpacing(0)
+            cell.addWidget(title)
+            cell.addWidget(widget, 1)
+            self.grid.addLayout(cell, index // columns, index % columns)
+            self.editors[camera] = (pane, editor)
+        self.paused = False
+        if not self.isVisible():
+            self.pause()
+
+    def clearEditors(self):
+        while self.grid.count():
+            cell = self.grid.takeAt(0).layout()
+            while cell is not None and cell.count():
+                widget = cell.takeAt(0).widget()
+                if widget is not None:
+                    widget.setParent(None)
+        for pane, editor in self.editors.values():
+            if self.cmds.layout(pane, exists=True):
+                self.cmds.deleteUI(pane, layout=True)
+        self.editors = {}
+        if self.host and self.cmds.window(self.host, exists=True):
+            self.cmds.deleteUI(self.host)
+        self.host = None
+
+    # unmanaged editors are skipped by the viewport refresh
+    def pause(self):
+        if self.paused:
+            return
+        for pane, editor in self.editors.values():
+            self.cmds.layout(pane, e=True, manage=False)
+        self.paused = True
+
+    def resume(self):
+        if not self.paused:
+            return
+        for pane, editor in self.editors.values():
+            self.cmds.layout(pane, e=True, manage=True)
+        self.paused = False
+
+    # relays only while shown, registered and removed in pairs
+    def showEvent(self, event):
+        super(CompareGrid, self).showEvent(event)
+        if self.relay not in self.scheduler.observers:
+            self.scheduler.observers.append(self.relay)
+        self.resume()
+
+    def hideEvent(self, event):
+        super(CompareGrid, self).hideEvent(event)
+        if self.relay in self.scheduler.observers:
+            self.scheduler.observers.remove(self.relay)
+        self.pause()
+
+    def closeEvent(self, event):
+        if self.relay in self.scheduler.observers:
+            self.scheduler.observers.remove(self.relay)
+        self.clearEditors()
+        self.leader = None
+        self.followers = collections.OrderedDict()
+        super(CompareGrid, self).closeEvent(event)
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# dollyZoom.py
+# bake a dolly zoom (vertigo) over a frame range: focal length and camera
+# distance are solved for every frame in one vectorized pass, then keyed
+# through cmds in one undo chunk, so Ctrl+Z takes the whole bake back
+
+import time
+
+import numpy as np
+
+from attributeHandles import defaultBackend
+
+EASINGS = ('linear', 'smooth')
+
+
+def ease(t, easing='linear'):
+    if easing == 'smooth':
+        return t * t * (3.0 - 2.0 * t)
+    return t
+
+
+# frames, focal, distance arrays; distance / focal stays constant so the subject keeps its size
+def solve(startFrame, endFrame, startFocal, endFocal, startDistance, easing='linear'):
+    frames = np.arange(startFrame, endFrame + 1, dtype=np.float64)
+    span = float(max(endFrame - startFrame, 1))
+    t = ease((frames - startFrame) / span, easing)
+    focal = startFocal + (endFocal - startFocal) * t
+    distance = startDistance * focal / startFocal
+    return frames, focal, distance
+
+
+# camera translate per frame, moving along its view axis around a fixed subject point
+def cameraPositions(subject, viewDirection, distance):
+    viewDirection = np.asarray(viewDirection, dtype=np.float64)
+    viewDirection = viewDirection / np.linalg.norm(viewDirection)
+    return np.asarray(subject, dtype=np.float64)[np.newaxis, :] - distance[:, np.newaxis] * viewDirection[np.newaxis, :]
+
+
+# everything needed from the scene, in the camera parent space
+def cameraSetup(cmdsModule, camera, shape):
+    matrix = cmdsModule.xform(camera, q=True, matrix=True, objectSpace=True)
+    translate = np.array(cmdsModule.getAttr(camera + '.translate')[0], dtype=np.float64)
+    # cameras look down their local -Z axis
+    viewDirection = -np.array(matrix[8:11], dtype=np.float64)
+    viewDirection /= np.linalg.norm(viewDirection)
+    centerOfInterest = cmdsModule.getAttr(shape + '.centerOfInterest')
+    focal = cmdsModule.getAttr(shape + '.focalLength')
+    subject = translate + viewDirection * centerOfInterest
+    return subject, viewDirection, centerOfInterest, focal
+
+
+def bake(camera, shape, endFocal, startFrame=None, endFrame=None, easing='linear', cmdsModule=None, backend=None):
+    backend = backend or defaultBackend()
+    cmdsModule = cmdsModule or backend.cmds
+    if startFrame is None:
+        startFrame = int(cmdsModule.playbackOptions(q=True, min=True))
+    if endFrame is None:
+        endFrame = int(cmdsModule.playbackOptions(q=True, max=True))
+
+    subject, viewDirection, centerOfInterest, startFocal = cameraSetup(cmdsModule, camera, shape)
+
+    start = time.time()
+    frames, focal, distance = solve(startFrame, endFrame, startFocal, endFocal, centerOfInterest, easing)
+    positions = cameraPositions(subject, viewDirection, distance)
+    solveSeconds = time.time() - start
+
+    start = time.time()
+    # keys inside the range are replaced, the ones around it kept
+    backend.cmds.undoInfo(openChunk=True, chunkName='framingDollyZoom')
+    try:
+        backend.replaceKeys(shape + '.focalLength', frames, focal)
+        backend.replaceKeys(shape + '.centerOfInterest', frames, distance)
+        for axis, column in zip('XYZ', range(3)):
+            backend.replaceKeys(camera + '.translate' + axis, frames, positions[:, column])
+    finally:
+        backend.cmds.undoInfo(closeChunk=True)
+    writeSeconds = time.time() - start
+
+    return {'frames': len(frames), 'solveSeconds': solveSeconds, 'writeSeconds': writeSeconds}
@@ -0,0 +1,383 @@
+# -*- coding: utf-8 -*-
+# fakeCmds.py
+# in-memory stand-in for maya.cmds, used to measure and profile the tool off-Maya
+# only the commands and flags used by MayaFramingAssistant are supported
+
+import collections
+import math
+import time
+
+
+# default attributes per node type
+NODE_ATTRIBUTES = {
+    'transform': {
+        'translateX': 0.0, 'translateY': 0.0, 'translateZ': 0.0,
+        'rotateX': 0.0, 'rotateY': 0.0, 'rotateZ': 0.0,
+        'rotateAxisX': 0.0, 'rotateAxisY': 0.0, 'rotateAxisZ': 0.0,
+        'visibility': True,
+    },
+    'camera': {
+        'focalLength': 35.0, 'overscan': 1.0, 'centerOfInterest': 5.0,
+        'horizontalPan': 0.0, 'verticalPan': 0.0, 'zoom': 1.0, 'panZoomEnabled': False,
+        'horizontalFilmAperture': 1.417, 'verticalFilmAperture': 0.945, 'filmFit': 1,
+        'nearClipPlane': 0.1, 'farClipPlane': 10000.0,
+        'displayCameraFrustum': False, 'displayResolution': False,
+        'displayGateMask': False, 'displayFilmGate': False,
+    },
+    'imagePlane': {
+        'colorGainR': 1.0, 'colorGainG': 1.0, 'colorGainB': 1.0,
+        'alphaGain': 1.0, 'depth': 100.0, 'textureFilter': 0, 'fit': 1,
+        'sizeX': 1.417, 'sizeY': 0.945, 'rotate': 0.0, 'imageName': '', 'displayOnlyIfCurrent': False,
+        'overrideEnabled': False, 'overrideDisplayType': 0,
+    },
+    'resolution': {
+        'width': 960, 'height': 540, 'deviceAspectRatio': 1.777,
+    },
+}
+
+# compound attributes, stored as their children
+COMPOUND_ATTRIBUTES = {
+    'colorGain': ('colorGainR', 'colorGainG', 'colorGainB'),
+    'translate': ('translateX', 'translateY', 'translateZ'),
+    'rotate': ('rotateX', 'rotateY', 'rotateZ'),
+}
+
+STARTUP_CAMERAS = ('persp', 'top', 'front', 'side')
+
+# model panels of the default layout and the camera they look through
+STARTUP_PANELS = (('modelPanel1', 'top'), ('modelPanel2', 'side'), ('modelPanel3', 'front'), ('modelPanel4', 'persp'))
+
+
+class FakeNode(object):
+    def __init__(self, name, nodeType, parent=None):
+        self.name = name
+        self.nodeType = nodeType
+        self.parent = parent
+        self.children = []
+        self.attrs = dict(NODE_ATTRIBUTES.get(nodeType, {}))
+        # attribute -> {frame: value}
+        self.keys = {}
+
+    def longName(self):
+        if self.parent is None:
+            return '|' + self.name
+        return self.parent.longName() + '|' + self.name
+
+
+class FakeCmds(object):
+    def __init__(self, latency=0.0, startupCameras=True):
+        self.nodes = collections.OrderedDict()
+        self.selection = []
+        self.calls = collections.Counter()
+        self.latency = latency
+        self.undoChunks = 0
+        self.playbackRange = (1.0, 120.0)
+        self.time = 1.0
+        self.panels = collections.OrderedDict()
+        self.createNode('resolution', name='defaultResolution')
+        if startupCameras:
+            for name in STARTUP_CAMERAS:
+                self.camera(name=name)
+            self.panels.update(STARTUP_PANELS)
+        self.calls.clear()
+
+    # every public command goes through here so calls can be counted
+    def _call(self, command):
+        self.calls[command] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _node(self, name):
+        if isinstance(name, FakeNode):
+            return name
+        name = name.split('|')[-1]
+        if name not in self.nodes:
+            raise ValueError('No object matches name: {}'.format(name))
+        return self.nodes[name]
+
+    def _uniqueName(self, base):
+        if base not in self.nodes and not base.endswith('#'):
+            return base
+        base = base.rstrip('#').rstrip('0123456789') or 'node'
+        index = 1
+        while '{}{}'.format(base, index) in self.nodes:
+            index += 1
+        return '{}{}'.format(base, index)
+
+    def _asList(self, names):
+        if names is None:
+            return list(self.selection)
+        if isinstance(names, (list, tuple)):
+            return list(names)
+        return [names]
+
+    def _splitPlug(self, plug):
+        node, attribute = plug.rsplit('.', 1)
+        node = self._node(node)
+        if attribute not in node.attrs and attribute not in COMPOUND_ATTRIBUTES:
+            # like Maya, shape attributes can be reached from the transform
+            for child in node.children:
+                if attribute in child.attrs:
+                    return child, attribute
+            raise ValueError('No object matches name: {}'.format(plug))
+        return node, attribute
+
+    # scene construction, not a maya.cmds command
+    def createNode(self, nodeType, name=None, parent=None):
+        name = self._uniqueName(name or nodeType + '#')
+        parentNode = self._node(parent) if parent else None
+        node = FakeNode(name, nodeType, parentNode)
+        if parentNode is not None:
+            parentNode.children.append(node)
+        self.nodes[name] = node
+        return name
+
+    def camera(self, *args, **kwargs):
+        self._call('camera')
+        if kwargs.get('q') or kwargs.get('query'):
+            node = self._node(args[0])
+            if kwargs.get('sc') or kwargs.get('startupCamera'):
+                if node.nodeType != 'camera':
+                    node = node.children[0]
+                return node.parent.name in STARTUP_CAMERAS
+            return None
+        name = kwargs.get('name')
+        transform = self.createNode('transform', name=name or 'camera#')
+        shapeName = transform + 'Shape' if name else transform.replace('camera', 'cameraShape', 1)
+        shape = self.createNode('camera', name=shapeName, parent=transform)
+        self.selection = [transform]
+        return [transform, shape]
+
+    def imagePlane(self, camera=None, fileName='', **kwargs):
+        self._call('imagePlane')
+        cameraNode = self._node(camera)
+        if cameraNode.nodeType != 'camera':
+            cameraNode = cameraNode.children[0]
+        name = kwargs.get('name') or kwargs.get('n')
+        transform = self.createNode('transform', name=name or 'imagePlane#', parent=cameraNode)
+        shapeName = transform + 'Shape' if name else transform.replace('imagePlane', 'imagePlaneShape')
+        shape = self.createNode('imagePlane', name=shapeName, parent=transform)
+        self.nodes[shape].attrs['imageName'] = fileName
+        self.selection = [transform]
+        return [transform, shape]
+
+    def ls(self, *args, **kwargs):
+        self._call('ls')
+        nodeType = kwargs.get('type')
+        long = kwargs.get('long') or kwargs.get('l')
+        if args:
+            nodes = []
+            for name in self._asList(args[0]):
+                node = self.nodes.get(name.split('|')[-1])
+                if node is not None and node not in nodes:
+                    nodes.append(node)
+        elif kwargs.get('sl') or kwargs.get('selection'):
+            nodes = [self._node(n) for n in self.selection]
+        else:
+            nodes = list(self.nodes.values())
+        if nodeType:
+            nodes = [n for n in nodes if n.nodeType == nodeType]
+        return [n.longName() if long else n.name for n in nodes]
+
+    def listRelatives(self, *args, **kwargs):
+        self._call('listRelatives')
+        nodes = [self._node(n) for n in self._asList(args[0] if args else None)]
+        nodeType = kwargs.get('type')
+        shapesOnly = kwargs.get('s') or kwargs.get('shapes')
+        long = kwargs.get('fullPath') or kwargs.get('f') or kwargs.get('pa') or kwargs.get('path')
+        result = []
+        if kwargs.get('parent') or kwargs.get('p'):
+            result = [n.parent for n in nodes if n.parent is not None]
+        else:
+            for node in nodes:
+                if kwargs.get('ad') or kwargs.get('allDescendents'):
+                    stack = list(node.children)
+                    while stack:
+                        child = stack.pop(0)
+                        result.append(child)
+                        stack.extend(child.children)
+                else:
+                    result.extend(node.children)
+        if shapesOnly:
+            result = [n for n in result if n.nodeType != 'transform']
+        if nodeType:
+            result = [n for n in result if n.nodeType == nodeType]
+        unique = []
+        for node in result:
+            if node not in unique:
+                unique.append(node)
+        if not unique:
+            return None
+        return [n.longName() if long else n.name for n in unique]
+
+    def objExists(self, name):
+        self._call('objExists')
+        try:
+            self._splitPlug(name) if '.' in name else self._node(name)
+        except ValueError:
+            return False
+        return True
+
+    def objectType(self, name):
+        self._call('objectType')
+        return self._node(name).nodeType
+
+    def getAttr(self, plug, **kwargs):
+        self._call('getAttr')
+        node, attribute = self._splitPlug(plug)
+        if attribute not in node.attrs:
+            return [tuple(node.attrs[c] for c in COMPOUND_ATTRIBUTES[attribute])]
+        return node.attrs[attribute]
+
+    def setAttr(self, plug, *values, **kwargs):
+        self._call('setAttr')
+        node, attribute = self._splitPlug(plug)
+        if attribute not in node.attrs:
+            for child, value in zip(COMPOUND_ATTRIBUTES[attribute], values):
+                node.attrs[child] = value
+        else:
+            node.attrs[attribute] = values[0]
+
+    def addAttr(self, *args, **kwargs):
+        self._call('addAttr')
+        name = kwargs.get('ln') or kwargs.get('longName')
+        for node in self._asList(args[0] if args else None):
+            default = '' if kwargs.get('dt') == 'string' or kwargs.get('dataType') == 'string' else 0
+            self._node(node).attrs[name] = kwargs.get('dv', kwargs.get('defaultValue', default))
+
+    def attributeQuery(self, attribute, node=None, exists=False, **kwargs):
+        self._call('attributeQuery')
+        try:
+            self._splitPlug('{}.{}'.format(node, attribute))
+        except ValueError:
+            return False
+        return True
+
+    def select(self, *args, **kwargs):
+        self._call('select')
+        if kwargs.get('clear') or kwargs.get('cl'):
+            self.selection = []
+            return
+        self.selection = [self._node(n).name for n in self._asList(args[0] if args else [])]
+
+    def delete(self, *args, **kwargs):
+        self._call('delete')
+        for name in self._asList(args[0] if args else None):
+            node = self._node(name)
+            stack = [node]
+            while stack:
+                current = stack.pop()
+                stack.extend(current.children)
+                self.nodes.pop(current.name, None)
+            if node.parent is not None:
+                node.parent.children.remove(node)
+        self.selection = [n for n in self.selection if n in self.nodes]
+
+    def dolly(self, camera, abs=False, d=0.0, **kwargs):
+        self._call('dolly')
+        node, attribute = self._splitPlug(camera + '.centerOfInterest')
+        node.attrs[attribute] = d if abs else node.attrs[attribute] - d
+
+    # local matrix from translate and rotate (XYZ order, degrees), rows are the axes
+    def xform(self, name, q=False, matrix=False, **kwargs):
+        self._call('xform')
+        attrs = self._node(name).attrs
+        rx, ry, rz = [math.radians(attrs['rotate' + a] + attrs['rotateAxis' + a]) for a in 'XYZ']
+        cx, sx, cy, sy, cz, sz = math.cos(rx), math.sin(rx), math.cos(ry), math.sin(ry), math.cos(rz), math.sin(rz)
+        rows = [
+            [cy * cz, cy * sz, -sy],
+            [sx * sy * cz - cx * sz, sx * sy * sz + cx * cz, sx * cy],
+            [cx * sy * cz + sx * sz, cx * sy * sz - sx * cz, cx * cy],
+        ]
+        translate = [attrs['translateX'], attrs['translateY'], attrs['translateZ']]
+        return rows[0] + [0.0] + rows[1] + [0.0] + rows[2] + [0.0] + translate + [1.0]
+
+    def setKeyframe(self, plug, t=None, v=None, **kwargs):
+        self._call('setKeyframe')
+        node, attribute = self._splitPlug(plug)
+        node.keys.setdefault(attribute, {})[float(t)] = v if v is not None else node.attrs[attribute]
+
+    def cutKey(self, plug, time=None, clear=False, **kwargs):
+        self._call('cutKey')
+        node, attribute = self._splitPlug(plug)
+        keys = node.keys.get(attribute, {})
+        first, last = time if time else (float('-inf'), float('inf'))
+        for frame in [frame for frame in keys if first <= frame <= last]:
+            del keys[frame]
+
+    def keyframe(self, plug, q=True, keyframeCount=False, **kwargs):
+        self._call('keyframe')
+        node, attribute = self._splitPlug(plug)
+        return len(node.keys.get(attribute, {}))
+
+    def currentTime(self, *args, **kwargs):
+        self._call('currentTime')
+        if kwargs.get('q') or kwargs.get('query'):
+            return self.time
+        self.time = float(args[0])
+        return self.time
+
+    def playbackOptions(self, q=True, min=False, max=False, **kwargs):
+        self._call('playbackOptions')
+        return self.playbackRange[0] if min else self.playbackRange[1]
+
+    # viewport commands, panels only track their camera
+    def getPanel(self, type=None, withFocus=False, typeOf=None, **kwargs):
+        self._call('getPanel')
+        if typeOf:
+            return 'modelPanel' if typeOf in self.panels else ''
+        if withFocus:
+            return next(reversed(self.panels), '')
+        return list(self.panels)
+
+    def modelEditor(self, panel, q=False, av=False, cam=None, **kwargs):
+        self._call('modelEditor')
+        if q:
+            # camera shape path, like the viewport does once a camera was looked through
+            node = self._node(self.panels[panel])
+            return (node.children[0] if node.children else node).longName()
+        if cam:
+            self.panels[panel] = self._node(cam).name
+
+    def lookThru(self, panel, camera, **kwargs):
+        self._call('lookThru')
+        self.panels[panel] = self._node(camera).name
+
+    # interactive commands, counted only
+    def setToolTo(self, context):
+        self._call('setToolTo')
+
+    def tumbleCtx(self, *args, **kwargs):
+        self._call('tumbleCtx')
+
+    def roll(self, *args, **kwargs):
+        self._call('roll')
+
+    def colorEditor(self, **kwargs):
+        self._call('colorEditor')
+        return None
+
+    def confirmDialog(self, dismissString='', **kwargs):
+        self._call('confirmDialog')
+        return dismissString
+
+    def undoInfo(self, *args, **kwargs):
+        self._call('undoInfo')
+        if kwargs.get('openChunk'):
+            self.undoChunks += 1
+        return True
+
+    # total of counted calls, optionally for a single command
+    def callCount(self, command=None):
+        if command:
+            return self.calls[command]
+        return sum(self.calls.values())
+
+
+# stand-in for maya.mel, evals are counted on the FakeCmds they belong to
+class FakeMel(object):
+    def __init__(self, fake):
+        self.fake = fake
+
+    def eval(self, command):
+        self.fake._call('mel.eval')
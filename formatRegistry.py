@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+# formatRegistry.py
+# render formats read from formats.json, plus per-show files listed in
+# FRAMING_HELPER_FORMATS (os.pathsep separated, .json or .yaml). A later file
+# replaces the formats with the same id, "hidden": true removes one.
+# malformed files and entries are skipped with a warning, the built-in
+# formats are used when nothing valid is left
+
+import collections
+import json
+import os
+
+from framingEngine import RenderFormat
+
+REGISTRY_VERSION = 1
+
+BUILTIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'formats.json')
+
+
+def defaultPaths():
+    paths = [BUILTIN]
+    extra = os.environ.get('FRAMING_HELPER_FORMATS', '')
+    return paths + [path for path in extra.split(os.pathsep) if path]
+
+
+def readFile(path):
+    with open(path) as f:
+        if path.lower().endswith(('.yaml', '.yml')):
+            # PyYAML isn't shipped with Maya, only needed for YAML show files
+            import yaml
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+# id and RenderFormat of a file entry, None for a hidden one; ValueError when malformed
+def parseEntry(entry):
+    if not isinstance(entry, dict):
+        raise ValueError('not a mapping')
+    key = entry.get('id')
+    # str or unicode (json under Python 2)
+    if not key or not isinstance(key, (str, type(u''))):
+        raise ValueError('no id')
+    if entry.get('hidden'):
+        return key, None
+    try:
+        width, height = int(entry['width']), int(entry['height'])
+        aspect = float(entry.get('deviceAspectRatio') or 0)
+    except (KeyError, TypeError, ValueError):
+        raise ValueError('{}: width and height are required numbers'.format(key))
+    if width <= 0 or height <= 0 or aspect < 0:
+        raise ValueError('{}: sizes must be positive'.format(key))
+    return key, RenderFormat(entry.get('name') or key, width, height, aspect or round(float(width) / height, 3))
+
+
+class FormatRegistry(object):
+    def __init__(self, paths=None):
+        self.paths = paths if paths is not None else defaultPaths()
+        self.load()
+
+    # runs at import, a broken show file must not keep the tool from opening
+    def load(self):
+        self.formats = collections.OrderedDict()
+        for path in self.paths:
+            self._loadFile(path)
+        if not self.formats and BUILTIN not in self.paths:
+            print('Framing Helper: no valid render format, using the built-in ones')
+            self._loadFile(BUILTIN)
+        self._index()
+
+    def _loadFile(self, path):
+        try:
+            data = readFile(path)
+        except Exception as e:
+            # yaml.YAMLError and friends aren't ValueErrors
+            print('Framing Helper: render formats not loaded from {} ({})'.format(path, e))
+            return
+        if not data:
+            return
+        if not isinstance(data, dict) or not isinstance(data.get('formats', []), list):
+            print('Framing Helper: render formats not loaded from {} (expected a mapping with a "formats" list)'.format(path))
+            return
+        if data.get('version', REGISTRY_VERSION) != REGISTRY_VERSION:
+            return
+        for index, entry in enumerate(data.get('formats', [])):
+            try:
+                key, renderFormat = parseEntry(entry)
+            except ValueError as e:
+                print('Framing Helper: render format {} of {} skipped ({})'.format(index, path, e))
+                continue
+            if renderFormat is None:
+                self.formats.pop(key, None)
+            else:
+                self.formats[key] = renderFormat
+
+    # (width, height) -> id, the first format wins when two share a size
+    def _index(self):
+        self.byDimensions = {}
+        for key, renderFormat in self.formats.items():
+            self.byDimensions.setdefault((renderFormat.width, renderFormat.height), key)
+
+    def keys(self):
+        return list(self.formats)
+
+    def get(self, key):
+        return self.formats.get(key)
+
+    def detect(self, width, height):
+        return self.byDimensions.get((int(width), int(height)), '')
+
+    def label(self, key):
+        renderFormat = self.formats[key]
+        return '{} {:.2f} ({}x{})'.format(renderFormat.name, renderFormat.deviceAspectRatio,
+                                         renderFormat.width, renderFormat.height)
+
+
+# shared instance used by the tool
+formatRegistry = FormatRegistry()
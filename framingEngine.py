@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+# framingEngine.py
+# framing math of MayaFramingAssistant, without Qt and without Maya
+# functions take plain camera / render format state and return the
+# attribute changes to make; FramingEngine reads and applies them through
+# maya.cmds or any stand-in (fakeCmds.FakeCmds)
+
+import collections
+import time
+
+CameraState = collections.namedtuple('CameraState', [
+    'camera', 'shape', 'focalLength', 'centerOfInterest', 'horizontalFilmAperture',
+    'verticalFilmAperture', 'horizontalPan', 'verticalPan', 'zoom', 'overscan'])
+
+# the known formats come from formats.json, see formatRegistry.py
+RenderFormat = collections.namedtuple('RenderFormat', ['name', 'width', 'height', 'deviceAspectRatio'])
+
+# pan / zoom limits of the 2D pan area
+PAN_LIMITS = (1.4, 1.0)
+PAN_SPEED = 0.2
+ZOOM_STEP = 0.05
+ZOOM_MIN = 0.01
+
+
+def clip(value, lower, upper):
+    return lower if value < lower else upper if value > upper else value
+
+
+# attribute writes in the order they were added, plus an optional dolly
+class Changes(object):
+    def __init__(self):
+        self.attributes = collections.OrderedDict()
+        self.dolly = None
+
+    def set(self, plug, value):
+        self.attributes[plug] = value
+        return self
+
+    def update(self, other):
+        self.attributes.update(other.attributes)
+        if other.dolly is not None:
+            self.dolly = other.dolly
+        return self
+
+    def __len__(self):
+        return len(self.attributes) + (1 if self.dolly is not None else 0)
+
+    def __repr__(self):
+        return 'Changes({!r}, dolly={!r})'.format(dict(self.attributes), self.dolly)
+
+
+# vertigo: keep the subject size while the focal changes
+def dollyZoomDistance(initCenterOfInterest, initFocal, focal):
+    return (initCenterOfInterest * focal) / initFocal
+
+
+def focalChanges(state, focal, dollyZoom=None):
+    changes = Changes().set(state.shape + '.focalLength', focal)
+    if dollyZoom:
+        initCenterOfInterest, initFocal = dollyZoom
+        changes.dolly = (state.camera, dollyZoomDistance(initCenterOfInterest, initFocal, focal))
+    return changes
+
+
+# image plane height matching the render resolution inside the film gate
+def resolutionGateSizeY(renderFormat, horizontalFilmAperture):
+    return (renderFormat.height * horizontalFilmAperture) / renderFormat.width
+
+
+def gateChanges(imagePlaneShape, state, renderFormat, gate='resolution'):
+    if gate == 'resolution':
+        sizeY = resolutionGateSizeY(renderFormat, state.horizontalFilmAperture)
+    else:
+        sizeY = state.verticalFilmAperture
+    return Changes().set(imagePlaneShape + '.sizeY', sizeY)
+
+
+# pixel drag in the pan area -> camera 2D pan, area is the widget size in pixels
+def panFromDrag(startPan, startPos, pos, zoom, area):
+    valueX = (((pos[0] - startPos[0]) / float(-area[0])) * zoom * PAN_SPEED) + startPan[0]
+    valueY = (((pos[1] - startPos[1]) / float(area[1])) * zoom * PAN_SPEED) + startPan[1]
+    return clip(valueX, -PAN_LIMITS[0], PAN_LIMITS[0]), clip(valueY, -PAN_LIMITS[1], PAN_LIMITS[1])
+
+
+def panChanges(state, startPan, startPos, pos, area):
+    horizontalPan, verticalPan = panFromDrag(startPan, startPos, pos, state.zoom, area)
+    return Changes().set(state.shape + '.horizontalPan', horizontalPan).set(state.shape + '.verticalPan', verticalPan)
+
+
+# mouse wheel delta (120 per notch) -> new zoom, None when out of range
+def zoomFromWheel(zoom, delta):
+    newValue = round(float(zoom - ZOOM_STEP * (delta / 120.0)), 3)
+    if newValue < ZOOM_MIN:
+        return None
+    return newValue
+
+
+# overscan slider (percent above 1)
+def overscanFromSlider(value):
+    return float('%.4f' % ((value * 0.01) + 1))
+
+
+def sliderFromOverscan(overscan):
+    return (overscan - 1) * 100
+
+
+def formatChanges(renderFormat):
+    return (Changes()
+            .set('defaultResolution.height', renderFormat.height)
+            .set('defaultResolution.width', renderFormat.width)
+            .set('defaultResolution.deviceAspectRatio', renderFormat.deviceAspectRatio))
+
+
+class FramingEngine(object):
+    def __init__(self, cmdsModule=None, formats=None):
+        if cmdsModule is None:
+            import maya.cmds as cmdsModule
+        if formats is None:
+            from formatRegistry import formatRegistry as formats
+        self.cmds = cmdsModule
+        self.formats = formats
+
+    def cameraState(self, camera, shape=None):
+        shape = shape or self.cmds.listRelatives(camera, s=1)[0]
+        values = [self.cmds.getAttr(shape + '.' + field) for field in CameraState._fields[2:]]
+        return CameraState(camera, shape, *values)
+
+    def renderFormat(self):
+        width = self.cmds.getAttr('defaultResolution.width')
+        height = self.cmds.getAttr('defaultResolution.height')
+        aspect = self.cmds.getAttr('defaultResolution.deviceAspectRatio')
+        key = self.formats.detect(width, height)
+        return RenderFormat(self.formats.get(key).name if key else 'Custom', width, height, aspect)
+
+    # one undo chunk per apply, the dolly goes last
+    def apply(self, changes):
+        if not len(changes):
+            return
+        self.cmds.undoInfo(openChunk=True, chunkName='framingEngine')
+        try:
+            for plug, value in changes.attributes.items():
+                if isinstance(value, (tuple, list)):
+                    self.cmds.setAttr(plug, *value, type='double3')
+                else:
+                    self.cmds.setAttr(plug, value)
+            if changes.dolly is not None:
+                camera, distance = changes.dolly
+                self.cmds.dolly(camera, abs=1, d=distance)
+        finally:
+            self.cmds.undoInfo(closeChunk=True)
+
+
+# math and attribute traffic of a scripted session, on the fake backend
+def benchmark(ticks=10000):
+    from fakeCmds import FakeCmds
+
+    fake = FakeCmds()
+    camera, shape = fake.camera()
+    engine = FramingEngine(fake)
+    state = engine.cameraState(camera, shape)
+
+    start = time.time()
+    for tick in range(ticks):
+        focalChanges(state, 35.0 + tick % 100, (state.centerOfInterest, state.focalLength))
+        panChanges(state, (0.0, 0.0), (0, 0), (tick % 150, tick % 85), (150, 85))
+    mathSeconds = time.time() - start
+
+    fake.calls.clear()
+    start = time.time()
+    for tick in range(ticks):
+        engine.apply(focalChanges(state, 35.0 + tick % 100, (state.centerOfInterest, state.focalLength)))
+    applySeconds = time.time() - start
+
+    print('math  {:8.2f} us/tick'.format(mathSeconds * 1e6 / ticks))
+    print('apply {:8.2f} us/tick {:6.2f} calls/tick {}'.format(
+        applySeconds * 1e6 / ticks, float(fake.callCount()) / ticks, dict(fake.calls)))
+    return mathSeconds, applySeconds
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+# framingHistory.py
+# undo / redo of the framing edits inside the tool, apart from Maya's undo queue:
+# one step per gesture (or per flush outside of one) holding the old and new
+# value of each plug it touched, kept in a ring buffer; plus saved framings
+# (A / B) recalled with a single batched write
+
+import collections
+import sys
+import time
+
+DEFAULT_CAPACITY = 256
+
+Step = collections.namedtuple('Step', ['label', 'time', 'changes'])
+
+
+class FramingHistory(object):
+    def __init__(self, scheduler, capacity=DEFAULT_CAPACITY):
+        self.scheduler = scheduler
+        # oldest steps fall off the front, whatever the session length
+        self.steps = collections.deque(maxlen=capacity)
+        # number of steps currently applied, the ones after it can be redone
+        self.position = 0
+        # plug -> [handle, old, new] of the step being recorded
+        self.current = collections.OrderedDict()
+        self.label = ''
+        # name -> {plug: (handle, value)}
+        self.framings = {}
+        self.applying = False
+        self.attach()
+
+    # again after detach, the window is reused when the tool is opened again
+    def attach(self):
+        if self.observe not in self.scheduler.observers:
+            self.scheduler.observers.append(self.observe)
+        if self.commit not in self.scheduler.stepObservers:
+            self.scheduler.stepObservers.append(self.commit)
+
+    def detach(self):
+        if self.observe in self.scheduler.observers:
+            self.scheduler.observers.remove(self.observe)
+        if self.commit in self.scheduler.stepObservers:
+            self.scheduler.stepObservers.remove(self.commit)
+
+    # scheduler observer: the value before the step is read once per plug, the last value wins
+    def observe(self, handle, value):
+        if self.applying:
+            return
+        if handle.plug not in self.current:
+            self.current[handle.plug] = [handle, self.scheduler.value(handle), value]
+            self.label = self.label or self.scheduler.gesture or handle.attribute
+        else:
+            self.current[handle.plug][2] = value
+
+    # scheduler step observer, closes the step being recorded
+    def commit(self):
+        changes = tuple((handle, old, new) for handle, old, new in self.current.values() if old != new)
+        self.current.clear()
+        label, self.label = self.label, ''
+        if not changes:
+            return
+        # a new edit after undos drops what could have been redone
+        while len(self.steps) > self.position:
+            self.steps.pop()
+        self.steps.append(Step(label, time.time(), changes))
+        self.position = len(self.steps)
+
+    def _write(self, items):
+        if not items:
+            return
+        self.scheduler.flush()
+        backend = items[0][0].backend
+        self.applying = True
+        if not self.scheduler.undoable:
+            backend.cmds.undoInfo(stateWithoutFlush=False)
+        try:
+            backend.setMany(items)
+        finally:
+            self.applying = False
+            if not self.scheduler.undoable:
+                backend.cmds.undoInfo(stateWithoutFlush=True)
+
+    def canUndo(self):
+        return self.position > 0
+
+    def canRedo(self):
+        return self.position < len(self.steps)
+
+    def undo(self):
+        if not self.canUndo():
+            return None
+        self.position -= 1
+        step = self.steps[self.position]
+        self._write([(handle, old) for handle, old, new in step.changes])
+        return step.label
+
+    def redo(self):
+        if not self.canRedo():
+            return None
+        step = self.steps[self.position]
+        self.position += 1
+        self._write([(handle, new) for handle, old, new in step.changes])
+        return step.label
+
+    # framing of the given handles under a name, read once
+    def save(self, name, handles):
+        self.framings[name] = collections.OrderedDict((h.plug, (h, self.scheduler.value(h))) for h in handles)
+
+    # a saved framing back in one write, recorded as a step so it can be undone
+    def recall(self, name):
+        framing = self.framings.get(name)
+        if not framing:
+            return False
+        items = list(framing.values())
+        changes = tuple((handle, self.scheduler.value(handle), value) for handle, value in items)
+        self._write(items)
+        self.current.clear()
+        self.current.update((handle.plug, [handle, old, new]) for handle, old, new in changes)
+        self.label = 'recall ' + name
+        self.commit()
+        return True
+
+    # A / B comparison: whichever of the two framings isn't shown
+    def toggle(self, first='A', second='B'):
+        if first not in self.framings or second not in self.framings:
+            return None
+        shown = all(self.scheduler.value(h) == v for h, v in self.framings[first].values())
+        name = second if shown else first
+        self.recall(name)
+        return name
+
+    # rough size of what is kept, in bytes
+    def memory(self):
+        size = sys.getsizeof(self.steps)
+        for step in self.steps:
+            size += sys.getsizeof(step) + sys.getsizeof(step.changes) + sum(
+                sys.getsizeof(change) + sys.getsizeof(change[1]) + sys.getsizeof(change[2]) for change in step.changes)
+        return size
+
+
+# a long session of drags on the fake backend, then undo / redo and A / B
+def benchmark(gestures=2000, ticks=30, capacity=DEFAULT_CAPACITY, undoable=False):
+    from attributeHandles import CameraHandles, CmdsBackend
+    from fakeCmds import FakeCmds
+    from updateScheduler import UpdateScheduler
+
+    fake = FakeCmds()
+    camera, shape = fake.camera()
+    backend = CmdsBackend(fake)
+    handles = CameraHandles(camera, shape, backend)
+    scheduler = UpdateScheduler(autoFlush=False)
+    scheduler.undoable = undoable
+    history = FramingHistory(scheduler, capacity)
+
+    start = time.time()
+    for gesture in range(gestures):
+        scheduler.beginGesture('overScan', backend)
+        for tick in range(ticks):
+            scheduler.schedule(handles.overscan, 1.0 + (gesture * ticks + tick) % 100 * 0.001)
+            scheduler.flush()
+        scheduler.endGesture()
+    recordSeconds = time.time() - start
+
+    framing = (handles.horizontalPan, handles.verticalPan, handles.zoom, handles.overscan, handles.focalLength)
+    history.save('A', framing)
+    handles.setMany(horizontalPan=0.2, zoom=0.8, focalLength=50.0)
+    history.save('B', framing)
+    fake.calls.clear()
+    start = time.time()
+    history.toggle()
+    toggleSeconds = time.time() - start
+    toggleCalls = fake.callCount('setAttr')
+    start = time.time()
+    while history.undo():
+        pass
+    undoSeconds = time.time() - start
+
+    print('{} gestures recorded in {:.1f} ms, {} steps kept ({:.1f} KB), {} undo chunks in Maya'.format(
+        gestures, recordSeconds * 1000.0, len(history.steps), history.memory() / 1024.0, fake.undoChunks))
+    print('A/B toggle {:.3f} ms, {} setAttr; {} undos in {:.1f} ms'.format(
+        toggleSeconds * 1000.0, toggleCalls, len(history.steps), undoSeconds * 1000.0))
+    return history
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+# framingRecorder.py
+# record the interactive reframing (pan, zoom, roll, overscan, guide opacity)
+# while the scene plays, then write it as sparse keys: the samples are
+# simplified with Ramer-Douglas-Peucker and keyed through cmds, in one undo step
+# values are sampled when they change and on every time change, so holds stay holds
+
+import collections
+import time
+
+from attributeHandles import defaultBackend
+
+try:
+    import maya.api.OpenMaya as om
+except ImportError:
+    # outside of Maya, timeChanged() has to be called by hand
+    om = None
+
+# attributes that can be recorded, and the error allowed when dropping samples (attribute units)
+TOLERANCES = {
+    'horizontalPan': 0.001,
+    'verticalPan': 0.001,
+    'zoom': 0.001,
+    'overscan': 0.001,
+    'rotateAxisZ': 0.05,
+    'alphaGain': 0.005,
+}
+
+
+# indices of the samples to keep so that the linear interpolation of the kept
+# ones stays within tolerance of every sample (vertical error, values and time
+# don't share a unit)
+def simplify(times, values, tolerance):
+    count = len(times)
+    if count < 3:
+        return list(range(count))
+    keep = [False] * count
+    keep[0] = keep[-1] = True
+    stack = [(0, count - 1)]
+    while stack:
+        first, last = stack.pop()
+        t0, v0 = times[first], values[first]
+        slope = (values[last] - v0) / float(times[last] - t0)
+        worst, worstIndex = tolerance, -1
+        for index in range(first + 1, last):
+            error = abs(values[index] - (v0 + slope * (times[index] - t0)))
+            if error > worst:
+                worst, worstIndex = error, index
+        if worstIndex != -1:
+            keep[worstIndex] = True
+            stack.append((first, worstIndex))
+            stack.append((worstIndex, last))
+    return [index for index in range(count) if keep[index]]
+
+
+class FramingRecorder(object):
+    def __init__(self, scheduler, backend=None, tolerances=None):
+        self.scheduler = scheduler
+        self.backend = backend or defaultBackend()
+        self.tolerances = dict(TOLERANCES, **(tolerances or {}))
+        self.recording = False
+        self.seconds = 0.0
+        self.startFrame = 0.0
+        self.handles = {}
+        # plug -> current value, held on the frames without a move
+        self.values = {}
+        # plugs the user actually moved, the only ones keyed
+        self.moved = set()
+        # plug -> {frame: value}, the last value of a frame wins
+        self.samples = collections.defaultdict(dict)
+        self.timeCallbackId = None
+
+    # handles: the plugs that may move, their value before the recording is kept at the start frame
+    def start(self, handles=()):
+        self.startFrame = float(self.backend.cmds.currentTime(q=True))
+        self.handles = dict((h.plug, h) for h in handles if h.attribute in self.tolerances)
+        self.values = dict((plug, h.get()) for plug, h in self.handles.items())
+        self.moved = set()
+        self.samples.clear()
+        for plug, value in self.values.items():
+            self.samples[plug][self.startFrame] = value
+        self.recording = True
+        if self.sample not in self.scheduler.observers:
+            self.scheduler.observers.append(self.sample)
+        if om is not None and self.timeCallbackId is None:
+            self.timeCallbackId = om.MDGMessage.addTimeChangeCallback(self.timeChanged)
+
+    # scheduler observer, only the recordable attributes are kept
+    def sample(self, handle, value):
+        if not self.recording or handle.attribute not in self.tolerances:
+            return
+        if handle.plug not in self.values:
+            # not known at start: the value before this first move, observers run before the write
+            self.handles[handle.plug] = handle
+            self.samples[handle.plug][self.startFrame] = self.scheduler.value(handle)
+        frame = float(self.backend.cmds.currentTime(q=True))
+        self.values[handle.plug] = value
+        self.moved.add(handle.plug)
+        self.samples[handle.plug][frame] = value
+
+    # every frame played or scrubbed keeps the current values, a move on that frame replaces them
+    def timeChanged(self, *args):
+        if not self.recording:
+            return
+        frame = float(self.backend.cmds.currentTime(q=True))
+        for plug, value in self.values.items():
+            self.samples[plug].setdefault(frame, value)
+
+    # simplified keys of every moved plug, in one undo step
+    def stop(self):
+        self.recording = False
+        if self.sample in self.scheduler.observers:
+            self.scheduler.observers.remove(self.sample)
+        if self.timeCallbackId is not None:
+            om.MMessage.removeCallback(self.timeCallbackId)
+            self.timeCallbackId = None
+        report = collections.OrderedDict()
+        if not self.moved:
+            self.samples.clear()
+            return report
+
+        start = time.time()
+        self.backend.cmds.undoInfo(openChunk=True, chunkName='framingRecord')
+        try:
+            for plug in sorted(self.moved):
+                handle = self.handles[plug]
+                frames = sorted(self.samples[plug])
+                values = [float(self.samples[plug][frame]) for frame in frames]
+                keep = simplify(frames, values, self.tolerances[handle.attribute])
+                self.backend.replaceKeys(plug, [frames[i] for i in keep], [values[i] for i in keep])
+                report[plug] = (len(frames), len(keep))
+        finally:
+            self.backend.cmds.undoInfo(closeChunk=True)
+        self.seconds = time.time() - start
+        self.samples.clear()
+        return report
+
+
+def printReport(report):
+    for plug, (samples, keys) in report.items():
+        print('{}: {} samples -> {} keys'.format(plug, samples, keys))
+
+
+# a noisy hand-held pan over 240 frames, recorded on the fake backend
+def benchmark(frames=240, tolerance=0.001):
+    import math
+    import random
+
+    from attributeHandles import CameraHandles, CmdsBackend
+    from fakeCmds import FakeCmds
+    from updateScheduler import UpdateScheduler
+
+    fake = FakeCmds()
+    camera, shape = fake.camera()
+    backend = CmdsBackend(fake)
+    handles = CameraHandles(camera, shape, backend)
+    scheduler = UpdateScheduler(autoFlush=False)
+    recorder = FramingRecorder(scheduler, backend, {'horizontalPan': tolerance})
+    recorder.start([handles.horizontalPan])
+    for frame in range(frames):
+        fake.currentTime(frame + 1)
+        recorder.timeChanged()
+        # several drag events per frame, only the last one is kept
+        for tick in range(4):
+            scheduler.schedule(handles.horizontalPan, 0.3 * math.sin(frame / 40.0) + random.uniform(-1e-4, 1e-4))
+        scheduler.flush()
+    fake.calls.clear()
+    report = recorder.stop()
+    printReport(report)
+    print('keys written in {:.2f} ms, {} setKeyframe calls'.format(recorder.seconds * 1000.0, fake.callCount('setKeyframe')))
+    return report
+
+
+if __name__ == '__main__':
+    benchmark()
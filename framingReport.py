@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+# framingReport.py
+# composition analysis of every shot camera, without looking through any of them:
+# subjects (locators, joints, bounding box centers) are sampled over the frame range,
+# projected into the resolution gate in one vectorized pass per camera, and measured
+# against the power points and lines of a guide; CSV rows per frame, JSON summary per camera
+#   mayapy framingReport.py seq010.ma --guide thirds --subjects hero_head prop_loc --workers 8 --output seq010.csv
+
+import argparse
+import collections
+import csv
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from guideGenerator import GUIDES, geometry, powerPoints
+
+try:
+    import maya.cmds as cmds
+except ImportError:
+    # outside of Maya, pass a stand-in to analyze()
+    cmds = None
+
+INCH = 25.4
+
+# camera filmFit values
+FIT_FILL = 0
+FIT_HORIZONTAL = 1
+FIT_VERTICAL = 2
+FIT_OVERSCAN = 3
+
+CSV_FIELDS = ('camera', 'subject', 'frame', 'u', 'v', 'inFrame', 'point', 'pointDistance', 'lineDistance')
+
+
+# (camera, start, end) per shot of the sequencer, else every camera over the playback range
+def shotRanges(cmdsModule, cameras=None):
+    ranges = []
+    for shot in cmdsModule.ls(type='shot') or []:
+        camera = (cmdsModule.listConnections(shot + '.currentCamera') or [''])[0]
+        if camera and (cameras is None or camera in cameras):
+            ranges.append((camera, int(cmdsModule.getAttr(shot + '.startFrame')),
+                           int(cmdsModule.getAttr(shot + '.endFrame'))))
+    if ranges:
+        return ranges
+    if cameras is None:
+        from sceneCache import SceneCache
+        cameras = SceneCache(cmdsModule).cameras()
+    start = int(cmdsModule.playbackOptions(q=True, min=True))
+    end = int(cmdsModule.playbackOptions(q=True, max=True))
+    return [(camera, start, end) for camera in cameras]
+
+
+# world position of a subject at a frame: its pivot, or the center of its shape bounding box
+def _subjectPosition(cmdsModule, subject, frame, bbox):
+    matrix = np.array(cmdsModule.getAttr(subject + '.worldMatrix', time=frame), dtype=np.float64).reshape(4, 4)
+    if bbox:
+        shapes = cmdsModule.listRelatives(subject, s=1) or []
+        if shapes:
+            center = cmdsModule.getAttr(shapes[0] + '.boundingBoxCenter', time=frame)[0]
+            return np.dot(np.append(np.array(center, dtype=np.float64), 1.0), matrix)[:3]
+    return matrix[3, :3]
+
+
+# everything the projection needs, one array per value with one row per frame
+def sample(cmdsModule, camera, subjects, start, end, bbox=False):
+    shape = cmdsModule.listRelatives(camera, s=1)[0]
+    frames = np.arange(start, end + 1, dtype=np.float64)
+    matrices = np.empty((len(frames), 4, 4))
+    lens = np.empty((len(frames), 5))
+    positions = np.empty((len(frames), len(subjects), 3))
+    for index, frame in enumerate(frames.tolist()):
+        matrices[index] = np.array(cmdsModule.getAttr(camera + '.worldMatrix', time=frame)).reshape(4, 4)
+        lens[index] = [cmdsModule.getAttr(shape + '.' + attribute, time=frame) for attribute in
+                       ('focalLength', 'horizontalFilmAperture', 'verticalFilmAperture',
+                        'horizontalFilmOffset', 'verticalFilmOffset')]
+        for column, subject in enumerate(subjects):
+            positions[index, column] = _subjectPosition(cmdsModule, subject, frame, bbox)
+    return {
+        'frames': frames,
+        'matrices': matrices,
+        'focal': lens[:, 0],
+        'aperture': lens[:, 1:3] * INCH,
+        'offset': lens[:, 3:5] * INCH,
+        'filmFit': cmdsModule.getAttr(shape + '.filmFit'),
+    }, positions
+
+
+# resolution gate size in mm per frame, following the camera film fit
+def gateSize(aperture, filmFit, aspect):
+    horizontal = np.stack([aperture[:, 0], aperture[:, 0] / aspect], axis=1)
+    vertical = np.stack([aperture[:, 1] * aspect, aperture[:, 1]], axis=1)
+    if filmFit == FIT_HORIZONTAL:
+        return horizontal
+    if filmFit == FIT_VERTICAL:
+        return vertical
+    wider = (aperture[:, 0] / aperture[:, 1] < aspect)[:, np.newaxis]
+    if filmFit == FIT_OVERSCAN:
+        wider = ~wider
+    return np.where(wider, horizontal, vertical)
+
+
+# (frames, subjects, 2) film back positions in mm and a mask of the subjects in front of the camera
+def filmPositions(cameraData, positions):
+    inverse = np.linalg.inv(cameraData['matrices'])
+    homogeneous = np.concatenate([positions, np.ones(positions.shape[:2] + (1,))], axis=2)
+    local = np.einsum('fsi,fij->fsj', homogeneous, inverse)[..., :3]
+    depth = -local[..., 2]
+    inFront = depth > 1e-9
+    depth = np.where(inFront, depth, 1e-9)
+    # cameras look down -Z
+    film = cameraData['focal'][:, np.newaxis, np.newaxis] * local[..., :2] / depth[..., np.newaxis]
+    film -= cameraData['offset'][:, np.newaxis, :]
+    return film, inFront
+
+
+# (frames, subjects, 2) gate coordinates (0..1, y down) and a mask of the subjects in front of the camera
+def project(cameraData, positions, aspect):
+    film, inFront = filmPositions(cameraData, positions)
+    gate = gateSize(cameraData['aperture'], cameraData['filmFit'], aspect)[:, np.newaxis, :]
+    u = 0.5 + film[..., 0] / gate[..., 0]
+    v = 0.5 - film[..., 1] / gate[..., 1]
+    return np.stack([u, v], axis=2), inFront
+
+
+# distances in frame heights, so x and y weigh the same whatever the aspect
+def measure(uv, guide, aspect):
+    scale = np.array([aspect, 1.0])
+    points = np.array(powerPoints(guide, aspect) or [(0.5, 0.5)], dtype=np.float64) * scale
+    flat = uv.reshape(-1, 2) * scale
+
+    toPoints = np.linalg.norm(flat[:, np.newaxis, :] - points[np.newaxis, :, :], axis=2)
+    nearest = np.argmin(toPoints, axis=1)
+    pointDistance = toPoints[np.arange(len(flat)), nearest]
+
+    segments = np.array([(polyline[i], polyline[i + 1]) for polyline in geometry(guide, aspect)
+                         for i in range(len(polyline) - 1)], dtype=np.float64) * scale
+    starts, vectors = segments[:, 0], segments[:, 1] - segments[:, 0]
+    lengths = np.maximum(np.einsum('ij,ij->i', vectors, vectors), 1e-12)
+    relative = flat[:, np.newaxis, :] - starts[np.newaxis, :, :]
+    t = np.clip(np.einsum('psi,si->ps', relative, vectors) / lengths, 0.0, 1.0)
+    closest = starts[np.newaxis] + t[..., np.newaxis] * vectors[np.newaxis]
+    lineDistance = np.min(np.linalg.norm(flat[:, np.newaxis, :] - closest, axis=2), axis=1)
+
+    shape = uv.shape[:2]
+    return nearest.reshape(shape), pointDistance.reshape(shape), lineDistance.reshape(shape)
+
+
+def analyzeCamera(cmdsModule, camera, start, end, subjects, guide, aspect, bbox=False):
+    cameraData, positions = sample(cmdsModule, camera, subjects, start, end, bbox)
+    uv, inFront = project(cameraData, positions, aspect)
+    nearest, pointDistance, lineDistance = measure(uv, guide, aspect)
+    inFrame = inFront & np.all((uv >= 0.0) & (uv <= 1.0), axis=2)
+
+    rows = []
+    for index, frame in enumerate(cameraData['frames']):
+        for column, subject in enumerate(subjects):
+            rows.append(collections.OrderedDict([
+                ('camera', camera), ('subject', subject), ('frame', float(frame)),
+                ('u', round(float(uv[index, column, 0]), 5)), ('v', round(float(uv[index, column, 1]), 5)),
+                ('inFrame', bool(inFrame[index, column])), ('point', int(nearest[index, column])),
+                ('pointDistance', round(float(pointDistance[index, column]), 5)),
+                ('lineDistance', round(float(lineDistance[index, column]), 5)),
+            ]))
+    # distances of the samples in frame, of all of them when the subjects never are
+    visible = inFrame if inFrame.any() else np.ones_like(inFrame)
+    summary = {
+        'camera': camera, 'start': start, 'end': end, 'frames': len(cameraData['frames']),
+        'inFrame': float(inFrame.mean()),
+        'meanPointDistance': float(pointDistance[visible].mean()),
+        'maxPointDistance': float(pointDistance[visible].max()),
+        'meanLineDistance': float(lineDistance[visible].mean()),
+    }
+    return rows, summary
+
+
+# in the current session, one shot after the other; ranges: (camera, start, end), the shots by default
+def analyze(subjects, guide='thirds', cameras=None, bbox=False, cmdsModule=None, ranges=None):
+    cmdsModule = cmdsModule or cmds
+    if guide not in GUIDES:
+        raise ValueError('Unknown guide: {}'.format(guide))
+    aspect = float(cmdsModule.getAttr('defaultResolution.width')) / cmdsModule.getAttr('defaultResolution.height')
+    # 'point' in the rows is an index in report['points']
+    report = {'guide': guide, 'aspect': aspect, 'points': powerPoints(guide, aspect) or [(0.5, 0.5)],
+              'subjects': list(subjects), 'cameras': [], 'rows': []}
+    start = time.time()
+    for camera, first, last in ranges or shotRanges(cmdsModule, cameras):
+        rows, summary = analyzeCamera(cmdsModule, camera, first, last, subjects, guide, aspect, bbox)
+        # rows of this shot in report['rows'], the parallel merge splits them back per shot
+        summary['samples'] = len(rows)
+        report['rows'].extend(rows)
+        report['cameras'].append(summary)
+    report['seconds'] = time.time() - start
+    return report
+
+
+# CSV rows next to a JSON summary (same name, .json)
+def write(report, path):
+    with open(path, 'w') as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(report['rows'])
+    summary = dict((key, value) for key, value in report.items() if key != 'rows')
+    with open(os.path.splitext(path)[0] + '.json', 'w') as f:
+        json.dump(summary, f, indent=2)
+
+
+def printReport(report):
+    print('Framing report: {} camera(s), {} samples, guide {} in {:.2f} s'.format(
+        len(report['cameras']), len(report['rows']), report['guide'], report['seconds']))
+    for summary in report['cameras']:
+        print('  {camera:30} {start}-{end} in frame {inFrame:6.1%} to points {meanPointDistance:.3f} '
+              '(max {maxPointDistance:.3f}) to lines {meanLineDistance:.3f}'.format(**summary))
+
+
+# 'camera:start:end' on the worker command line, camera names may hold namespaces
+def _rangeArgument(text):
+    camera, first, last = text.rsplit(':', 2)
+    return camera, int(first), int(last)
+
+
+# the shots of one scene split over mayapy processes, each opens the scene itself; split
+# by shot, not by camera, a camera used by several shots is measured once per shot
+def analyzeParallel(scene, subjects, guide='thirds', cameras=None, bbox=False, workers=4, executable=None):
+    import maya.cmds as mayaCmds
+
+    ranges = shotRanges(mayaCmds, cameras)
+    chunks = [ranges[index::workers] for index in range(workers) if ranges[index::workers]]
+    folder = tempfile.mkdtemp()
+    start = time.time()
+    processes = []
+    report = None
+    # (camera, start, end) -> (summary, rows)
+    shots = {}
+    try:
+        for index, chunk in enumerate(chunks):
+            output = os.path.join(folder, 'part{}.json'.format(index))
+            command = [executable or sys.executable, os.path.abspath(__file__), scene, '--worker', '--guide', guide,
+                       '--output', output, '--subjects'] + list(subjects) + \
+                      ['--ranges'] + ['{}:{}:{}'.format(*shot) for shot in chunk]
+            if bbox:
+                command.append('--bbox')
+            processes.append((subprocess.Popen(command), output))
+
+        for process, output in processes:
+            if process.wait() != 0:
+                raise RuntimeError('framing report worker failed: {}'.format(output))
+            with open(output) as f:
+                part = json.load(f)
+            report = report or part
+            first = 0
+            for summary in part['cameras']:
+                rows = part['rows'][first:first + summary['samples']]
+                first += summary['samples']
+                shots[(summary['camera'], summary['start'], summary['end'])] = (summary, rows)
+    finally:
+        # workers left running after a failure would still write in the folder
+        for process, output in processes:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+        shutil.rmtree(folder, ignore_errors=True)
+    # back in shot order
+    report['cameras'] = [shots[shot][0] for shot in ranges]
+    report['rows'] = [row for shot in ranges for row in shots[shot][1]]
+    report['seconds'] = time.time() - start
+    return report
+
+
+# mayapy entry point
+def standalone(argv=None):
+    parser = argparse.ArgumentParser(description='Measure the framing of the shot cameras of a Maya scene.')
+    parser.add_argument('scene')
+    parser.add_argument('--subjects', nargs='+', required=True, help='transforms to follow (locators, joints, ...)')
+    parser.add_argument('--guide', default='thirds', choices=sorted(GUIDES))
+    parser.add_argument('--cameras', nargs='*', help='camera transforms, the shot cameras by default')
+    parser.add_argument('--bbox', action='store_true', help='use the center of the subject bounding box')
+    parser.add_argument('--workers', type=int, default=1, help='mayapy processes, one scene load each')
+    parser.add_argument('--output', required=True, help='CSV file, the summary goes next to it as .json')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--ranges', nargs='*', type=_rangeArgument, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    import maya.standalone
+    maya.standalone.initialize()
+    import maya.cmds as mayaCmds
+
+    mayaCmds.file(args.scene, open=True, force=True)
+    if args.workers > 1 and not args.worker:
+        report = analyzeParallel(args.scene, args.subjects, args.guide, args.cameras, args.bbox, args.workers)
+    else:
+        report = analyze(args.subjects, args.guide, args.cameras, args.bbox, mayaCmds, args.ranges)
+    if args.worker:
+        with open(args.output, 'w') as f:
+            json.dump(report, f)
+    else:
+        write(report, args.output)
+        printReport(report)
+    maya.standalone.uninitialize()
+
+
+if __name__ == '__main__':
+    standalone(sys.argv[1:])
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+# framingState.py
+# the framing settings of a camera (guide, color, opacity, fit, gate, rotation,
+# overscan, roll) as one compact JSON string on the camera shape: written when the
+# tool changes them, read back in one getAttr when the camera is selected again,
+# and copied to other cameras (or shots) in one batched pass
+
+import json
+import time
+
+from batchFraming import applyPreset
+from sceneCache import SceneCache
+
+try:
+    import maya.cmds as cmds
+except ImportError:
+    # outside of Maya, pass a stand-in (fakeCmds.FakeCmds)
+    cmds = None
+
+ATTRIBUTE = 'framingState'
+VERSION = 1
+
+DEFAULT_STATE = {
+    'overlay': '',
+    'colorGain': (1.0, 1.0, 1.0),
+    'alphaGain': 0.99,
+    # 'horizontal' or 'vertical', see batchFraming.DEFAULT_PRESET
+    'fit': 'vertical',
+    # 'resolution' or 'film'
+    'gate': 'resolution',
+    'rotate': 0.0,
+    'overscan': 1.0,
+    'roll': 0.0,
+}
+
+
+def dumps(state):
+    state = dict(DEFAULT_STATE, **state)
+    state['version'] = VERSION
+    return json.dumps(state, sort_keys=True, separators=(',', ':'))
+
+
+def loads(text):
+    try:
+        data = json.loads(text or '')
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get('version') != VERSION:
+        return None
+    data.pop('version')
+    data['colorGain'] = tuple(data.get('colorGain', DEFAULT_STATE['colorGain']))
+    return dict(DEFAULT_STATE, **data)
+
+
+# None when the camera was never framed with the tool
+def read(shape, cmdsModule=None):
+    cmdsModule = cmdsModule or cmds
+    if not cmdsModule.attributeQuery(ATTRIBUTE, node=shape, exists=True):
+        return None
+    return loads(cmdsModule.getAttr(shape + '.' + ATTRIBUTE))
+
+
+# values that live on plugs come from the scene, the record may predate a Channel Box
+# edit or an undo; color / opacity / rotation stay recorded when they aren't on the plug
+# (guide layers, tinted proxy texture)
+def liveValues(state, camera, shape, imagePlaneShape=None, cmdsModule=None):
+    cmdsModule = cmdsModule or cmds
+    state = dict(state, overscan=cmdsModule.getAttr(shape + '.overscan'),
+                 roll=cmdsModule.getAttr(camera + '.rotateAxisZ'))
+    if not imagePlaneShape or cmdsModule.attributeQuery('framingStack', node=imagePlaneShape, exists=True):
+        return state
+    state['alphaGain'] = cmdsModule.getAttr(imagePlaneShape + '.alphaGain')
+    state['rotate'] = cmdsModule.getAttr(imagePlaneShape + '.rotate')
+    proxied = cmdsModule.attributeQuery('framingProxyColor', node=imagePlaneShape, exists=True) and \
+        cmdsModule.getAttr(imagePlaneShape + '.framingProxyColor')
+    if not proxied:
+        color = cmdsModule.getAttr(imagePlaneShape + '.colorGain')
+        state['colorGain'] = tuple(color[0] if isinstance(color[0], (list, tuple)) else color)
+    return state
+
+
+def write(shape, state, cmdsModule=None):
+    cmdsModule = cmdsModule or cmds
+    if not cmdsModule.attributeQuery(ATTRIBUTE, node=shape, exists=True):
+        cmdsModule.addAttr(shape, ln=ATTRIBUTE, dt='string')
+    cmdsModule.setAttr(shape + '.' + ATTRIBUTE, dumps(state), type='string')
+
+
+# the framing of one camera on others: image planes through batchFraming, then
+# rotation, overscan, roll and the records, grouped per attribute in one undo chunk
+def copy(source, targets, cmdsModule=None):
+    cmdsModule = cmdsModule or cmds
+    scene = SceneCache(cmdsModule)
+    state = read(scene.shapes(source)[0], cmdsModule)
+    if state is None:
+        raise ValueError('No framing state on {}'.format(source))
+    planes = scene.imagePlanes(source)
+    planeShape = (cmdsModule.listRelatives(planes[0], s=1) or planes)[0] if planes else None
+    state = liveValues(state, source, scene.shapes(source)[0], planeShape, cmdsModule)
+    targets = [t for t in targets if scene.cameraOf(t) and scene.cameraOf(t) != scene.cameraOf(source)]
+    report = {'cameras': len(targets), 'seconds': 0.0}
+    if not targets:
+        return report
+
+    start = time.time()
+    cmdsModule.undoInfo(openChunk=True, chunkName='framingCopy')
+    try:
+        if state['overlay']:
+            planes = applyPreset(targets, {key: state[key] for key in ('overlay', 'colorGain', 'alphaGain', 'fit', 'gate')},
+                                 cmdsModule)['imagePlanes']
+            for plane in planes:
+                cmdsModule.setAttr(plane + '.rotate', state['rotate'])
+        shapes = [scene.shapes(t)[0] for t in targets]
+        for shape in shapes:
+            cmdsModule.setAttr(shape + '.overscan', state['overscan'])
+        for target in targets:
+            cmdsModule.setAttr(target + '.rotateAxisZ', state['roll'])
+        for shape in shapes:
+            write(shape, state, cmdsModule)
+    finally:
+        cmdsModule.undoInfo(closeChunk=True)
+    report['seconds'] = time.time() - start
+    return report
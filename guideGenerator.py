@@ -0,0 +1,295 @@
+# -*- coding: utf-8 -*-
+# guideGenerator.py
+# composition guides computed for the exact gate aspect, instead of stretched PNGs
+# geometry is a list of polylines in gate coordinates (0..1, y down), memoized per aspect;
+# textures are rasterized at the render resolution, memoized per size on disk
+
+import math
+import os
+import tempfile
+
+from overlayLibrary import overlayLibrary, userCacheFolder
+
+PHI = (1.0 + math.sqrt(5.0)) / 2.0
+
+SPIRAL_TURNS = 10
+ARC_SEGMENTS = 24
+
+# line color / width of the rendered textures, tinted later by the image plane colorGain
+LINE_COLOR = (255, 255, 255, 255)
+LINE_WIDTH = 1.0 / 540.0
+
+# shared folder for the generated textures (studio / show setting)
+TEXTURE_FOLDER_VARIABLE = 'FRAMING_TEXTURE_FOLDER'
+
+_geometry = {}
+
+
+# the image planes of saved scenes point there: the shared folder when set, else the
+# sourceimages of the Maya project, else a per-user cache, never the temp folder
+def defaultTextureFolder():
+    folder = os.environ.get(TEXTURE_FOLDER_VARIABLE)
+    if folder:
+        return folder
+    try:
+        import maya.cmds as cmds
+        root = cmds.workspace(q=True, rootDirectory=True)
+    except (ImportError, AttributeError, RuntimeError):
+        # plain python, or the fake maya.cmds of the benchmarks
+        root = ''
+    if root:
+        return os.path.join(root, 'sourceimages', 'framingGuides')
+    return userCacheFolder('guides')
+
+
+def _lines(*segments):
+    return [[start, end] for start, end in segments]
+
+
+def thirds(aspect):
+    return _lines(((1 / 3.0, 0.0), (1 / 3.0, 1.0)), ((2 / 3.0, 0.0), (2 / 3.0, 1.0)),
+                  ((0.0, 1 / 3.0), (1.0, 1 / 3.0)), ((0.0, 2 / 3.0), (1.0, 2 / 3.0)))
+
+
+def phiGrid(aspect):
+    small = 1.0 / (PHI * PHI)
+    large = 1.0 / PHI
+    return _lines(((small, 0.0), (small, 1.0)), ((large, 0.0), (large, 1.0)),
+                  ((0.0, small), (1.0, small)), ((0.0, large), (1.0, large)))
+
+
+# from a corner, perpendicular to a diagonal, up to the far side of the frame (aspect-space)
+def _reciprocal(corner, diagonal, aspect):
+    dx, dy = -diagonal[1], diagonal[0]
+    best = None
+    for t in ((0.0 - corner[0]) / dx if dx else None, (aspect - corner[0]) / dx if dx else None,
+              (0.0 - corner[1]) / dy if dy else None, (1.0 - corner[1]) / dy if dy else None):
+        if t is None or t <= 1e-9:
+            continue
+        x, y = corner[0] + dx * t, corner[1] + dy * t
+        if -1e-9 <= x <= aspect + 1e-9 and -1e-9 <= y <= 1.0 + 1e-9 and (best is None or t < best):
+            best = t
+    if best is None:
+        # diagonal direction pointed outwards, go the other way
+        return _reciprocal(corner, (-diagonal[0], -diagonal[1]), aspect)
+    return corner, (corner[0] + dx * best, corner[1] + dy * best)
+
+
+def _toGate(points, aspect):
+    return [(x / aspect, y) for x, y in points]
+
+
+# both diagonals and their four reciprocals
+def dynamicSymmetry(aspect):
+    polylines = []
+    for start, end, others in (((0.0, 0.0), (aspect, 1.0), ((0.0, 1.0), (aspect, 0.0))),
+                               ((0.0, 1.0), (aspect, 0.0), ((0.0, 0.0), (aspect, 1.0)))):
+        diagonal = (end[0] - start[0], end[1] - start[1])
+        polylines.append(_toGate([start, end], aspect))
+        for corner in others:
+            polylines.append(_toGate(_reciprocal(corner, diagonal, aspect), aspect))
+    return polylines
+
+
+# one diagonal and the perpendiculars from the two other corners onto it
+def goldenTriangles(aspect, mirror=False):
+    start, end = ((0.0, 1.0), (aspect, 0.0)) if mirror else ((0.0, 0.0), (aspect, 1.0))
+    dx, dy = end[0] - start[0], end[1] - start[1]
+    length = dx * dx + dy * dy
+    polylines = [_toGate([start, end], aspect)]
+    for corner in ((0.0, 0.0), (aspect, 0.0), (0.0, 1.0), (aspect, 1.0)):
+        if corner in (start, end):
+            continue
+        t = ((corner[0] - start[0]) * dx + (corner[1] - start[1]) * dy) / length
+        polylines.append(_toGate([corner, (start[0] + dx * t, start[1] + dy * t)], aspect))
+    return polylines
+
+
+def _arc(center, radius, startAngle, endAngle):
+    points = []
+    for step in range(ARC_SEGMENTS + 1):
+        angle = math.radians(startAngle + (endAngle - startAngle) * step / float(ARC_SEGMENTS))
+        points.append((center[0] + radius * math.cos(angle), center[1] + radius * math.sin(angle)))
+    return points
+
+
+# golden rectangle cut into squares, a quarter circle in each one (y up while building)
+def _spiral(turns):
+    x0, y0, x1, y1 = 0.0, 0.0, PHI, 1.0
+    arcs = []
+    edges = []
+    for turn in range(turns):
+        side = turn % 4
+        if side == 0:
+            s = y1 - y0
+            arcs.append(_arc((x0 + s, y0), s, 180, 90))
+            edges.append([(x0 + s, y0), (x0 + s, y1)])
+            x0 += s
+        elif side == 1:
+            s = x1 - x0
+            arcs.append(_arc((x0, y1 - s), s, 90, 0))
+            edges.append([(x0, y1 - s), (x1, y1 - s)])
+            y1 -= s
+        elif side == 2:
+            s = y1 - y0
+            arcs.append(_arc((x1 - s, y1), s, 0, -90))
+            edges.append([(x1 - s, y0), (x1 - s, y1)])
+            x1 -= s
+        else:
+            s = x1 - x0
+            arcs.append(_arc((x1, y0 + s), s, -90, -180))
+            edges.append([(x0, y0 + s), (x1, y0 + s)])
+            y0 += s
+    spiral = [point for arc in arcs for point in arc]
+    return [spiral] + edges
+
+
+# the spiral keeps its proportions: largest golden rectangle of the gate, centered
+def goldenSpiral(aspect, mirror=False):
+    if aspect >= PHI:
+        width, height = PHI / aspect, 1.0
+    else:
+        width, height = 1.0, aspect / PHI
+    left, top = (1.0 - width) / 2.0, (1.0 - height) / 2.0
+    polylines = [[(left, top), (left + width, top), (left + width, top + height), (left, top + height), (left, top)]]
+    for polyline in _spiral(SPIRAL_TURNS):
+        points = []
+        for x, y in polyline:
+            u = x / PHI
+            if mirror:
+                u = 1.0 - u
+            points.append((left + u * width, top + (1.0 - y) * height))
+        polylines.append(points)
+    return polylines
+
+
+GUIDES = {
+    'thirds': thirds,
+    'phi_grid': phiGrid,
+    'dynamic_symmetry': dynamicSymmetry,
+    'golden_triangles': goldenTriangles,
+    'golden_triangles_mirror': lambda aspect: goldenTriangles(aspect, mirror=True),
+    'golden_spiral': goldenSpiral,
+    'golden_spiral_mirror': lambda aspect: goldenSpiral(aspect, mirror=True),
+}
+
+
+def geometry(guide, aspect):
+    key = (guide, round(aspect, 4))
+    if key not in _geometry:
+        _geometry[key] = GUIDES[guide](key[1])
+    return _geometry[key]
+
+
+def _intersection(a, b):
+    (x1, y1), (x2, y2) = a
+    (x3, y3), (x4, y4) = b
+    denominator = (x1 - x2) * (y3 - y4) - (y1 - y2) * (x3 - x4)
+    if abs(denominator) < 1e-12:
+        return None
+    t = ((x1 - x3) * (y3 - y4) - (y1 - y3) * (x3 - x4)) / denominator
+    u = ((x1 - x3) * (y1 - y2) - (y1 - y3) * (x1 - x2)) / denominator
+    if -1e-9 <= t <= 1 + 1e-9 and -1e-9 <= u <= 1 + 1e-9:
+        return x1 + t * (x2 - x1), y1 + t * (y2 - y1)
+    return None
+
+
+# where the subject should sit: crossings of the straight lines inside the frame, and the
+# eye of the golden spiral (its last point); gate coordinates, memoized like geometry()
+def powerPoints(guide, aspect):
+    key = ('points', guide, round(aspect, 4))
+    if key not in _geometry:
+        polylines = geometry(guide, aspect)
+        # the squares of the spiral cross everywhere, only its eye counts
+        lines = [p for p in polylines if len(p) == 2] if not guide.startswith('golden_spiral') else []
+        points = set()
+        for index, a in enumerate(lines):
+            for b in lines[index + 1:]:
+                point = _intersection(a, b)
+                if point is not None and 1e-6 < point[0] < 1 - 1e-6 and 1e-6 < point[1] < 1 - 1e-6:
+                    points.add((round(point[0], 6), round(point[1], 6)))
+        if guide.startswith('golden_spiral'):
+            points.add(tuple(round(v, 6) for v in polylines[1][-1]))
+        _geometry[key] = sorted(points)
+    return _geometry[key]
+
+
+def textureName(guide, width, height):
+    return '{}_{}x{}.png'.format(guide, int(width), int(height))
+
+
+# antialiased lines on a transparent image of exactly width x height
+def rasterize(guide, width, height):
+    from PySide2 import QtCore, QtGui
+
+    width, height = int(width), int(height)
+    image = QtGui.QImage(width, height, QtGui.QImage.Format_ARGB32_Premultiplied)
+    image.fill(QtCore.Qt.transparent)
+    painter = QtGui.QPainter(image)
+    painter.setRenderHint(QtGui.QPainter.Antialiasing)
+    pen = QtGui.QPen(QtGui.QColor(*LINE_COLOR))
+    pen.setWidthF(max(1.0, LINE_WIDTH * height))
+    painter.setPen(pen)
+    for polyline in geometry(guide, float(width) / height):
+        painter.drawPolyline(QtGui.QPolygonF([QtCore.QPointF(x * (width - 1), y * (height - 1)) for x, y in polyline]))
+    painter.end()
+    return image
+
+
+# write next to the final name first, another session may be rendering the same texture
+def saveTexture(image, path):
+    folder = os.path.dirname(path)
+    if not os.path.isdir(folder):
+        os.makedirs(folder)
+    partial = path + '.{}.tmp'.format(os.getpid())
+    image.save(partial, 'PNG')
+    if os.path.isfile(path):
+        os.remove(partial)
+    else:
+        os.rename(partial, path)
+
+
+# rendered once per guide and size, the file is reused by every camera and session
+def texture(guide, width, height, folder=None):
+    folder = folder or defaultTextureFolder()
+    path = os.path.join(folder, textureName(guide, width, height)).replace('\\', '/')
+    if not os.path.isfile(path):
+        saveTexture(rasterize(guide, width, height), path)
+    return path
+
+
+# image for an overlay at a render resolution: the procedural texture when the overlay
+# has a guide (rendered in folder, the texture folder by default), else its picture
+def overlayPath(overlayId, width, height, folder=None):
+    guide = overlayLibrary.guide(overlayId)
+    if guide in GUIDES and width and height:
+        try:
+            return texture(guide, width, height, folder)
+        except (ImportError, IOError, OSError):
+            # no Qt (plain python) or no writable texture folder
+            pass
+    return overlayLibrary.path(overlayId)
+
+
+# drawing time per guide and format, textures are rendered in a scratch folder
+def benchmark(formats=((1920, 1080), (1998, 1080), (2048, 858), (4096, 2160))):
+    import shutil
+    import time
+
+    folder = tempfile.mkdtemp()
+    try:
+        for guide in sorted(GUIDES):
+            for width, height in formats:
+                start = time.time()
+                texture(guide, width, height, folder)
+                first = time.time() - start
+                start = time.time()
+                texture(guide, width, height, folder)
+                print('{:24} {:5d}x{:<5d} render {:8.2f} ms cached {:6.3f} ms'.format(
+                    guide, width, height, first * 1000.0, (time.time() - start) * 1000.0))
+    finally:
+        shutil.rmtree(folder)
+
+
+if __name__ == '__main__':
+    benchmark()
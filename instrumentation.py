@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+# instrumentation.py
+# opt-in profiling of every maya.cmds / maya.mel call issued by the tool
+#
+#   import instrumentation
+#   instrumentation.enable()        # before opening the tool
+#   ... use the tool ...
+#   instrumentation.recorder.printReport()
+#   instrumentation.recorder.exportChromeTrace('/tmp/framing.json')  # chrome://tracing
+#   instrumentation.disable()
+
+import collections
+import json
+import os
+import sys
+import time
+
+# commands that only read the scene, repeated identical calls in one event are flagged
+QUERY_COMMANDS = {'getAttr', 'ls', 'listRelatives', 'attributeQuery', 'objExists', 'objectType', 'getPanel',
+                  'playbackOptions', 'xform', 'keyframe'}
+
+NO_HANDLER = '<no handler>'
+
+
+def isQuery(command, kwargs):
+    return command in QUERY_COMMANDS or kwargs.get('q') or kwargs.get('query')
+
+
+class HandlerStats(object):
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.commandSeconds = 0.0
+        self.commands = collections.Counter()
+        self.duplicates = collections.Counter()
+
+    def asDict(self):
+        return {
+            'calls': self.calls,
+            'ms': round(self.seconds * 1000.0, 3),
+            'commandMs': round(self.commandSeconds * 1000.0, 3),
+            'commands': dict(self.commands),
+            'commandCount': sum(self.commands.values()),
+            'duplicates': dict(self.duplicates),
+        }
+
+
+class Recorder(object):
+    def __init__(self, maxEvents=200000):
+        self.maxEvents = maxEvents
+        self.clear()
+
+    def clear(self):
+        self.origin = time.time()
+        self.handlers = collections.defaultdict(HandlerStats)
+        self.events = []
+        self.stack = []
+        self.seen = set()
+        # plug -> handler that scheduled its pending write (see wrapScheduler)
+        self.pendingOwners = {}
+        # owners of the writes of the flush running, and the handler when they all share one
+        self.flushOwners = {}
+        self.flushOwner = None
+
+    def _trace(self, name, category, start, end, args=None):
+        if len(self.events) < self.maxEvents:
+            self.events.append({
+                'name': name, 'cat': category, 'ph': 'X', 'pid': 1, 'tid': 1,
+                'ts': (start - self.origin) * 1e6, 'dur': (end - start) * 1e6, 'args': args or {},
+            })
+
+    # a handler is a MainWindow method, the outermost one on the stack is the Qt event
+    def wrapHandler(self, name, func):
+        recorder = self
+
+        def handler(*args, **kwargs):
+            if not recorder.stack:
+                recorder.seen = set()
+            recorder.stack.append(name)
+            start = time.time()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                end = time.time()
+                recorder.stack.pop()
+                stats = recorder.handlers[name]
+                stats.calls += 1
+                stats.seconds += end - start
+                recorder._trace(name, 'handler', start, end)
+
+        handler.__name__ = getattr(func, '__name__', name)
+        handler.__wrapped__ = func
+        return handler
+
+    # a deferred call runs in the flush, under the handler that scheduled it
+    def wrapDeferred(self, name, func):
+        recorder = self
+
+        def deferred(*args, **kwargs):
+            recorder.stack.append(name)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                recorder.stack.pop()
+
+        return deferred
+
+    # UpdateScheduler writes happen at flush time, from the timer: each pending write is
+    # tagged with the handler on the stack when it's scheduled, and counted under it
+    def wrapScheduler(self, schedule, scheduleCall, flush):
+        recorder = self
+
+        def tagSchedule(scheduler, handle, value):
+            if recorder.stack:
+                recorder.pendingOwners[handle.plug] = recorder.stack[-1]
+            else:
+                recorder.pendingOwners.pop(handle.plug, None)
+            return schedule(scheduler, handle, value)
+
+        def tagScheduleCall(scheduler, key, func, *args, **kwargs):
+            if recorder.stack:
+                func = recorder.wrapDeferred(recorder.stack[-1], func)
+            return scheduleCall(scheduler, key, func, *args, **kwargs)
+
+        def attributeFlush(scheduler):
+            owners = dict((plug, recorder.pendingOwners.pop(plug)) for plug in list(scheduler.pending)
+                          if plug in recorder.pendingOwners)
+            previous = recorder.flushOwners, recorder.flushOwner
+            recorder.flushOwners = owners
+            # undo chunks of the flush go to the handler if there's only one
+            recorder.flushOwner = owners[next(iter(owners))] if len(set(owners.values())) == 1 else None
+            try:
+                return flush(scheduler)
+            finally:
+                recorder.flushOwners, recorder.flushOwner = previous
+
+        return tagSchedule, tagScheduleCall, attributeFlush
+
+    def wrapCommand(self, module, command, func):
+        recorder = self
+
+        def wrapped(*args, **kwargs):
+            start = time.time()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                end = time.time()
+                recorder.recordCommand(module, command, args, kwargs, start, end)
+
+        wrapped.__name__ = command
+        return wrapped
+
+    def recordCommand(self, module, command, args, kwargs, start, end):
+        plug = args[0] if args and not isinstance(args[0], (list, tuple)) else None
+        owner = self.flushOwners.get(plug) if plug is not None else None
+        if owner is None and self.stack:
+            owner = self.stack[-1]
+        owner = owner or self.flushOwner or NO_HANDLER
+        stats = self.handlers[owner]
+        stats.commands[module + '.' + command] += 1
+        stats.commandSeconds += end - start
+
+        if isQuery(command, kwargs):
+            key = (command, repr(args), repr(sorted(kwargs.items())))
+            if key in self.seen:
+                stats.duplicates['{}({})'.format(command, ', '.join(repr(a) for a in args))] += 1
+            self.seen.add(key)
+        elif command == 'setAttr' and plug:
+            # a read after a write of the same plug isn't a duplicate
+            self.seen.discard(('getAttr', repr((plug,)), repr([])))
+        self._trace(command, module, start, end, {'args': repr(args)[:200], 'handler': owner})
+
+    def report(self):
+        return {
+            'handlers': dict((name, stats.asDict()) for name, stats in self.handlers.items()),
+            'commandCount': sum(sum(s.commands.values()) for s in self.handlers.values()),
+            'duplicateCount': sum(sum(s.duplicates.values()) for s in self.handlers.values()),
+        }
+
+    def printReport(self, top=20):
+        handlers = sorted(self.handlers.items(), key=lambda item: item[1].seconds, reverse=True)
+        print('{:30} {:>7} {:>10} {:>9} {:>6}'.format('handler', 'calls', 'ms', 'commands', 'dups'))
+        for name, stats in handlers[:top]:
+            print('{:30} {:7d} {:10.2f} {:9d} {:6d}'.format(name, stats.calls, stats.seconds * 1000.0,
+                                                             sum(stats.commands.values()), sum(stats.duplicates.values())))
+
+    def exportJson(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2, sort_keys=True)
+
+    # load in chrome://tracing or https://ui.perfetto.dev
+    def exportChromeTrace(self, path):
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, f)
+
+
+# stand-in for maya.cmds / maya.mel, every callable is timed by the recorder
+class InstrumentedModule(object):
+    def __init__(self, module, name, recorder):
+        self._module = module
+        self._name = name
+        self._recorder = recorder
+        self._wrapped = {}
+
+    def __getattr__(self, attribute):
+        value = getattr(self._module, attribute)
+        if not callable(value):
+            return value
+        if attribute not in self._wrapped:
+            self._wrapped[attribute] = self._recorder.wrapCommand(self._name, attribute, value)
+        return self._wrapped[attribute]
+
+
+recorder = Recorder()
+_patched = []
+
+
+def _toolModules():
+    folder = os.path.dirname(os.path.abspath(__file__))
+    for module in list(sys.modules.values()):
+        path = getattr(module, '__file__', None)
+        if module is not None and path and os.path.dirname(os.path.abspath(path)) == folder:
+            yield module
+
+
+def _patch(owner, attribute, value):
+    _patched.append((owner, attribute, getattr(owner, attribute)))
+    setattr(owner, attribute, value)
+
+
+# wrap cmds / mel in every loaded module of the tool, and the MainWindow methods
+# windows built afterwards are instrumented; an open window is closed so main() rebuilds it
+def enable(reset=True):
+    if _patched:
+        return recorder
+    if reset:
+        recorder.clear()
+    for module in _toolModules():
+        if module.__name__ == __name__:
+            continue
+        for name in ('cmds', 'mel'):
+            value = getattr(module, name, None)
+            if value is not None and not isinstance(value, InstrumentedModule):
+                _patch(module, name, InstrumentedModule(value, name, recorder))
+
+    # objects that kept a reference to the real maya.cmds
+    attributeHandles = sys.modules.get('attributeHandles')
+    if attributeHandles is not None:
+        for backend in attributeHandles._defaultBackend:
+            _patch(backend, 'cmds', InstrumentedModule(backend.cmds, 'cmds', recorder))
+    for name in ('sceneCache', 'panelTracker'):
+        module = sys.modules.get(name)
+        shared = getattr(module, name, None)
+        if shared is not None and shared.cmds is not None and not isinstance(shared.cmds, InstrumentedModule):
+            _patch(shared, 'cmds', InstrumentedModule(shared.cmds, 'cmds', recorder))
+
+    updateScheduler = sys.modules.get('updateScheduler')
+    if updateScheduler is not None:
+        cls = updateScheduler.UpdateScheduler
+        wrapped = recorder.wrapScheduler(cls.schedule, cls.scheduleCall, cls.flush)
+        for name, value in zip(('schedule', 'scheduleCall', 'flush'), wrapped):
+            _patch(cls, name, value)
+
+    tool = sys.modules.get('MayaFramingAssistant')
+    if tool is not None:
+        for name, value in list(vars(tool.MainWindow).items()):
+            if callable(value) and not name.startswith('__'):
+                _patch(tool.MainWindow, name, recorder.wrapHandler(name, value))
+        if tool.window is not None:
+            # signals are bound to the original methods, rebuild the window
+            tool.window.close()
+            tool.window.deleteLater()
+            _patch(tool, 'window', None)
+    return recorder
+
+
+def enabled():
+    return bool(_patched)
+
+
+def disable():
+    while _patched:
+        owner, attribute, value = _patched.pop()
+        if attribute == 'window':
+            continue
+        setattr(owner, attribute, value)
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+# maskLayers.py
+# action / title safe areas, extraction frames (a 2.39 inside a 1.78 gate, ...)
+# and the letterbox around them, drawn on one extra image plane per camera in
+# front of the guide. The plane covers the whole overscanned view so the area
+# outside the gate is masked too. Geometry is memoized per input values, the
+# texture is cached on disk, and the plane is only touched when its key changes.
+
+import hashlib
+import os
+
+from framingEngine import RenderFormat, resolutionGateSizeY
+from guideGenerator import defaultTextureFolder, saveTexture
+from sceneCache import MASK_PREFIX, SceneCache, sceneCache
+
+try:
+    import maya.cmds as cmds
+except ImportError:
+    # outside of Maya, pass a stand-in (fakeCmds.FakeCmds) to MaskLayers
+    cmds = None
+
+DEFAULT_MASKS = {
+    'actionSafe': 0.93,
+    'titleSafe': 0.9,
+    # extraction aspect ratios, the first one is letterboxed
+    'extractions': (2.39,),
+    'letterboxOpacity': 0.85,
+    'outsideOpacity': 1.0,
+}
+
+# in front of the guide plane (nearClipPlane * 1.1, see batchFraming.py)
+DEPTH_FACTOR = 1.05
+FIT_TO_SIZE = 4
+LINE_WIDTH = 1.0 / 540.0
+
+_geometry = {}
+
+
+def _centered(width, height):
+    return ((1.0 - width) / 2.0, (1.0 - height) / 2.0, (1.0 + width) / 2.0, (1.0 + height) / 2.0)
+
+
+def _scaled(rect, factor):
+    centerX, centerY = (rect[0] + rect[2]) / 2.0, (rect[1] + rect[3]) / 2.0
+    halfWidth, halfHeight = (rect[2] - rect[0]) * factor / 2.0, (rect[3] - rect[1]) * factor / 2.0
+    return (centerX - halfWidth, centerY - halfHeight, centerX + halfWidth, centerY + halfHeight)
+
+
+# rectangles (left, top, right, bottom) in view coordinates (0..1, y down);
+# the view is the resolution gate grown by the overscan, planeSize is its size in inches
+def maskGeometry(width, height, horizontalFilmAperture, overscan, extractions=(2.39,), actionSafe=0.93,
+                 titleSafe=0.9):
+    key = (int(width), int(height), round(horizontalFilmAperture, 4), round(overscan, 4), tuple(extractions),
+           actionSafe, titleSafe)
+    if key in _geometry:
+        return _geometry[key]
+
+    gateHeight = resolutionGateSizeY(RenderFormat('', float(width), float(height), 0.0), horizontalFilmAperture)
+    gate = _centered(1.0 / overscan, 1.0 / overscan)
+    gateAspect = float(width) / height
+    frames = []
+    for aspect in extractions:
+        if aspect >= gateAspect:
+            # wider than the gate: full width, bars top and bottom
+            frames.append((aspect, _centered(1.0 / overscan, gateAspect / aspect / overscan)))
+        else:
+            # narrower: full height, bars on the sides
+            frames.append((aspect, _centered(aspect / gateAspect / overscan, 1.0 / overscan)))
+
+    letterbox = []
+    if frames:
+        left, top, right, bottom = frames[0][1]
+        letterbox = [rect for rect in ((gate[0], gate[1], gate[2], top), (gate[0], bottom, gate[2], gate[3]),
+                                       (gate[0], top, left, bottom), (right, top, gate[2], bottom))
+                     if rect[2] - rect[0] > 1e-6 and rect[3] - rect[1] > 1e-6]
+
+    geometry = {
+        'key': hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:16],
+        'planeSize': (horizontalFilmAperture * overscan, gateHeight * overscan),
+        'pixels': (int(round(width * overscan)), int(round(height * overscan))),
+        'gate': gate,
+        'action': _scaled(gate, actionSafe),
+        'title': _scaled(gate, titleSafe),
+        'extractions': frames,
+        'letterbox': letterbox,
+    }
+    _geometry[key] = geometry
+    return geometry
+
+
+def rasterize(geometry, letterboxOpacity=0.85, outsideOpacity=1.0):
+    from PySide2 import QtCore, QtGui
+
+    width, height = geometry['pixels']
+    image = QtGui.QImage(width, height, QtGui.QImage.Format_ARGB32_Premultiplied)
+    image.fill(QtCore.Qt.transparent)
+    painter = QtGui.QPainter(image)
+
+    def rect(r):
+        return QtCore.QRectF(r[0] * width, r[1] * height, (r[2] - r[0]) * width, (r[3] - r[1]) * height)
+
+    # outside of the gate, then the letterbox bars
+    outside = QtGui.QPainterPath()
+    outside.addRect(QtCore.QRectF(0, 0, width, height))
+    inside = QtGui.QPainterPath()
+    inside.addRect(rect(geometry['gate']))
+    painter.fillPath(outside.subtracted(inside), QtGui.QColor(0, 0, 0, int(255 * outsideOpacity)))
+    for bar in geometry['letterbox']:
+        painter.fillRect(rect(bar), QtGui.QColor(0, 0, 0, int(255 * letterboxOpacity)))
+
+    painter.setRenderHint(QtGui.QPainter.Antialiasing)
+    pen = QtGui.QPen(QtGui.QColor(255, 255, 255, 255))
+    pen.setWidthF(max(1.0, LINE_WIDTH * height))
+    for name in ('action', 'title'):
+        pen.setStyle(QtCore.Qt.DashLine if name == 'title' else QtCore.Qt.SolidLine)
+        painter.setPen(pen)
+        painter.drawRect(rect(geometry[name]))
+    pen.setStyle(QtCore.Qt.SolidLine)
+    painter.setPen(pen)
+    for aspect, frame in geometry['extractions']:
+        painter.drawRect(rect(frame))
+    painter.end()
+    return image
+
+
+# one file per geometry and opacity, shared by every camera using the same format
+def texture(geometry, letterboxOpacity=0.85, outsideOpacity=1.0, folder=None):
+    folder = folder or defaultTextureFolder()
+    name = 'mask_{}_{:02d}{:02d}.png'.format(geometry['key'], int(letterboxOpacity * 99), int(outsideOpacity * 99))
+    path = os.path.join(folder, name).replace('\\', '/')
+    if not os.path.isfile(path):
+        saveTexture(rasterize(geometry, letterboxOpacity, outsideOpacity), path)
+    return path
+
+
+class MaskLayers(object):
+    def __init__(self, cmdsModule=None, scene=None):
+        self.cmds = cmdsModule or cmds
+        self.scene = scene or (sceneCache if self.cmds is cmds else SceneCache(self.cmds))
+
+    def maskPlane(self, camera):
+        planes = self.scene.imagePlanes(camera, masks=True)
+        return self.cmds.listRelatives(planes[0], s=1)[0] if planes else ''
+
+    # returns True when the plane was written, False when it was already up to date
+    def update(self, camera, settings=None):
+        settings = dict(DEFAULT_MASKS, **(settings or {}))
+        shape = self.scene.shapes(camera)[0]
+        geometry = maskGeometry(self.cmds.getAttr('defaultResolution.width'),
+                                self.cmds.getAttr('defaultResolution.height'),
+                                self.cmds.getAttr(shape + '.horizontalFilmAperture'),
+                                self.cmds.getAttr(shape + '.overscan'),
+                                settings['extractions'], settings['actionSafe'], settings['titleSafe'])
+        key = '{}_{}_{}'.format(geometry['key'], settings['letterboxOpacity'], settings['outsideOpacity'])
+
+        plane = self.maskPlane(camera)
+        if plane and self.cmds.getAttr(plane + '.framingMaskKey') == key:
+            return False
+
+        path = texture(geometry, settings['letterboxOpacity'], settings['outsideOpacity'])
+        self.cmds.undoInfo(openChunk=True, chunkName='framingMask')
+        try:
+            if not plane:
+                transform = self.cmds.imagePlane(camera=camera, showInAllViews=False, fileName=path,
+                                                 name='{}_{}'.format(MASK_PREFIX, camera))[0]
+                plane = self.cmds.listRelatives(transform, s=1)[0]
+                self.cmds.addAttr(plane, ln='framingMaskKey', dt='string')
+                self.cmds.setAttr(plane + '.overrideEnabled', 1)
+                self.cmds.setAttr(plane + '.overrideDisplayType', 2)
+                self.cmds.setAttr(plane + '.displayOnlyIfCurrent', 1)
+                self.cmds.setAttr(plane + '.fit', FIT_TO_SIZE)
+                if not self.scene.callbackIds:
+                    # no DG callbacks (fake backend), tell the cache ourselves
+                    self.scene.nodeAdded(plane, 'imagePlane')
+            self.cmds.setAttr(plane + '.imageName', path, type='string')
+            self.cmds.setAttr(plane + '.sizeX', geometry['planeSize'][0])
+            self.cmds.setAttr(plane + '.sizeY', geometry['planeSize'][1])
+            self.cmds.setAttr(plane + '.depth', abs(self.cmds.getAttr(shape + '.nearClipPlane') * DEPTH_FACTOR))
+            self.cmds.setAttr(plane + '.framingMaskKey', key, type='string')
+        finally:
+            self.cmds.undoInfo(closeChunk=True)
+        return True
+
+    def remove(self, camera):
+        planes = self.scene.imagePlanes(camera, masks=True)
+        if planes:
+            shapes = self.cmds.listRelatives(planes, s=1) or []
+            self.cmds.delete(planes)
+            if not self.scene.callbackIds:
+                for shape in shapes:
+                    self.scene.nodeRemoved(shape, 'imagePlane')
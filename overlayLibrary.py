@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+# overlayLibrary.py
+# overlay pictures indexed by a tracked manifest (pictures/manifest.json) holding the
+# curated metadata; file sizes, mtimes and hashes live in a per-user cache
+# each picture gets a stable id stored on the image plane instead of its row
+
+import collections
+import hashlib
+import json
+import os
+import struct
+import sys
+
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 2
+CACHE_VERSION = 1
+
+# fields of the tracked manifest, written by hand or with save()
+CURATED = ('id', 'name', 'file', 'fit', 'tags', 'guide')
+
+# recommended image plane fit: 'stretch' fills the gate (fit "to size"),
+# 'keep' keeps the picture ratio and follows the Horizontal / Vertical button
+# overlays with a 'guide' are rendered for the gate instead, see guideGenerator.py
+DEFAULT_FIT = 'stretch'
+
+
+def defaultFolder():
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pictures')
+
+
+# per-user folder for generated files, kept between sessions (the temp folder is shared and cleaned)
+def userCacheFolder(name):
+    if sys.platform == 'win32':
+        root = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+    else:
+        root = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(root, 'framingHelper', name)
+
+
+def _readJson(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def fileHash(path):
+    sha = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+# width / height from the PNG header, without decoding the picture
+def pngSize(path):
+    with open(path, 'rb') as f:
+        header = f.read(24)
+    if len(header) < 24 or header[12:16] != b'IHDR':
+        return 0, 0
+    return struct.unpack('>II', header[16:24])
+
+
+class OverlayLibrary(object):
+    def __init__(self, folder=None, cacheFolder=None):
+        self.folder = folder or defaultFolder()
+        self.manifestPath = os.path.join(self.folder, MANIFEST_NAME)
+        # one cache per pictures folder, several installs may share a user
+        key = hashlib.sha1(os.path.abspath(self.folder).encode('utf-8')).hexdigest()[:12]
+        self.cachePath = os.path.join(cacheFolder or userCacheFolder('overlays'), key + '.json')
+        self.entries = collections.OrderedDict()
+        # file name -> {'mtime', 'size', 'hash', 'width', 'height'}
+        self.files = {}
+        self.manifestFiles = set()
+        self._index()
+        self.load()
+        self.refresh()
+
+    # the tracked manifest is only read here, see save()
+    def load(self):
+        data = _readJson(self.manifestPath)
+        if data and data.get('version', 0) <= MANIFEST_VERSION:
+            for entry in data.get('overlays', []):
+                self.entries[entry['id']] = dict((k, entry[k]) for k in CURATED if k in entry)
+            self.manifestFiles = set(e['file'] for e in self.entries.values())
+        cache = _readJson(self.cachePath)
+        if cache and cache.get('version') == CACHE_VERSION:
+            self.files = cache.get('files', {})
+        self._index()
+
+    # curated metadata only, for whoever maintains the library (not called by the tool)
+    def save(self):
+        data = {
+            'version': MANIFEST_VERSION,
+            'overlays': [dict((k, e[k]) for k in CURATED if k in e) for e in self.entries.values()],
+        }
+        with open(self.manifestPath, 'w') as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+
+    def saveCache(self):
+        folder = os.path.dirname(self.cachePath)
+        partial = self.cachePath + '.{}.tmp'.format(os.getpid())
+        try:
+            if not os.path.isdir(folder):
+                os.makedirs(folder)
+            with open(partial, 'w') as f:
+                json.dump({'version': CACHE_VERSION, 'files': self.files}, f, indent=2, sort_keys=True)
+            # atomic, another session may be reading it (os.replace overwrites on Windows too)
+            getattr(os, 'replace', os.rename)(partial, self.cachePath)
+        except (IOError, OSError):
+            # no writable home, the files are hashed again next session
+            pass
+
+    # lookup tables, rebuilt only when the entries change
+    def _index(self):
+        self.entries = collections.OrderedDict(sorted(self.entries.items(), key=lambda e: e[1]['name'].lower()))
+        self.rows = dict((overlayId, row) for row, overlayId in enumerate(self.entries))
+        self.byName = dict((e['name'], overlayId) for overlayId, e in self.entries.items())
+        self.byFile = dict((e['file'].lower(), overlayId) for overlayId, e in self.entries.items())
+
+    def _describe(self, fileName, stat):
+        path = os.path.join(self.folder, fileName)
+        width, height = pngSize(path)
+        return {'mtime': stat.st_mtime, 'size': stat.st_size, 'hash': fileHash(path), 'width': width, 'height': height}
+
+    # every picture is checked (a file overwritten in place doesn't touch the folder mtime),
+    # only the ones whose size or mtime changed are hashed again
+    def refresh(self, force=False):
+        try:
+            fileNames = sorted(f for f in os.listdir(self.folder) if f.lower().endswith('.png'))
+        except OSError:
+            return False
+
+        files = {}
+        cacheChanged = False
+        for fileName in fileNames:
+            stat = os.stat(os.path.join(self.folder, fileName))
+            info = self.files.get(fileName)
+            if force or not info or info['mtime'] != stat.st_mtime or info['size'] != stat.st_size:
+                info = self._describe(fileName, stat)
+                cacheChanged = True
+            files[fileName] = info
+
+        # entries whose file is gone, by the hash it had: a renamed file keeps its id and metadata
+        missing = dict((self.files[e['file']]['hash'], overlayId) for overlayId, e in self.entries.items()
+                       if e['file'] not in files and e['file'] in self.files)
+        changed = False
+        seen = set()
+        for fileName, info in files.items():
+            overlayId = self.byFile.get(fileName.lower())
+            if overlayId is None and info['hash'] in missing:
+                overlayId = missing.pop(info['hash'])
+                self.entries[overlayId].update(file=fileName, name=os.path.splitext(fileName)[0])
+                changed = True
+            if overlayId is None:
+                name = os.path.splitext(fileName)[0]
+                overlayId = self._newId(name)
+                self.entries[overlayId] = {'id': overlayId, 'name': name, 'file': fileName, 'fit': DEFAULT_FIT,
+                                           'tags': []}
+            entry = self.entries[overlayId]
+            values = {
+                'hash': info['hash'], 'width': info['width'], 'height': info['height'],
+                'aspectRatio': round(float(info['width']) / info['height'], 4) if info['height'] else 0.0,
+            }
+            if any(entry.get(k) != v for k, v in values.items()):
+                entry.update(values)
+                changed = True
+            seen.add(overlayId)
+
+        for overlayId in list(self.entries):
+            if overlayId not in seen:
+                del self.entries[overlayId]
+                changed = True
+
+        # files of the tracked manifest stay known until it follows a rename
+        for fileName in self.manifestFiles:
+            if fileName not in files and fileName in self.files:
+                files[fileName] = self.files[fileName]
+        cacheChanged = cacheChanged or set(files) != set(self.files)
+        self.files = files
+        if cacheChanged:
+            self.saveCache()
+        if changed:
+            self._index()
+        return changed
+
+    def _newId(self, name):
+        overlayId = name.lower()
+        index = 1
+        while overlayId in self.entries:
+            index += 1
+            overlayId = '{}_{}'.format(name.lower(), index)
+        return overlayId
+
+    def names(self):
+        return [e['name'] for e in self.entries.values()]
+
+    def get(self, overlayId):
+        return self.entries.get(overlayId)
+
+    def idFromName(self, name):
+        return self.byName.get(name, '')
+
+    # id of the overlay an image plane points to, from its imageName
+    def idFromPath(self, path):
+        return self.byFile.get(os.path.basename(path).lower(), '')
+
+    def row(self, overlayId):
+        return self.rows.get(overlayId, -1)
+
+    def path(self, overlayId):
+        entry = self.entries.get(overlayId)
+        if entry is None:
+            return ''
+        return os.path.join(self.folder, entry['file']).replace('\\', '/')
+
+    def fit(self, overlayId):
+        entry = self.entries.get(overlayId)
+        return entry.get('fit', DEFAULT_FIT) if entry else DEFAULT_FIT
+
+    # procedural equivalent of the picture (see guideGenerator.py), '' when there's none
+    def guide(self, overlayId):
+        entry = self.entries.get(overlayId)
+        return entry.get('guide', '') if entry else ''
+
+
+# shared instance used by the tool
+overlayLibrary = OverlayLibrary()
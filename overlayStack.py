@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+# overlayStack.py
+# several guides on one image plane: each layer (overlay, color, alpha, rotation) is
+# tinted and drawn into a single texture at the render resolution, composited on a
+# QThreadPool worker and cached on disk per stack key, so the viewport draws one plane
+# whatever the number of layers and a change only re-composites when the key is new
+
+import hashlib
+import json
+import os
+
+from PySide2 import QtCore, QtGui
+
+from guideGenerator import defaultTextureFolder, overlayPath, saveTexture
+from overlayLibrary import overlayLibrary
+from proxyTextures import tinted
+
+DEFAULT_LAYER = {
+    'overlay': 'rule_of_thirds',
+    'color': (1.0, 1.0, 1.0),
+    'alpha': 1.0,
+    # degrees, around the center of the gate
+    'rotate': 0.0,
+}
+
+
+def layer(overlay, color=(1.0, 1.0, 1.0), alpha=1.0, rotate=0.0):
+    return {'overlay': overlay, 'color': tuple(color), 'alpha': float(alpha), 'rotate': float(rotate)}
+
+
+def normalized(layers):
+    return [dict(DEFAULT_LAYER, **l) for l in layers]
+
+
+# stored on the image plane (framingStack attribute) and read back by loads()
+def dumps(layers):
+    return json.dumps(normalized(layers), sort_keys=True)
+
+
+def loads(text):
+    try:
+        return normalized(json.loads(text or '[]'))
+    except (TypeError, ValueError):
+        return []
+
+
+# changes with any layer setting, the order of the layers, the size or a modified picture
+def stackKey(layers, width, height):
+    parts = [int(width), int(height)]
+    for l in normalized(layers):
+        entry = overlayLibrary.get(l['overlay']) or {}
+        parts.append((l['overlay'], entry.get('hash', ''), [round(c, 3) for c in l['color']],
+                      round(l['alpha'], 3), round(l['rotate'], 2)))
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()[:16]
+
+
+def textureName(layers, width, height):
+    return 'stack_{}_{}x{}.png'.format(stackKey(layers, width, height), int(width), int(height))
+
+
+# bottom layer first; QImage and QPainter on a QImage are safe off the GUI thread
+def composite(layers, width, height):
+    width, height = int(width), int(height)
+    image = QtGui.QImage(width, height, QtGui.QImage.Format_ARGB32_Premultiplied)
+    image.fill(QtCore.Qt.transparent)
+    painter = QtGui.QPainter(image)
+    painter.setRenderHint(QtGui.QPainter.SmoothPixmapTransform)
+    for l in normalized(layers):
+        source = QtGui.QImage(overlayPath(l['overlay'], width, height))
+        if source.isNull():
+            continue
+        target = QtCore.QRectF(0, 0, width, height)
+        if overlayLibrary.fit(l['overlay']) == 'keep' and not overlayLibrary.guide(l['overlay']):
+            # pictures with their own ratio, fitted inside the gate
+            scaled = QtCore.QSizeF(source.size()).scaled(target.size(), QtCore.Qt.KeepAspectRatio)
+            target = QtCore.QRectF((width - scaled.width()) / 2.0, (height - scaled.height()) / 2.0,
+                                   scaled.width(), scaled.height())
+        painter.save()
+        painter.setOpacity(min(max(l['alpha'], 0.0), 1.0))
+        painter.translate(width / 2.0, height / 2.0)
+        painter.rotate(l['rotate'])
+        painter.translate(-width / 2.0, -height / 2.0)
+        painter.drawImage(target, tinted(source, l['color']))
+        painter.restore()
+    painter.end()
+    return image
+
+
+def texture(layers, width, height, folder=None):
+    folder = folder or defaultTextureFolder()
+    path = os.path.join(folder, textureName(layers, width, height)).replace('\\', '/')
+    if not os.path.isfile(path):
+        saveTexture(composite(layers, width, height), path)
+    return path
+
+
+class CompositeSignals(QtCore.QObject):
+    composited = QtCore.Signal(str, str)
+
+
+# one stack per worker, the file is written before the signal
+class CompositeWorker(QtCore.QRunnable):
+    def __init__(self, key, layers, width, height, signals):
+        super(CompositeWorker, self).__init__()
+        self.key = key
+        self.layers = layers
+        self.width = width
+        self.height = height
+        self.signals = signals
+
+    def run(self):
+        try:
+            path = texture(self.layers, self.width, self.height)
+        except (IOError, OSError):
+            path = ''
+        self.signals.composited.emit(self.key, path)
+
+
+class OverlayStack(QtCore.QObject):
+    def __init__(self, parent=None):
+        super(OverlayStack, self).__init__(parent)
+        self.waiting = {}
+        self.pool = QtCore.QThreadPool.globalInstance()
+        self.signals = CompositeSignals()
+        self.signals.composited.connect(self._composited)
+
+    # callback(path) right away when the stack was already composited, else once the worker is done
+    def request(self, layers, width, height, callback=None):
+        layers = normalized(layers)
+        # a picture edited in place since the last request gets a new hash, so a new key
+        overlayLibrary.refresh()
+        key = textureName(layers, width, height)
+        path = os.path.join(defaultTextureFolder(), key).replace('\\', '/')
+        if os.path.isfile(path):
+            if callback:
+                callback(path)
+            return path
+        if key not in self.waiting:
+            self.waiting[key] = []
+            self.pool.start(CompositeWorker(key, layers, width, height, self.signals))
+        if callback:
+            self.waiting[key].append(callback)
+        return None
+
+    def _composited(self, key, path):
+        for callback in self.waiting.pop(key, []):
+            if path:
+                callback(path)
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+# panelTracker.py
+# model panel -> camera map for MayaFramingAssistant
+# scanned once, then kept up to date by the panel focus scriptJob and the
+# per-panel camera changed callbacks, so the tool always drives the viewport
+# the user last worked in
+
+import collections
+
+try:
+    import maya.cmds as cmds
+except ImportError:
+    # running outside of Maya (fake backend, benchmarks)
+    cmds = None
+try:
+    import maya.api.OpenMaya as om
+    import maya.api.OpenMayaUI as omui
+except ImportError:
+    # fake maya.cmds without the API: no callbacks, the panels are scanned instead
+    om = None
+    omui = None
+
+
+# camera transform from a modelEditor -camera query (transform or shape path)
+def cameraFromPath(cmdsModule, path):
+    if not path:
+        return ''
+    parts = path.split('|')
+    if len(parts) > 1 and parts[-2] and cmdsModule.objectType(path) == 'camera':
+        return parts[-2]
+    return parts[-1]
+
+
+class PanelTracker(object):
+    def __init__(self, backend=None):
+        self.cmds = backend or cmds
+        self.listeners = []
+        self.jobIds = []
+        self.callbackIds = []
+        self.panelCallbacks = {}
+        self.invalidate()
+
+    def invalidate(self, *args):
+        self._cameras = None
+        self.focused = ''
+
+    # one scan of the model panels, the only getPanel / modelEditor pass
+    def _fill(self):
+        self._cameras = collections.OrderedDict()
+        for panel in self.cmds.getPanel(type='modelPanel') or []:
+            self._cameras[panel] = cameraFromPath(self.cmds, self.cmds.modelEditor(panel, q=True, av=True, cam=True))
+        self._watchPanels()
+
+    def panels(self):
+        if self._cameras is None:
+            self._fill()
+        return list(self._cameras)
+
+    def camera(self, panel):
+        if self._cameras is None:
+            self._fill()
+        return self._cameras.get(panel, '')
+
+    def panelsOf(self, camera):
+        if self._cameras is None:
+            self._fill()
+        return [panel for panel, current in self._cameras.items() if current == camera]
+
+    # the viewport to drive: last focused model panel, else the one looking
+    # through persp (workaround for the Maya 2022 focus bug), else the first one
+    def targetPanel(self):
+        panels = self.panels()
+        if self.focused in self._cameras:
+            return self.focused
+        for panel in panels:
+            if self._cameras[panel] == 'persp':
+                return panel
+        return panels[0] if panels else ''
+
+    def lookThrough(self, panel, camera):
+        if not panel or not camera or self.camera(panel) == camera:
+            return
+        # map first, the camera changed callback then sees no change
+        self._cameras[panel] = camera
+        self.cmds.lookThru(panel, camera)
+
+    # listener(panel, camera), called when the focused panel or its camera changes
+    def addListener(self, listener):
+        if listener not in self.listeners:
+            self.listeners.append(listener)
+
+    def removeListener(self, listener):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def _notify(self, panel):
+        for listener in list(self.listeners):
+            listener(panel, self._cameras.get(panel, ''))
+
+    # incremental updates, called from the scriptJob and the UI callbacks
+    def panelFocused(self, panel):
+        if self._cameras is None:
+            self._fill()
+        if panel not in self._cameras:
+            if self.cmds.getPanel(typeOf=panel) != 'modelPanel':
+                return
+            # panel created after the scan (tear off, new layout)
+            self._cameras[panel] = cameraFromPath(self.cmds, self.cmds.modelEditor(panel, q=True, av=True, cam=True))
+            self._watchPanels()
+        if panel == self.focused:
+            return
+        self.focused = panel
+        self._notify(panel)
+
+    def cameraChanged(self, panel, camera):
+        if self._cameras is None or self._cameras.get(panel) == camera:
+            return
+        self._cameras[panel] = camera
+        if panel == self.targetPanel():
+            self._notify(panel)
+
+    # register the scriptJob and the callbacks, safe to call more than once
+    def install(self):
+        if self.jobIds or om is None:
+            return
+        self.jobIds.append(self.cmds.scriptJob(event=['ModelPanelSetFocus', self._onPanelFocus]))
+        for message in (om.MSceneMessage.kAfterNew, om.MSceneMessage.kAfterOpen):
+            # panels may be rebuilt from the scene's layout
+            self.callbackIds.append(om.MSceneMessage.addCallback(message, self._onSceneChanged))
+        if self._cameras is not None:
+            self._watchPanels()
+
+    def uninstall(self):
+        for jobId in self.jobIds:
+            if self.cmds.scriptJob(exists=jobId):
+                self.cmds.scriptJob(kill=jobId, force=True)
+        self.jobIds = []
+        callbackIds = self.callbackIds + list(self.panelCallbacks.values())
+        if callbackIds:
+            om.MMessage.removeCallbacks(callbackIds)
+        self.callbackIds = []
+        self.panelCallbacks = {}
+
+    # one camera changed callback per known panel
+    def _watchPanels(self):
+        if not self.jobIds or omui is None:
+            return
+        for panel in self._cameras:
+            if panel not in self.panelCallbacks:
+                self.panelCallbacks[panel] = omui.MUiMessage.addCameraChangedCallback(panel, self._onCameraChanged)
+
+    def _onPanelFocus(self):
+        self.panelFocused(self.cmds.getPanel(withFocus=True))
+
+    def _onCameraChanged(self, panel, cameraNode, *args):
+        path = om.MDagPath.getAPathTo(cameraNode)
+        if path.apiType() != om.MFn.kTransform:
+            path.pop()
+        self.cameraChanged(panel, path.partialPathName())
+
+    def _onSceneChanged(self, *args):
+        if self.panelCallbacks:
+            om.MMessage.removeCallbacks(list(self.panelCallbacks.values()))
+        self.panelCallbacks = {}
+        self.invalidate()
+
+
+# shared instance used by the tool
+panelTracker = PanelTracker()
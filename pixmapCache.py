@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+# pixmapCache.py
+# LRU cache of overlay previews, decoded and scaled on a QThreadPool worker
+
+import collections
+import os
+
+from PySide2 import QtCore, QtGui
+
+
+# decode once, halve down the pyramid, finish with one smooth scale per size
+def decodeLevels(path, sizes):
+    image = QtGui.QImage(path)
+    levels = {}
+    if image.isNull():
+        return levels
+    for width, height in sorted(sizes, reverse=True):
+        while image.width() >= 2 * width and image.height() >= 2 * height:
+            image = image.scaled(image.width() // 2, image.height() // 2,
+                                 QtCore.Qt.IgnoreAspectRatio, QtCore.Qt.SmoothTransformation)
+        levels[(width, height)] = image.scaled(width, height, QtCore.Qt.IgnoreAspectRatio,
+                                               QtCore.Qt.SmoothTransformation)
+    return levels
+
+
+class DecodeSignals(QtCore.QObject):
+    decoded = QtCore.Signal(object, object)
+
+
+# QImage is safe to build off the GUI thread, QPixmap isn't
+class DecodeWorker(QtCore.QRunnable):
+    def __init__(self, path, mtime, sizes, signals):
+        super(DecodeWorker, self).__init__()
+        self.path = path
+        self.mtime = mtime
+        self.sizes = sizes
+        self.signals = signals
+
+    def run(self):
+        levels = decodeLevels(self.path, self.sizes)
+        self.signals.decoded.emit((self.path, self.mtime), levels)
+
+
+class PixmapCache(QtCore.QObject):
+    def __init__(self, budget=32 * 1024 * 1024, sizes=((116, 71),), parent=None):
+        super(PixmapCache, self).__init__(parent)
+        self.budget = budget
+        self.sizes = tuple(sizes)
+        self.used = 0
+        self.entries = collections.OrderedDict()
+        self.waiting = {}
+        self.pool = QtCore.QThreadPool.globalInstance()
+        self.signals = DecodeSignals()
+        self.signals.decoded.connect(self._decoded)
+
+    @staticmethod
+    def cost(pixmap):
+        return pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
+
+    def _fileKey(self, path):
+        try:
+            return path, os.path.getmtime(path)
+        except OSError:
+            return path, 0
+
+    # cached pixmap or None, refreshes its LRU position
+    def get(self, path, size=None):
+        size = tuple(size or self.sizes[0])
+        key = self._fileKey(path) + size
+        pixmap = self.entries.pop(key, None)
+        if pixmap is not None:
+            self.entries[key] = pixmap
+        return pixmap
+
+    def _store(self, key, pixmap):
+        if key in self.entries:
+            self.used -= self.cost(self.entries.pop(key))
+        self.entries[key] = pixmap
+        self.used += self.cost(pixmap)
+        while self.used > self.budget and len(self.entries) > 1:
+            _, oldest = self.entries.popitem(last=False)
+            self.used -= self.cost(oldest)
+
+    # callback(pixmap) right away when cached, else once the worker is done
+    def request(self, path, callback=None, size=None):
+        size = tuple(size or self.sizes[0])
+        pixmap = self.get(path, size)
+        if pixmap is not None:
+            if callback:
+                callback(pixmap)
+            return pixmap
+
+        fileKey = self._fileKey(path)
+        if fileKey not in self.waiting:
+            self.waiting[fileKey] = []
+            sizes = set(self.sizes)
+            sizes.add(size)
+            self.pool.start(DecodeWorker(path, fileKey[1], sorted(sizes), self.signals))
+        if callback:
+            self.waiting[fileKey].append((size, callback))
+        return None
+
+    def prefetch(self, paths):
+        for path in paths:
+            self.request(path)
+
+    def _decoded(self, fileKey, levels):
+        for size, image in levels.items():
+            self._store(fileKey + size, QtGui.QPixmap.fromImage(image))
+        for size, callback in self.waiting.pop(fileKey, []):
+            pixmap = self.get(fileKey[0], size)
+            if pixmap is not None:
+                callback(pixmap)
+            elif levels:
+                # size asked while another decode was running, decode again
+                self.request(fileKey[0], callback, size)
+
+    def clear(self):
+        self.entries.clear()
+        self.used = 0
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# proxyTextures.py
+# light stand-ins for the overlay textures the image plane draws every frame:
+# resampled to a power of two close to the render resolution (mipmaps without a
+# resize on upload), tinted with the guide color (colorGain stays at 1) and filtered
+# in premultiplied alpha so the thin lines don't get dark fringes
+# cached on disk by source content, size and color
+
+import hashlib
+import math
+import os
+
+from guideGenerator import defaultTextureFolder, saveTexture
+from overlayLibrary import fileHash
+
+MIN_SIZE = 64
+MAX_SIZE = 4096
+
+_hashes = {}
+
+
+# nearest power of two per side: 1920x1080 -> 2048x1024, 2048x858 -> 2048x1024
+def proxySize(width, height):
+    def side(value):
+        return int(min(max(2 ** int(round(math.log(max(value, 1), 2))), MIN_SIZE), MAX_SIZE))
+    return side(width), side(height)
+
+
+# content hash, computed again only when the file changes
+def sourceHash(path):
+    stat = os.stat(path)
+    key = (path, stat.st_mtime, stat.st_size)
+    if key not in _hashes:
+        _hashes[key] = fileHash(path)
+    return _hashes[key]
+
+
+def proxyName(sourcePath, width, height, color):
+    size = proxySize(width, height)
+    parts = (sourceHash(sourcePath), size, tuple(round(c, 3) for c in color))
+    return 'proxy_{}_{}x{}.png'.format(hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()[:16], size[0], size[1])
+
+
+# multiplied like colorGain would, alpha kept from the picture
+def tinted(image, color):
+    from PySide2 import QtGui
+
+    result = image.convertToFormat(QtGui.QImage.Format_ARGB32_Premultiplied)
+    if tuple(color) == (1.0, 1.0, 1.0):
+        return result
+    painter = QtGui.QPainter(result)
+    painter.setCompositionMode(QtGui.QPainter.CompositionMode_Multiply)
+    painter.fillRect(result.rect(), QtGui.QColor.fromRgbF(*[min(max(c, 0.0), 1.0) for c in color]))
+    painter.setCompositionMode(QtGui.QPainter.CompositionMode_DestinationIn)
+    painter.drawImage(0, 0, image)
+    painter.end()
+    return result
+
+
+def render(sourcePath, width, height, color):
+    from PySide2 import QtCore, QtGui
+
+    image = QtGui.QImage(sourcePath)
+    if image.isNull():
+        raise IOError('Cannot read {}'.format(sourcePath))
+    # premultiplied before filtering, transparent pixels don't bleed their color
+    image = image.convertToFormat(QtGui.QImage.Format_ARGB32_Premultiplied)
+    image = image.scaled(width, height, QtCore.Qt.IgnoreAspectRatio, QtCore.Qt.SmoothTransformation)
+    return tinted(image, color)
+
+
+# path of the proxy for a texture shown at width x height with a color
+def proxy(sourcePath, width, height, color=(1.0, 1.0, 1.0), folder=None):
+    folder = folder or defaultTextureFolder()
+    path = os.path.join(folder, proxyName(sourcePath, width, height, color)).replace('\\', '/')
+    if not os.path.isfile(path):
+        size = proxySize(width, height)
+        saveTexture(render(sourcePath, size[0], size[1], color), path)
+    return path
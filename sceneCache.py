@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+# sceneCache.py
+# camera / image plane cache for MayaFramingAssistant
+# filled once from the scene, then kept up to date by DG callbacks
+
+try:
+    import maya.cmds as cmds
+    import maya.api.OpenMaya as om
+except ImportError:
+    # running outside of Maya (fake backend, benchmarks)
+    cmds = None
+    om = None
+
+
+# image planes named like this are mask layers, not guides
+MASK_PREFIX = 'framingMask'
+
+
+class SceneCache(object):
+    def __init__(self, backend=None):
+        self.cmds = backend or cmds
+        self.callbackIds = []
+        self.invalidate()
+
+    # drop everything, the next query does a full rescan
+    def invalidate(self, *args):
+        self._cameras = None
+        self._shapes = {}
+        self._imagePlanes = {}
+        self._planeOwner = {}
+
+    # scan user cameras: one ls for the shapes, one ls for the transforms
+    def _fill(self):
+        longShapes = self.cmds.ls(type='camera', long=True) or []
+        longShapes = [c for c in longShapes if not self.cmds.camera(c, q=True, sc=True)]
+        self._cameras = []
+        self._shapes = {}
+        if not longShapes:
+            return
+
+        longParents = [c.rsplit('|', 1)[0] for c in longShapes]
+        shortParents = self.cmds.ls(longParents) or []
+        shortShapes = self.cmds.ls(longShapes) or []
+        if len(shortParents) != len(longParents) or len(shortShapes) != len(longShapes):
+            # instanced or duplicated paths, resolve them one by one
+            shortParents = [self.cmds.ls(c)[0] for c in longParents]
+            shortShapes = [self.cmds.ls(c)[0] for c in longShapes]
+
+        for camera, shape in zip(shortParents, shortShapes):
+            if camera not in self._shapes:
+                self._cameras.append(camera)
+                self._shapes[camera] = []
+            self._shapes[camera].append(shape)
+
+    def cameras(self):
+        if self._cameras is None:
+            self._fill()
+        return list(self._cameras)
+
+    def shapes(self, camera):
+        if self._cameras is None:
+            self._fill()
+        if camera not in self._shapes:
+            # not a user camera (persp, ...), ask the scene but don't keep it
+            return self.cmds.listRelatives(camera) or []
+        return list(self._shapes[camera])
+
+    # camera transform name for a transform, a shape or a listRelatives result
+    def cameraOf(self, name):
+        if isinstance(name, (list, tuple)):
+            name = name[0] if name else ''
+        if self._cameras is None:
+            self._fill()
+        if name in self._shapes:
+            return name
+        for camera, shapes in self._shapes.items():
+            if name in shapes:
+                return camera
+        return ''
+
+    # image plane transforms attached to a camera, queried once per camera
+    # guide planes by default, the safe area / letterbox planes (maskLayers.py) with masks=True
+    def imagePlanes(self, camName, masks=False):
+        camera = self.cameraOf(camName)
+        if not camera:
+            return []
+        if camera not in self._imagePlanes:
+            planeShapes = self.cmds.listRelatives(self._shapes[camera], type='imagePlane', ad=True, c=True) or []
+            planes = []
+            if planeShapes:
+                planes = self.cmds.listRelatives(planeShapes, parent=True) or []
+            for planeShape in planeShapes:
+                self._planeOwner[planeShape] = camera
+            for plane in planes:
+                self._planeOwner[plane] = camera
+            self._imagePlanes[camera] = planes
+        return [p for p in self._imagePlanes[camera] if p.startswith(MASK_PREFIX) == masks]
+
+    # incremental updates, called from the DG callbacks
+    def nodeAdded(self, name, nodeType):
+        if nodeType == 'camera':
+            # the shape isn't parented yet when the callback fires, rescan lazily
+            self._cameras = None
+        elif nodeType == 'imagePlane':
+            # not connected to its camera yet either
+            self._imagePlanes = {}
+            self._planeOwner = {}
+
+    def nodeRemoved(self, name, nodeType):
+        if nodeType == 'camera':
+            camera = self.cameraOf(name)
+            if camera:
+                self._shapes[camera] = [s for s in self._shapes[camera] if s != name]
+                if not self._shapes[camera]:
+                    del self._shapes[camera]
+                    self._cameras.remove(camera)
+                    self._imagePlanes.pop(camera, None)
+        elif nodeType == 'imagePlane':
+            owner = self._planeOwner.pop(name, None)
+            if owner:
+                self._imagePlanes.pop(owner, None)
+
+    def nodeRenamed(self, oldName, newName):
+        if not oldName or oldName == newName or self._cameras is None:
+            return
+        if oldName in self._shapes:
+            self._cameras[self._cameras.index(oldName)] = newName
+            self._shapes[newName] = self._shapes.pop(oldName)
+            if oldName in self._imagePlanes:
+                self._imagePlanes[newName] = self._imagePlanes.pop(oldName)
+            for plane, owner in self._planeOwner.items():
+                if owner == oldName:
+                    self._planeOwner[plane] = newName
+            return
+        for camera, shapes in self._shapes.items():
+            if oldName in shapes:
+                shapes[shapes.index(oldName)] = newName
+                return
+        owner = self._planeOwner.pop(oldName, None)
+        if owner:
+            self._planeOwner[newName] = owner
+            self._imagePlanes.pop(owner, None)
+
+    # register the DG callbacks, safe to call more than once
+    def install(self):
+        if self.callbackIds or om is None:
+            return
+        for nodeType in ('camera', 'imagePlane'):
+            self.callbackIds.append(om.MDGMessage.addNodeAddedCallback(self._onNodeAdded, nodeType))
+            self.callbackIds.append(om.MDGMessage.addNodeRemovedCallback(self._onNodeRemoved, nodeType))
+        self.callbackIds.append(om.MNodeMessage.addNameChangedCallback(om.MObject.kNullObj, self._onNameChanged))
+        for message in (om.MSceneMessage.kAfterNew, om.MSceneMessage.kAfterOpen):
+            self.callbackIds.append(om.MSceneMessage.addCallback(message, self.invalidate))
+
+    def uninstall(self):
+        if self.callbackIds:
+            om.MMessage.removeCallbacks(self.callbackIds)
+        self.callbackIds = []
+
+    def _onNodeAdded(self, node, *args):
+        self.nodeAdded(om.MFnDependencyNode(node).name(), om.MFnDependencyNode(node).typeName)
+
+    def _onNodeRemoved(self, node, *args):
+        self.nodeRemoved(om.MFnDependencyNode(node).name(), om.MFnDependencyNode(node).typeName)
+
+    def _onNameChanged(self, node, prevName, *args):
+        self.nodeRenamed(prevName, om.MFnDependencyNode(node).name())
+
+
+# shared instance used by the tool
+sceneCache = SceneCache()
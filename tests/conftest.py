@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+# the tool's modules live at the repository root, next to MayaFramingAssistant.py
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
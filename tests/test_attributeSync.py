@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+# test_attributeSync.py
+# attribute changed callbacks fed with stand-in MPlugs, no Maya needed
+
+import types
+
+import attributeSync
+from attributeHandles import AttributeHandle, CmdsBackend
+from fakeCmds import FakeCmds
+
+MESSAGES = types.SimpleNamespace(kConnectionMade=1, kConnectionBroken=2, kAttributeSet=4)
+
+
+class FakePlug(object):
+    def __init__(self, name, parent=None):
+        self.name = name
+        self._parent = parent
+        self.isChild = parent is not None
+
+    def partialName(self, includeNodeName=False, useLongNames=False):
+        return self.name
+
+    def parent(self):
+        return self._parent
+
+
+def makeSync(monkeypatch, *plugs):
+    monkeypatch.setattr(attributeSync, 'om', types.SimpleNamespace(MNodeMessage=MESSAGES))
+    sync = attributeSync.AttributeSync()
+    backend = CmdsBackend(FakeCmds())
+    for node, attribute, attrType in plugs:
+        sync.bind(AttributeHandle(node, attribute, attrType, backend), lambda value: None)
+    return sync
+
+
+def test_bound_child_plug(monkeypatch):
+    sync = makeSync(monkeypatch, ('camera1', 'rotateAxisZ', 'angle'))
+    plug = FakePlug('camera1.rotateAxisZ', FakePlug('camera1.rotateAxis'))
+    sync._onAttributeChanged(MESSAGES.kAttributeSet, plug, None)
+    assert list(sync.dirty) == ['camera1.rotateAxisZ']
+
+
+def test_child_of_bound_compound(monkeypatch):
+    sync = makeSync(monkeypatch, ('imagePlaneShape1', 'colorGain', 'double3'))
+    plug = FakePlug('imagePlaneShape1.colorGainR', FakePlug('imagePlaneShape1.colorGain'))
+    sync._onAttributeChanged(MESSAGES.kAttributeSet, plug, None)
+    assert list(sync.dirty) == ['imagePlaneShape1.colorGain']
+
+
+def test_unbound_plug(monkeypatch):
+    sync = makeSync(monkeypatch, ('camera1', 'rotateAxisZ', 'angle'))
+    plug = FakePlug('camera1.rotateAxisX', FakePlug('camera1.rotateAxis'))
+    sync._onAttributeChanged(MESSAGES.kAttributeSet, plug, None)
+    assert not sync.dirty
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+# test_instrumentation.py
+# commands counted under the handler that caused them, on the fake backend
+
+import attributeHandles
+import instrumentation
+import panelTracker
+from attributeHandles import CameraHandles, CmdsBackend
+from fakeCmds import FakeCmds
+from updateScheduler import UpdateScheduler
+
+
+def test_panel_tracker_commands(monkeypatch):
+    fake = FakeCmds()
+    monkeypatch.setattr(panelTracker.panelTracker, 'cmds', fake)
+    panelTracker.panelTracker.invalidate()
+    recorder = instrumentation.enable()
+    try:
+        changeCamera = recorder.wrapHandler('changeCamera', panelTracker.panelTracker.panels)
+        changeCamera()
+    finally:
+        instrumentation.disable()
+        panelTracker.panelTracker.invalidate()
+    assert panelTracker.panelTracker.cmds is fake
+    assert recorder.handlers['changeCamera'].commands['cmds.getPanel'] == 1
+
+
+def test_flushed_writes_go_to_their_handler(monkeypatch):
+    fake = FakeCmds()
+    camera, shape = fake.camera()
+    monkeypatch.setattr(attributeHandles, '_defaultBackend', [CmdsBackend(fake)])
+    scheduler = UpdateScheduler(autoFlush=False)
+    recorder = instrumentation.enable()
+    try:
+        handles = CameraHandles(camera, shape)
+        recorder.wrapHandler('overScanValue', lambda: scheduler.schedule(handles.overscan, 1.1))()
+        recorder.wrapHandler('rollTool', lambda: scheduler.schedule(handles.rotateAxisZ, 5.0))()
+        scheduler.flush()
+    finally:
+        instrumentation.disable()
+    assert recorder.handlers['overScanValue'].commands['cmds.setAttr'] == 1
+    assert recorder.handlers['rollTool'].commands['cmds.setAttr'] == 1
+    assert 'cmds.setAttr' not in recorder.handlers[instrumentation.NO_HANDLER].commands
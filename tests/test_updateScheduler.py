@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+# test_updateScheduler.py
+# undo chunks of gestures and flushes when "Keep Framing Out of Maya Undo" is toggled
+
+from attributeHandles import CameraHandles, CmdsBackend
+from fakeCmds import FakeCmds
+from updateScheduler import UpdateScheduler
+
+
+class UndoLog(FakeCmds):
+    def __init__(self):
+        super(UndoLog, self).__init__()
+        self.undoCalls = []
+
+    def undoInfo(self, *args, **kwargs):
+        self.undoCalls.append(kwargs)
+        return super(UndoLog, self).undoInfo(*args, **kwargs)
+
+
+def setup():
+    fake = UndoLog()
+    camera, shape = fake.camera()
+    backend = CmdsBackend(fake)
+    return fake, backend, CameraHandles(camera, shape, backend), UpdateScheduler(autoFlush=False)
+
+
+def test_chunk_closed_when_toggled_during_gesture():
+    fake, backend, handles, scheduler = setup()
+    scheduler.beginGesture('overScan', backend)
+    scheduler.undoable = False
+    scheduler.schedule(handles.overscan, 1.2)
+    scheduler.endGesture()
+    assert [k for k in fake.undoCalls if 'openChunk' in k or 'closeChunk' in k] == [
+        {'openChunk': True, 'chunkName': 'overScan'}, {'closeChunk': True}]
+
+
+def test_no_chunk_closed_when_none_opened():
+    fake, backend, handles, scheduler = setup()
+    scheduler.undoable = False
+    scheduler.beginGesture('overScan', backend)
+    scheduler.undoable = True
+    scheduler.endGesture()
+    assert not fake.undoCalls
+
+
+def test_calls_kept_out_of_undo():
+    fake, backend, handles, scheduler = setup()
+    scheduler.schedule(handles.zoom, 1.1)
+    scheduler.flush()
+    scheduler.undoable = False
+    del fake.undoCalls[:]
+    scheduler.scheduleCall('dolly', fake.setAttr, handles.overscan.plug, 1.3)
+    scheduler.flush()
+    assert fake.undoCalls == [{'stateWithoutFlush': False}, {'stateWithoutFlush': True}]
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+# updateScheduler.py
+# coalesce the attribute writes of interactive drags and flush them at most
+# once per display refresh, one undo chunk per gesture
+
+import collections
+import time
+
+try:
+    from PySide2 import QtCore, QtGui
+except ImportError:
+    # no Qt (fake backend, benchmarks), flush() has to be called by hand
+    QtCore = None
+    QtGui = None
+
+
+# milliseconds between two flushes, follows the refresh rate of the main screen
+def refreshInterval():
+    rate = 60.0
+    if QtGui is not None and QtGui.QGuiApplication.instance():
+        screen = QtGui.QGuiApplication.primaryScreen()
+        if screen and screen.refreshRate() > 1:
+            rate = screen.refreshRate()
+    return int(1000.0 / rate)
+
+
+class UpdateScheduler(object):
+    def __init__(self, interval=None, autoFlush=True, historySize=240):
+        self.pending = collections.OrderedDict()
+        self.pendingCalls = collections.OrderedDict()
+        self.gesture = None
+        self.gestureBackend = None
+        # whether beginGesture opened an undo chunk, undoable may be toggled during the gesture
+        self.gestureChunk = False
+        # backend of the last scheduled write, for flushes with calls only
+        self.backend = None
+        # True while the pending writes go to the scene (see attributeSync.py)
+        self.flushing = False
+        # observer(handle, value) sees every scheduled value (see framingRecorder.py)
+        self.observers = []
+        # stepObserver() after each step: a flush outside of a gesture, or a whole gesture (see framingHistory.py)
+        self.stepObservers = []
+        # False keeps the writes out of Maya's undo queue, the tool keeps its own history
+        self.undoable = True
+        self.scheduled = 0
+        self.written = 0
+        self.flushes = 0
+        # (start time, duration in seconds, number of writes) per flush
+        self.flushTimes = collections.deque(maxlen=historySize)
+        self.timer = None
+        if autoFlush and QtCore is not None:
+            self.timer = QtCore.QTimer()
+            self.timer.setSingleShot(True)
+            self.timer.setInterval(interval if interval is not None else refreshInterval())
+            self.timer.timeout.connect(self.flush)
+
+    def _wake(self):
+        if self.timer is not None and not self.timer.isActive():
+            self.timer.start()
+
+    # the last value wins, one write per plug and per flush
+    # observers run first, value(handle) still gives the value before this one
+    def schedule(self, handle, value):
+        for observer in self.observers:
+            observer(handle, value)
+        self.pending[handle.plug] = (handle, value)
+        self.backend = handle.backend
+        self.scheduled += 1
+        self._wake()
+
+    # for commands that aren't a plain setAttr (cmds.dolly), coalesced by key
+    def scheduleCall(self, key, func, *args, **kwargs):
+        self.pendingCalls[key] = (func, args, kwargs)
+        self.scheduled += 1
+        self._wake()
+
+    # pending value if there's one, else the value in the scene
+    def value(self, handle):
+        if handle.plug in self.pending:
+            return self.pending[handle.plug][1]
+        return handle.get()
+
+    def flush(self):
+        if not self.pending and not self.pendingCalls:
+            return
+        if self.timer is not None:
+            self.timer.stop()
+        items = list(self.pending.values())
+        calls = list(self.pendingCalls.values())
+        self.pending.clear()
+        self.pendingCalls.clear()
+
+        start = time.time()
+        self.flushing = True
+        backend = items[0][0].backend if items else self.gestureBackend or self.backend
+        if backend is None and not self.undoable:
+            # nothing scheduled through a handle yet (cmds.dolly), the calls go to the default backend
+            from attributeHandles import defaultBackend
+            backend = defaultBackend()
+        if backend is not None and backend.cmds is None:
+            backend = None
+        if not self.undoable and backend is not None:
+            backend.cmds.undoInfo(stateWithoutFlush=False)
+        try:
+            if items:
+                if self.gesture:
+                    # already inside the gesture undo chunk
+                    for handle, value in items:
+                        handle.backend.set(handle, value)
+                else:
+                    items[0][0].backend.setMany(items)
+            for func, args, kwargs in calls:
+                func(*args, **kwargs)
+        finally:
+            self.flushing = False
+            if not self.undoable and backend is not None:
+                backend.cmds.undoInfo(stateWithoutFlush=True)
+        self.flushTimes.append((start, time.time() - start, len(items) + len(calls)))
+        self.written += len(items) + len(calls)
+        self.flushes += 1
+        if not self.gesture:
+            self._step()
+
+    def _step(self):
+        for observer in self.stepObservers:
+            observer()
+
+    # a gesture (slider press -> release, drag) is a single undo step
+    def beginGesture(self, name, backend):
+        if self.gesture:
+            self.endGesture()
+        self.flush()
+        self.gesture = name
+        self.gestureBackend = backend
+        self.backend = backend
+        self.gestureChunk = self.undoable
+        if self.gestureChunk:
+            backend.cmds.undoInfo(openChunk=True, chunkName=name)
+
+    # the chunk is closed if it was opened, whatever undoable is now
+    def endGesture(self):
+        self.flush()
+        gesture = self.gesture
+        if gesture and self.gestureChunk:
+            self.gestureBackend.cmds.undoInfo(closeChunk=True)
+        self.gesture = None
+        self.gestureBackend = None
+        self.gestureChunk = False
+        if gesture:
+            self._step()
+
+    def stats(self):
+        durations = [d for _, d, _ in self.flushTimes]
+        return {
+            'flushes': self.flushes,
+            'scheduled': self.scheduled,
+            'written': self.written,
+            'meanFlushMs': 1000.0 * sum(durations) / len(durations) if durations else 0.0,
+            'maxFlushMs': 1000.0 * max(durations) if durations else 0.0,
+        }